@@ -1,13 +1,14 @@
 # app.py
 
 # Исправленный импорт для QSystemTrayIcon (он в QtWidgets)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import QApplication, QMainWindow
 
 # 2. Менеджеры
 from data_manager import DataManager
 from effects import RainbowManager
 from input_logic import InputLogic
+from local_api import LocalApi
 from localization import Loc
 from menu_logic import MenuLogic
 from style_logic import StyleLogic
@@ -59,6 +60,15 @@ class StickyNote(QMainWindow):
         self.update_interface_texts()
         self.show()
 
+        # Проверка целостности базы — в фоне и после первой отрисовки окна
+        QTimer.singleShot(500, lambda: self.data.integrity.start(self.on_integrity_checked))
+        # Правки базы другими процессами (db_merger_v3, скрипты импорта)
+        self.data.watcher.notes_reloaded.connect(self.on_db_changed_externally)
+
+        # Локальный API для скриптов (local_api.py): задачи пишутся через этот процесс
+        self.api = LocalApi(self)
+        self.api.start()
+
     # --- PROXY METHODS (Связующие методы) ---
 
     # Этот метод вызывает TreeLogic, поэтому он должен быть здесь
@@ -113,6 +123,31 @@ class StickyNote(QMainWindow):
         if self.data.current_note_id:
             self.refresh_ui()
 
+    def on_integrity_checked(self, report, changed):
+        """Итог фоновой проверки базы (данные уже починены DataManager'ом)."""
+        if changed:
+            self.refresh_ui()
+        if report.get("salvaged") is not None:
+            text = Loc.t("integrity_salvaged", "Database was damaged. Recovered notes: {n}").format(n=len(report["salvaged"]))
+        elif report.get("quarantine"):
+            text = Loc.t("integrity_repaired", "Database problems were fixed. Original saved as backup")
+        else:
+            return
+        print(f"Integrity: {text} ({report.get('quarantine')})")
+        if hasattr(self, "tray"):
+            self.tray.showMessage("Seshat", text)
+
+    def on_db_changed_externally(self, report):
+        """Перечитаны только измененные заметки: дерево перестраивается, если среди них текущая."""
+        if report["current"]:
+            self.refresh_ui()
+            self.refresh_map_if_open()
+        else:
+            self.tree_logic.update_title_ui()
+        dashboard = self.menu_logic.dashboard
+        if dashboard is not None and dashboard.isVisible():
+            dashboard.refresh()
+
     def on_map_data_changed(self):
         """
         Callback для карты планет.
@@ -139,9 +174,16 @@ class StickyNote(QMainWindow):
         # Закрываем карту, если открыта
         self.menu_logic.force_close_map()
 
+        # Дописываем принятые по API изменения и закрываем сокет
+        self.api.close()
+
         # Сохраняемся
         self.tree_logic.save_and_update()
 
+        # Индекс поиска — кэш: пишем его на диск только при выходе
+        if self.data.search.dirty:
+            self.data.search.save()
+
         # Убираем иконку из трея, чтобы она не висела призраком
         if hasattr(self, "tray"):
             self.tray.hide()
@@ -1,19 +1,138 @@
 # archive.py
-from PyQt6.QtCore import Qt
+from datetime import datetime
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
 from PyQt6.QtWidgets import (
+    QComboBox,
     QDialog,
     QHBoxLayout,
-    QListWidget,
-    QListWidgetItem,
+    QLineEdit,
+    QListView,
     QMessageBox,
     QPushButton,
     QVBoxLayout,
 )
 
-# --- ВОТ ЭТОГО ИМПОРТА НЕ ХВАТАЛО ---
 from localization import Loc
 
 
+class ArchiveModel(QAbstractListModel):
+    """
+    Список заметок поверх NoteMetaIndex (без QListWidgetItem на каждую заметку).
+    Строки отдаются порциями через canFetchMore/fetchMore, view запрашивает data()
+    только для видимых строк.
+    """
+
+    NoteIdRole = Qt.ItemDataRole.UserRole
+    MetaRole = Qt.ItemDataRole.UserRole + 1  # Словарь метаданных (для делегатов, рисующих карточки)
+    PAGE_SIZE = 200
+
+    # Сортировки: (функция ключа по метаданным, по убыванию)
+    SORTS = {
+        "date_desc": (lambda m: m["start"] or 0, True),
+        "date_asc": (lambda m: m["start"] or 0, False),
+        "progress_desc": (lambda m: (m["progress"], m["total"]), True),
+        "progress_asc": (lambda m: (m["progress"], m["total"]), False),
+        "title": (lambda m: m["title"].casefold(), False),
+    }
+
+    def __init__(self, data_manager, parent=None):
+        super().__init__(parent)
+        self.dm = data_manager
+        self.sort_key = "date_desc"
+        self.filter_text = ""
+        self._ids = []  # Все id после фильтра и сортировки
+        self._loaded = 0  # Сколько из них уже отдано view
+        self.reload()
+
+    # --- Qt API ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._ids)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.PAGE_SIZE, len(self._ids) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        note_id = self._ids[index.row()]
+
+        if role == self.NoteIdRole:
+            return note_id
+        if role == self.MetaRole:
+            return self.dm.meta.get(note_id)
+
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            meta = self.dm.meta.get(note_id)
+            if role == Qt.ItemDataRole.DisplayRole:
+                # Маркируем текущую
+                marker = "➤ " if note_id == self.dm.current_note_id else ""
+                return f"{marker}{meta['title']}   {meta['progress']}%"
+            return self._tooltip(meta)
+        return None
+
+    @staticmethod
+    def _tooltip(meta):
+        def fmt(ts):
+            return datetime.fromtimestamp(ts).strftime("%d.%m.%Y %H:%M") if ts else "—"
+
+        return (
+            f"{fmt(meta['start'])} → {fmt(meta['finish'])}\n"
+            f"{meta['done']}/{meta['total']} ✓, {meta['cancelled']} ✕"
+        )
+
+    # --- Управление ---
+    def reload(self):
+        """Пересчитывает список id (фильтр + сортировка) и сбрасывает подгрузку."""
+        self.beginResetModel()
+        needle = self.filter_text.casefold()
+        metas = self.dm.meta.all()
+        if needle:
+            metas = [m for m in metas if needle in m["title"].casefold()]
+        key, reverse = self.SORTS[self.sort_key]
+        metas.sort(key=key, reverse=reverse)
+        self._ids = [m["id"] for m in metas]
+        self._loaded = min(self.PAGE_SIZE, len(self._ids))
+        self.endResetModel()
+
+    def set_filter(self, text):
+        self.filter_text = text.strip()
+        self.reload()
+
+    def set_sort(self, sort_key):
+        self.sort_key = sort_key
+        self.reload()
+
+    def remove_note(self, note_id):
+        """Удаляет одну строку, не перестраивая список."""
+        try:
+            row = self._ids.index(note_id)
+        except ValueError:
+            return
+        if row < self._loaded:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._ids[row]
+            self._loaded -= 1
+            self.endRemoveRows()
+        else:
+            del self._ids[row]
+
+    def refresh_markers(self):
+        """Текущая заметка могла смениться — перерисовываем загруженные строки."""
+        if self._loaded:
+            self.dataChanged.emit(self.index(0), self.index(self._loaded - 1), [Qt.ItemDataRole.DisplayRole])
+
+
 class ArchiveDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -23,9 +142,10 @@ class ArchiveDialog(QDialog):
         self.setMinimumSize(300, 400)
         self.setStyleSheet("""
             QDialog { background-color: #1e1e1e; color: #e0e0e0; }
-            QListWidget { background-color: #252525; border: 1px solid #333; color: #e0e0e0; font-size: 14px; }
-            QListWidget::item { padding: 5px; }
-            QListWidget::item:selected { background-color: #7c4dff; color: white; }
+            QListView { background-color: #252525; border: 1px solid #333; color: #e0e0e0; font-size: 14px; }
+            QListView::item { padding: 5px; }
+            QListView::item:selected { background-color: #7c4dff; color: white; }
+            QLineEdit, QComboBox { background-color: #252525; border: 1px solid #333; color: #e0e0e0; padding: 4px; }
             QPushButton { background-color: #333; color: #e0e0e0; border: none; padding: 8px; border-radius: 4px; }
             QPushButton:hover { background-color: #444; }
             QPushButton:pressed { background-color: #7c4dff; color: white; }
@@ -33,9 +153,30 @@ class ArchiveDialog(QDialog):
 
         layout = QVBoxLayout(self)
 
-        # Список заметок
-        self.list_widget = QListWidget()
-        layout.addWidget(self.list_widget)
+        # Фильтр и сортировка
+        top = QHBoxLayout()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText(Loc.t("archive_filter", "Filter..."))
+        top.addWidget(self.filter_edit, 1)
+
+        self.sort_combo = QComboBox()
+        for key, label in (
+            ("date_desc", Loc.t("sort_date_desc", "Newest first")),
+            ("date_asc", Loc.t("sort_date_asc", "Oldest first")),
+            ("progress_desc", Loc.t("sort_progress_desc", "Most done")),
+            ("progress_asc", Loc.t("sort_progress_asc", "Least done")),
+            ("title", Loc.t("sort_title", "By title")),
+        ):
+            self.sort_combo.addItem(label, key)
+        top.addWidget(self.sort_combo)
+        layout.addLayout(top)
+
+        # Список заметок (модель + view: рисуются только видимые строки)
+        self.model = ArchiveModel(self.mw.data, self)
+        self.list_view = QListView()
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setModel(self.model)
+        layout.addWidget(self.list_view)
 
         # Кнопки
         btn_layout = QHBoxLayout()
@@ -56,49 +197,30 @@ class ArchiveDialog(QDialog):
         layout.addLayout(btn_layout)
 
         # Двойной клик для открытия
-        self.list_widget.itemDoubleClicked.connect(self.open_note)
-
-        self.populate_list()
-
-    def populate_list(self):
-        self.list_widget.clear()
-        current_id = self.mw.data.current_note_id
-
-        # Перебираем все заметки
-        for note_id, note_data in self.mw.data.all_notes.items():
-            # Не показываем текущую открытую заметку в архиве (опционально)
-            # if note_id == current_id: continue
-
-            title = note_data.get("title", "Untitled")
+        self.list_view.doubleClicked.connect(self.open_note)
+        self.filter_edit.textChanged.connect(self.model.set_filter)
+        self.sort_combo.currentIndexChanged.connect(lambda _: self.model.set_sort(self.sort_combo.currentData()))
 
-            # Маркируем текущую
-            display_text = title
-            if note_id == current_id:
-                display_text = f"➤ {title}"
-
-            item = QListWidgetItem(display_text)
-            item.setData(Qt.ItemDataRole.UserRole, note_id)
-            self.list_widget.addItem(item)
+    def selected_note_id(self):
+        index = self.list_view.currentIndex()
+        if not index.isValid():
+            return None
+        return index.data(ArchiveModel.NoteIdRole)
 
     def open_note(self):
-        items = self.list_widget.selectedItems()
-        if not items:
+        note_id = self.selected_note_id()
+        if not note_id:
             return
 
-        note_id = items[0].data(Qt.ItemDataRole.UserRole)
-
-        # Переключаемся
-        if self.mw.data.switch_note(note_id):
-            self.mw.refresh_ui()
-            self.close()
+        # Переключаемся (с сохранением текущей)
+        self.mw.menu_logic.switch_to_note(note_id)
+        self.close()
 
     def delete_note(self):
-        items = self.list_widget.selectedItems()
-        if not items:
+        note_id = self.selected_note_id()
+        if not note_id:
             return
 
-        note_id = items[0].data(Qt.ItemDataRole.UserRole)
-
         # Спрашиваем подтверждение
         reply = QMessageBox.question(
             self,
@@ -109,24 +231,11 @@ class ArchiveDialog(QDialog):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            # Удаляем в менеджере данных
-            # (Функция delete_note должна быть в DataManager, если её нет - добавим ниже)
-            if hasattr(self.mw.data, "delete_note"):
-                self.mw.data.delete_note(note_id)
-                self.mw.refresh_ui()
-                self.populate_list()
-            else:
-                # Фолбек на случай, если метода нет (ручное удаление)
-                if note_id in self.mw.data.all_notes:
-                    del self.mw.data.all_notes[note_id]
-                    # Если удалили текущую - переключаемся на другую
-                    if note_id == self.mw.data.current_note_id:
-                        if self.mw.data.all_notes:
-                            new_id = list(self.mw.data.all_notes.keys())[0]
-                            self.mw.data.switch_note(new_id)
-                        else:
-                            self.mw.data.create_new_note()
-
-                    self.mw.data.save_to_disk()
-                    self.mw.refresh_ui()
-                    self.populate_list()
+            self.mw.data.delete_note(note_id)
+            self.mw.refresh_ui()
+            # Удаляем одну строку вместо полной перестройки списка
+            self.model.remove_note(note_id)
+            self.model.refresh_markers()
+            if self.model.rowCount() == 0:
+                # Удалили последнюю — DataManager создал новую заметку, показываем её
+                self.model.reload()
@@ -0,0 +1,217 @@
+# benchmarks/conftest.py
+"""
+Минимальный харнесс бенчмарков в стиле pytest-benchmark (без внешних зависимостей).
+
+Запуск:
+    QT_QPA_PLATFORM=offscreen pytest benchmarks --bench-json=bench.json
+    QT_QPA_PLATFORM=offscreen pytest benchmarks --bench-compare=bench.json --bench-threshold=0.25
+"""
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import pytest
+
+# --- FIX: Добавляем путь к корневой папке, чтобы Python видел файлы проекта ---
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+# -----------------------------------------------------------------------------
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+_RESULTS = []
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "Seshat benchmarks")
+    group.addoption("--bench-json", default=None, help="Куда записать результаты (JSON)")
+    group.addoption("--bench-compare", default=None, help="JSON предыдущего прогона для сравнения")
+    group.addoption("--bench-threshold", type=float, default=0.25, help="Допустимое замедление медианы (0.25 = +25%%)")
+    group.addoption("--bench-min-delta", type=float, default=0.002, help="Игнорировать разницу медиан меньше N секунд (шум)")
+    group.addoption("--bench-rounds", type=int, default=5, help="Сколько замеров на бенчмарк")
+    group.addoption("--bench-tasks", type=int, default=2000, help="Количество задач в синтетической заметке")
+    group.addoption("--bench-depth", type=int, default=4, help="Максимальная вложенность задач")
+    group.addoption("--bench-planets", type=int, default=30, help="Планет на карте целей")
+    group.addoption("--bench-moons", type=int, default=8, help="Лун у каждой планеты")
+    group.addoption("--bench-frames", type=int, default=60, help="Сколько кадров карты рендерить")
+    group.addoption("--bench-large", action="store_true", default=False, help="Включить тяжелые бенчмарки (сотни МБ)")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--bench-large"):
+        return
+    skip_large = pytest.mark.skip(reason="нужен --bench-large")
+    for item in items:
+        if "large" in item.keywords:
+            item.add_marker(skip_large)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "large: тяжелый бенчмарк, запускается только с --bench-large")
+
+
+class BenchmarkFixture:
+    """Повторяет основной API фикстуры `benchmark` из pytest-benchmark."""
+
+    def __init__(self, name, rounds):
+        self.name = name
+        self.rounds = rounds
+        self.extra_info = {}
+        self.stats = None
+
+    def __call__(self, func, *args, **kwargs):
+        return self.pedantic(func, args=args, kwargs=kwargs, rounds=self.rounds, warmup_rounds=1)
+
+    def pedantic(self, func, args=(), kwargs=None, setup=None, rounds=None, warmup_rounds=0):
+        kwargs = kwargs or {}
+        rounds = rounds or self.rounds
+
+        def run_once():
+            call_args, call_kwargs = args, kwargs
+            if setup:
+                prepared = setup()
+                if prepared is not None:
+                    call_args, call_kwargs = prepared
+            start = time.perf_counter()
+            result = func(*call_args, **call_kwargs)
+            return time.perf_counter() - start, result
+
+        for _ in range(warmup_rounds):
+            run_once()
+
+        timings = []
+        result = None
+        for _ in range(rounds):
+            elapsed, result = run_once()
+            timings.append(elapsed)
+
+        self.record(timings)
+        return result
+
+    def record(self, timings):
+        """Регистрирует готовые замеры (для бенчмарков, которые меряют время сами)."""
+        self.stats = {
+            "min": min(timings),
+            "max": max(timings),
+            "mean": statistics.fmean(timings),
+            "median": statistics.median(timings),
+            "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            "rounds": len(timings),
+        }
+
+
+@pytest.fixture
+def benchmark(request):
+    bench = BenchmarkFixture(request.node.nodeid, request.config.getoption("--bench-rounds"))
+    yield bench
+    if bench.stats:
+        _RESULTS.append({"name": bench.name, "stats": bench.stats, "extra_info": bench.extra_info})
+
+
+@pytest.fixture
+def bench_size(request):
+    return {
+        "tasks": request.config.getoption("--bench-tasks"),
+        "depth": request.config.getoption("--bench-depth"),
+        "planets": request.config.getoption("--bench-planets"),
+        "moons": request.config.getoption("--bench-moons"),
+        "frames": request.config.getoption("--bench-frames"),
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(__file__),
+            timeout=5,
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _compare(baseline_path, threshold, min_delta):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {b["name"]: b for b in json.load(f).get("benchmarks", [])}
+
+    report = []
+    regressions = []
+    for bench in _RESULTS:
+        old = baseline.get(bench["name"])
+        if not old:
+            continue
+        old_median = old["stats"]["median"]
+        new_median = bench["stats"]["median"]
+        ratio = new_median / old_median if old_median > 0 else 1.0
+        line = (bench["name"], old_median, new_median, ratio)
+        report.append(line)
+        if ratio > 1.0 + threshold and new_median - old_median > min_delta:
+            regressions.append(line)
+    return report, regressions
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if not _RESULTS:
+        return
+
+    json_path = config.getoption("--bench-json")
+    if json_path:
+        payload = {
+            "datetime": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "machine": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "processor": platform.processor(),
+            },
+            "params": {
+                "tasks": config.getoption("--bench-tasks"),
+                "depth": config.getoption("--bench-depth"),
+                "planets": config.getoption("--bench-planets"),
+                "moons": config.getoption("--bench-moons"),
+                "frames": config.getoption("--bench-frames"),
+                "rounds": config.getoption("--bench-rounds"),
+            },
+            "benchmarks": _RESULTS,
+        }
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+
+    compare_path = config.getoption("--bench-compare")
+    if compare_path and os.path.exists(compare_path):
+        report, regressions = _compare(
+            compare_path, config.getoption("--bench-threshold"), config.getoption("--bench-min-delta")
+        )
+        config._bench_report = (report, regressions)
+        if regressions:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _RESULTS:
+        return
+    tr = terminalreporter
+    tr.section("seshat benchmarks")
+    for bench in _RESULTS:
+        s = bench["stats"]
+        extra = "  ".join(f"{k}={v}" for k, v in bench["extra_info"].items())
+        tr.write_line(
+            f"{bench['name']:<70} median {s['median'] * 1000:9.2f} ms  "
+            f"min {s['min'] * 1000:9.2f} ms  rounds {s['rounds']}  {extra}".rstrip()
+        )
+
+    report, regressions = getattr(config, "_bench_report", ([], []))
+    if report:
+        tr.section("comparison with baseline")
+        for name, old, new, ratio in report:
+            mark = "REGRESSION" if (name, old, new, ratio) in regressions else ""
+            tr.write_line(f"{name:<70} {old * 1000:9.2f} -> {new * 1000:9.2f} ms  x{ratio:5.2f} {mark}")
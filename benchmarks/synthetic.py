@@ -0,0 +1,120 @@
+# benchmarks/synthetic.py
+"""Генератор синтетических заметок для бенчмарков (детерминированный по seed)."""
+import random
+import uuid
+
+WORDS = [
+    "report", "deploy", "review", "call", "buy", "fix", "write", "plan",
+    "отчёт", "купить", "позвонить", "исправить", "написать", "встреча",
+    "жоспар", "тапсырма", "görev", "toplantı", "مهمة", "اجتماع",
+]
+
+
+def _make_text(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6)))
+
+
+def make_tasks(count, depth, seed=0):
+    """
+    Строит дерево из `count` задач с максимальной вложенностью `depth`.
+    Примерно треть задач — корневые, остальные цепляются к случайному
+    узлу, у которого ещё есть запас глубины.
+    """
+    rng = random.Random(seed)
+    roots = []
+    # Узлы, к которым ещё можно прицепить ребенка: (dict, уровень)
+    open_nodes = []
+
+    for _ in range(count):
+        checked = rng.random() < 0.4
+        cancelled = not checked and rng.random() < 0.1
+        task = {
+            "text": _make_text(rng),
+            "checked": checked,
+            "done_date": "24.12.2025, 15:30" if checked else None,
+            "cancelled": cancelled,
+            "children": [],
+        }
+
+        if not open_nodes or rng.random() < 0.3:
+            roots.append(task)
+            level = 1
+        else:
+            parent, parent_level = rng.choice(open_nodes)
+            parent["children"].append(task)
+            level = parent_level + 1
+
+        if level < depth:
+            open_nodes.append((task, level))
+
+    return roots
+
+
+def make_note(count, depth, seed=0, title="Bench note"):
+    return {
+        "title": title,
+        "tasks": make_tasks(count, depth, seed),
+        "start_time_str": "01.01.2025 10:00:00",
+        "finish_time_str": None,
+    }
+
+
+def make_db(notes, tasks_per_note, depth, seed=0):
+    """Полная структура seshat_db.json из `notes` заметок."""
+    all_notes = {}
+    for i in range(notes):
+        nid = str(uuid.UUID(int=random.Random(seed + i).getrandbits(128)))
+        all_notes[nid] = make_note(tasks_per_note, depth, seed + i, title=f"Bench note {i}")
+    return {
+        "language": "en",
+        "notes": all_notes,
+        "current_note_id": next(iter(all_notes), None),
+    }
+
+
+def count_tasks(tasks):
+    total = 0
+    stack = list(tasks)
+    while stack:
+        task = stack.pop()
+        total += 1
+        stack.extend(task.get("children", []))
+    return total
+
+
+def make_map_note(planets, moons, seed=0, title="Bench map"):
+    """
+    Данные заметки для карты целей: `planets` корневых задач по `moons` подзадач.
+    Часть планет и лун выполнена или зачеркнута.
+    """
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(planets):
+        children = []
+        for j in range(moons):
+            roll = rng.random()
+            children.append(
+                {
+                    "text": f"{_make_text(rng)} {i}.{j}",
+                    "checked": roll < 0.35,
+                    "done_date": "24.12.2025, 15:30" if roll < 0.35 else None,
+                    "cancelled": 0.35 <= roll < 0.45,
+                    "children": [],
+                }
+            )
+        roll = rng.random()
+        tasks.append(
+            {
+                "text": f"{_make_text(rng)} {i}",
+                "checked": roll < 0.2,
+                "done_date": "24.12.2025, 15:30" if roll < 0.2 else None,
+                "cancelled": 0.2 <= roll < 0.3,
+                "children": children,
+            }
+        )
+    return {
+        "title": title,
+        "tasks": tasks,
+        "start_time_str": "01.01.2025 10:00:00",
+        "finish_time_str": None,
+    }
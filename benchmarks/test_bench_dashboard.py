@@ -0,0 +1,79 @@
+# benchmarks/test_bench_dashboard.py
+"""Бенчмарк дашборда: тысячи заметок, только сводки (без деревьев задач)."""
+import random
+
+import pytest
+from PyQt6.QtGui import QImage, QPainter
+
+from dashboard import DashboardWindow
+from note_meta import NoteMetaIndex
+
+DASH_NOTES = 5000
+
+
+class DashData:
+    def __init__(self, count, seed=1234):
+        rng = random.Random(seed)
+        self.all_notes = {}
+        for i in range(count):
+            total = rng.randint(0, 80)
+            done = rng.randint(0, total)
+            self.all_notes[f"n{i}"] = {
+                "title": f"Note {i}",
+                "tasks": [],
+                "summary": {
+                    "v": 1, "total": total, "done": done, "cancelled": 0, "open": total - done,
+                    "progress": int(done / total * 100) if total else 0, "start": 1.7e9 + i * 3600, "finish": None,
+                },
+            }
+        self.current_note_id = "n0"
+        self.meta = NoteMetaIndex(self)
+
+
+class DashWindow:
+    default_accent = "#7c4dff"
+
+    def __init__(self):
+        self.data = DashData(DASH_NOTES)
+
+
+@pytest.fixture
+def dashboard(qapp):
+    dash = DashboardWindow(DashWindow())
+    dash.resize(1000, 700)
+    dash.show()
+    qapp.processEvents()
+    yield dash
+    dash.close()
+
+
+def _render(widget):
+    image = QImage(widget.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    painter = QPainter(image)
+    widget.render(painter)
+    painter.end()
+
+
+def test_dashboard_open(benchmark, qapp):
+    def open_dashboard():
+        dash = DashboardWindow(DashWindow())
+        dash.resize(1000, 700)
+        _render(dash)
+        dash.deleteLater()
+
+    benchmark(open_dashboard)
+
+
+def test_dashboard_grid_frame(benchmark, dashboard):
+    benchmark(_render, dashboard.grid.viewport())
+
+
+def test_dashboard_galaxy(benchmark, dashboard):
+    benchmark(dashboard.build_galaxy)
+    dashboard.set_mode(1)
+    benchmark.extra_info["stars"] = len(dashboard.scene.items())
+
+
+def test_dashboard_galaxy_frame(benchmark, dashboard):
+    dashboard.set_mode(1)
+    benchmark(_render, dashboard.galaxy.viewport())
@@ -0,0 +1,251 @@
+# benchmarks/test_bench_data.py
+"""Бенчмарки горячих путей данных и дерева (без главного окна)."""
+import json
+import os
+
+import pytest
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QLabel, QProgressBar
+from synthetic import count_tasks, make_db, make_tasks
+
+from data_manager import DataManager
+from db_integrity import check_raw
+from effects import RainbowManager
+from note_export import export_db
+from note_import import iter_import
+from outline_paste import parse_outline
+from task_tree import DraggableTreeWidget
+from tree_core import TreeCore
+from tree_filter import TreeFilter
+from tree_hoist import TreeHoist
+from tree_io import TreeIO
+from tree_progress import TreeProgress
+
+
+class BenchWindow:
+    """Минимальный набор атрибутов главного окна, нужный TreeIO/TreeProgress."""
+
+    def __init__(self, data):
+        self.data = data
+        self.tree = DraggableTreeWidget(on_change_callback=None)
+        self.progress = QProgressBar()
+        self.lbl_percent = QLabel()
+        self.rainbow = RainbowManager()
+        self.default_accent = "#7c4dff"
+
+
+@pytest.fixture
+def db_payload(bench_size):
+    return make_db(notes=5, tasks_per_note=bench_size["tasks"], depth=bench_size["depth"])
+
+
+@pytest.fixture
+def data_manager(qapp, tmp_path, monkeypatch, db_payload):
+    monkeypatch.chdir(tmp_path)
+    with open("seshat_db.json", "w", encoding="utf-8") as f:
+        json.dump(db_payload, f, ensure_ascii=False, indent=2)
+    dm = DataManager()
+    yield dm
+    dm.watcher.stop()  # Таймер не должен сработать после выхода из tmp_path
+
+
+@pytest.fixture
+def current_tasks(data_manager):
+    return data_manager.all_notes[data_manager.current_note_id]["tasks"]
+
+
+def test_save_to_disk(benchmark, data_manager, current_tasks):
+    benchmark.extra_info["tasks_per_note"] = count_tasks(current_tasks)
+    benchmark(data_manager.save_to_disk)
+
+
+def test_load_from_file(benchmark, data_manager):
+    benchmark(data_manager.load_from_file)
+    assert len(data_manager.all_notes) == 5
+
+
+def test_history_add(benchmark, data_manager, current_tasks):
+    benchmark(data_manager.history.add_to_history, current_tasks)
+
+
+def test_update_smart_title(benchmark, data_manager):
+    benchmark(data_manager.parser.update_smart_title)
+
+
+def test_tree_load_data(benchmark, data_manager, current_tasks):
+    window = BenchWindow(data_manager)
+    io = TreeIO(window.tree)
+    benchmark(io.load_data, current_tasks)
+    assert window.tree.topLevelItemCount() > 0
+
+
+def test_tree_load_collapsed(benchmark, data_manager, current_tasks):
+    """Та же заметка со свернутыми корнями: строятся только видимые строки (ср. test_tree_load_data)."""
+    collapsed = [dict(task, expanded=False) for task in current_tasks]
+    window = BenchWindow(data_manager)
+    io = TreeIO(window.tree)
+    benchmark(io.load_data, collapsed)
+    benchmark.extra_info["rows"] = window.tree.topLevelItemCount()
+    assert io.collect_data()[0]["children"] is collapsed[0]["children"]
+
+
+def test_tree_collect_data(benchmark, data_manager, current_tasks):
+    window = BenchWindow(data_manager)
+    io = TreeIO(window.tree)
+    io.load_data(current_tasks)
+    tasks = benchmark(io.collect_data)
+    assert count_tasks(tasks) == count_tasks(current_tasks)
+
+
+def test_tree_save_hoisted(benchmark, data_manager, current_tasks):
+    """Сохранение в фокусе на ветке: сбор только ветки и вклейка в полное дерево (ср. test_tree_collect_data)."""
+    window = BenchWindow(data_manager)
+    io = TreeIO(window.tree)
+    hoist = TreeHoist(window)
+    branch = max(current_tasks, key=lambda task: len(task["children"]))
+    hoist.enter([branch["id"]])
+    io.load_data(hoist.branch(current_tasks))
+    tasks = benchmark(lambda: hoist.splice(current_tasks, io.collect_data()))
+    benchmark.extra_info["branch_tasks"] = count_tasks(branch["children"])
+    assert count_tasks(tasks) == count_tasks(current_tasks)
+
+
+def test_progress_calculate(benchmark, data_manager, current_tasks):
+    window = BenchWindow(data_manager)
+    TreeIO(window.tree).load_data(current_tasks)
+    progress = TreeProgress(window)
+    benchmark(progress.calculate_and_update)
+
+
+def test_integrity_check(benchmark, data_manager):
+    """Фоновая проверка: разбор по заметкам, схема и crc32 (вне GUI-потока)."""
+    data_manager.save_to_disk()
+    with open(data_manager.filename, "rb") as f:
+        raw = f.read()
+    report = benchmark(check_raw, raw)
+    assert report["checked"] == 5 and not report["mismatch"]
+
+
+def test_external_change_reload(benchmark, data_manager):
+    """Другой процесс поменял одну заметку: перечитывается файл, заменяется только она (ср. test_load_from_file)."""
+    data_manager.save_to_disk()
+    other = next(nid for nid in data_manager.all_notes if nid != data_manager.current_note_id)
+    counter = iter(range(10**6))
+
+    def external_edit():
+        with open(data_manager.filename, encoding="utf-8") as f:
+            data = json.load(f)
+        data["notes"][other]["title"] = f"external {next(counter)}"
+        with open(data_manager.filename, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    report = benchmark.pedantic(data_manager.watcher.merge_external, setup=external_edit, warmup_rounds=1)
+    assert report["changed"] == [other] and not report["current"]
+
+
+def test_outline_paste(benchmark, data_manager):
+    """Вставка списка на 10k строк: разбор (в приложении — в фоне) + дерево + одно сохранение."""
+    lines = []
+    for i in range(2500):
+        lines += [f"- [ ] Section {i}", f"  - [x] done {i}", f"  - [ ] todo {i}", f"    x 2024-05-01 leaf {i}"]
+    text = "\n".join(lines)
+    window = BenchWindow(data_manager)
+    io = TreeIO(window.tree)
+
+    def paste():
+        io.append_data(parse_outline(text))
+        data_manager.save_current_state(io.collect_data())
+
+    benchmark.pedantic(paste, setup=lambda: io.load_data([]), rounds=3)
+    assert count_tasks(data_manager.all_notes[data_manager.current_note_id]["tasks"]) == 10_000
+
+
+def test_check_deep_subtree(benchmark, data_manager):
+    """Клик по флажку корня дерева в 50k задач и 10 уровней: всё поддерево и предки, одно сохранение."""
+    window = BenchWindow(data_manager)
+    io = TreeIO(window.tree)
+    io.load_data([{"text": "root", "checked": False, "children": make_tasks(50_000, 9)}])
+    saves = []
+    core = TreeCore(window, callback_save=lambda: saves.append(1))
+    window.tree.itemChanged.connect(lambda item, _col: core.on_item_changed(item))
+    root = window.tree.topLevelItem(0)
+
+    benchmark.pedantic(
+        root.setCheckState, args=(0, Qt.CheckState.Checked),
+        setup=lambda: core.set_checked([root], False), rounds=3,
+    )
+    assert len(saves) == 6  # По сохранению на снятие и на отметку
+    last = root
+    while last.childCount():
+        last = last.child(last.childCount() - 1)
+    assert last.checkState(0) == Qt.CheckState.Checked
+
+
+def test_filter_apply(benchmark, data_manager):
+    """Смена фильтра на дереве в 50k задач: строки прячутся, дерево не перестраивается."""
+    window = BenchWindow(data_manager)
+    TreeIO(window.tree).load_data(make_tasks(50_000, 6))
+    view_filter = TreeFilter(window.tree)
+    view_filter.mode = "open"
+    benchmark(view_filter.apply)
+    root = window.tree.invisibleRootItem()
+    benchmark.extra_info["hidden_roots"] = sum(root.child(i).isHidden() for i in range(root.childCount()))
+
+
+def test_filter_check_refresh(benchmark, data_manager):
+    """Отметка задачи при фильтре: пересчет только её поддерева и предков (ср. test_filter_apply)."""
+    window = BenchWindow(data_manager)
+    TreeIO(window.tree).load_data(make_tasks(50_000, 6))
+    view_filter = TreeFilter(window.tree)
+    view_filter.mode = "open"
+    view_filter.apply()
+    core = TreeCore(window, callback_save=lambda: None, view_filter=view_filter)
+    item = window.tree.topLevelItem(0)
+    while item.childCount():
+        item = item.child(0)
+
+    benchmark.pedantic(
+        core.set_checked, args=([item], True),
+        setup=lambda: core.set_checked([item], False), rounds=20,
+    )
+    assert item.isHidden()
+
+
+def test_drop_large_branch(benchmark, data_manager):
+    """Перетаскивание раскрытой ветки в ~2000 задач: переносятся те же объекты, одно сохранение."""
+    window = BenchWindow(data_manager)
+    io = TreeIO(window.tree)
+    io.load_data([
+        {"text": "branch", "checked": False, "children": make_tasks(2_000, 6)},
+        {"text": "a", "checked": False, "children": []},
+        {"text": "b", "checked": False, "children": []},
+    ])
+    saves = []
+    core = TreeCore(window, callback_save=lambda: saves.append(1))
+    branch = window.tree.topLevelItem(0)
+    targets = [window.tree.topLevelItem(1), window.tree.topLevelItem(2)]
+    branch.setSelected(True)
+    rounds = iter(range(10**6))
+
+    benchmark.pedantic(lambda: core.move_to(targets[next(rounds) % 2]), rounds=10)
+    assert len(saves) == 10 and branch.isExpanded() and branch.parent() in targets
+
+
+@pytest.mark.parametrize("fmt", ["md", "opml", "csv", "ics"])
+def test_export_db(benchmark, data_manager, tmp_path, fmt):
+    """Потоковый экспорт всей базы в файл (по одной заметке с диска)."""
+    out = str(tmp_path / f"export.{fmt}")
+    count = benchmark(export_db, data_manager.filename, out, fmt)
+    benchmark.extra_info["bytes"] = os.path.getsize(out)
+    assert count == len(data_manager.all_notes)
+
+
+@pytest.mark.parametrize("fmt", ["opml", "md", "csv"])
+def test_import_file(benchmark, data_manager, tmp_path, fmt):
+    """Разбор экспорта всей базы обратно в задачи (в приложении — в фоновом потоке)."""
+    src = str(tmp_path / f"export.{fmt}")
+    export_db(data_manager.filename, src, fmt)
+    notes = benchmark(lambda: list(iter_import(src)))
+    size = os.path.getsize(src)
+    benchmark.extra_info["mb_per_s"] = round(size / 1e6 / benchmark.stats["median"], 1)
+    assert len(notes) == len(data_manager.all_notes)
@@ -0,0 +1,128 @@
+# benchmarks/test_bench_goal_map.py
+"""
+Бенчмарк рендеринга карты целей: N планет по M лун, K кадров в QImage.
+game_loop вызывается вручную (таймер остановлен), random зафиксирован seed'ом.
+"""
+import random
+import time
+from collections import defaultdict
+
+import pytest
+from PyQt6.QtGui import QImage, QPainter
+from synthetic import make_map_note
+
+from gm_moon import SubTaskMoonItem
+from gm_planet import TaskPlanetItem
+from gm_sun import SunItem
+from goal_map import DynamicStarryScene, GoalMapWindow
+
+SEED = 1234
+
+# (метка в отчете, класс, имя метода)
+SECTIONS = [
+    ("scene.advance", DynamicStarryScene, "advance"),
+    ("scene.drawBackground", DynamicStarryScene, "drawBackground"),
+    ("planet.paint", TaskPlanetItem, "paint"),
+    ("moon.paint", SubTaskMoonItem, "paint"),
+    ("sun.paint", SunItem, "paint"),
+    ("map.build_map", GoalMapWindow, "build_map"),
+]
+
+
+class SectionTimer:
+    """Оборачивает методы классов и копит суммарное время и число вызовов."""
+
+    def __init__(self, monkeypatch):
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+        for label, cls, name in SECTIONS:
+            monkeypatch.setattr(cls, name, self._wrap(label, getattr(cls, name)))
+
+    def _wrap(self, label, func):
+        totals, calls = self.totals, self.calls
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                totals[label] += time.perf_counter() - start
+                calls[label] += 1
+
+        return timed
+
+    def reset(self):
+        self.totals.clear()
+        self.calls.clear()
+
+    def report(self, frames):
+        return {
+            label: {
+                "total_ms": round(self.totals[label] * 1000, 3),
+                "per_frame_ms": round(self.totals[label] * 1000 / max(1, frames), 3),
+                "calls": self.calls[label],
+            }
+            for label, _, _ in SECTIONS
+        }
+
+
+@pytest.fixture
+def map_note(bench_size):
+    return make_map_note(bench_size["planets"], bench_size["moons"], seed=SEED)
+
+
+@pytest.fixture
+def map_window(qapp, map_note):
+    random.seed(SEED)
+    window = GoalMapWindow(map_note, "#7c4dff")
+    window.anim_timer.stop()
+    window.clock.timer.stop()
+    window.show()
+    qapp.processEvents()
+    yield window
+    window.close()
+    window.deleteLater()
+
+
+def _render_frame(window, image):
+    window.game_loop()
+    painter = QPainter(image)
+    window.view.render(painter)
+    painter.end()
+
+
+def test_goal_map_frames(benchmark, monkeypatch, map_window, bench_size):
+    frames = bench_size["frames"]
+    timer = SectionTimer(monkeypatch)
+    image = QImage(map_window.view.viewport().size(), QImage.Format.Format_ARGB32_Premultiplied)
+
+    # Прогрев: первый кадр строит кэши шрифтов/градиентов
+    _render_frame(map_window, image)
+    timer.reset()
+    random.seed(SEED)
+
+    frame_times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        _render_frame(map_window, image)
+        frame_times.append(time.perf_counter() - start)
+
+    benchmark.record(frame_times)
+    benchmark.extra_info.update(
+        {
+            "planets": bench_size["planets"],
+            "moons_per_planet": bench_size["moons"],
+            "frames": frames,
+            "fps": round(frames / sum(frame_times), 1),
+            "sections": timer.report(frames),
+        }
+    )
+
+
+def test_goal_map_build(benchmark, map_window):
+    def rebuild():
+        random.seed(SEED)
+        map_window.build_map()
+
+    benchmark(rebuild)
+    benchmark.extra_info["planets"] = len(map_window.planets)
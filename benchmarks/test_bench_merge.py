@@ -0,0 +1,44 @@
+# benchmarks/test_bench_merge.py
+"""Бенчмарк трехстороннего merge: две копии базы по 50k задач с независимыми правками."""
+import copy
+import random
+
+import pytest
+from synthetic import make_note
+
+from task_merge import ensure_task_ids, flatten, merge_databases
+
+MERGE_TASKS = 50_000
+
+
+def _edit(db, seed, share=0.05):
+    """Меняет статус/текст у доли задач (детерминированно по seed)."""
+    rng = random.Random(seed)
+    for note in db["notes"].values():
+        stack = list(note["tasks"])
+        while stack:
+            task = stack.pop()
+            if rng.random() < share:
+                if rng.random() < 0.5:
+                    task["checked"] = not task["checked"]
+                else:
+                    task["text"] += " (edit)"
+                task["mtime"] = 1_000 + seed
+            stack.extend(task["children"])
+    return db
+
+
+@pytest.fixture(scope="module")
+def merge_dbs():
+    base = {"language": "ru", "notes": {"bench": make_note(MERGE_TASKS, 4, seed=7)}}
+    ensure_task_ids(base["notes"]["bench"]["tasks"], "bench")
+    ours = _edit(copy.deepcopy(base), seed=1)
+    theirs = _edit(copy.deepcopy(base), seed=2)
+    return base, ours, theirs
+
+
+def test_merge_50k(benchmark, merge_dbs):
+    base, ours, theirs = merge_dbs
+    merged, conflicts = benchmark(merge_databases, base, ours, theirs)
+    benchmark.extra_info["conflicts"] = len(conflicts)
+    assert len(flatten(merged["notes"]["bench"]["tasks"])) == MERGE_TASKS
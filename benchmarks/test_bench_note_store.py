@@ -0,0 +1,95 @@
+# benchmarks/test_bench_note_store.py
+"""
+Ленивое хранилище (note_store) на больших снимках: открытие базы и переключение
+заметок не зависят от размера архива. 1 ГБ — только с --bench-large.
+Снимок пишется без сжатия, чтобы размер файла был честным.
+"""
+import json
+import os
+import time
+
+import pytest
+from synthetic import make_note
+
+from data_manager import DataManager
+from db_snapshot import SnapshotWriter
+from db_stream import note_checksum
+from note_meta import compute_summary
+
+NOTE_TASKS = 4000  # ~0.5 МБ JSON на заметку
+SIZES_MB = [64, pytest.param(1024, marks=pytest.mark.large)]
+
+
+def _rss_mb():
+    """Текущий RSS процесса (Linux); None, если /proc недоступен."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+@pytest.fixture(scope="module", params=SIZES_MB, ids=lambda mb: f"{mb}MB")
+def big_snapshot(request, tmp_path_factory):
+    folder = tmp_path_factory.mktemp(f"store{request.param}")
+    note = make_note(NOTE_TASKS, 4)
+    note["summary"] = compute_summary(note)
+    blob = json.dumps(note, ensure_ascii=False).encode("utf-8")
+    crc = note_checksum(note)
+    meta = {"title": note["title"], **note["summary"]}
+
+    count = request.param * 2**20 // len(blob)
+    ids = [f"note-{i:06d}" for i in range(count)]
+    with SnapshotWriter(str(folder / "seshat_db.snap"), codec="none", language="en", current_note_id=ids[0]) as w:
+        for nid in ids:
+            w.write_blob(nid, blob, crc, meta)
+    return folder, ids
+
+
+@pytest.fixture
+def lazy_dm(qapp, monkeypatch, big_snapshot):
+    folder, ids = big_snapshot
+    monkeypatch.chdir(folder)
+    dm = DataManager()
+    yield dm, ids
+    dm.watcher.stop()
+
+
+def test_store_open(benchmark, qapp, monkeypatch, big_snapshot):
+    folder, ids = big_snapshot
+    monkeypatch.chdir(folder)
+    dm = benchmark(DataManager)
+    benchmark.extra_info["notes"] = len(ids)
+    assert len(dm.all_notes) == len(ids) and dm.all_notes.loaded_count() == 1
+
+
+@pytest.mark.parametrize("where", ["first", "last"])
+def test_store_switch(benchmark, lazy_dm, where):
+    dm, ids = lazy_dm
+    targets = iter(ids[1:] if where == "first" else reversed(ids))
+
+    def switch():
+        nid = next(targets)
+        dm.switch_note(nid)
+        return dm.all_notes[nid]["tasks"]
+
+    tasks = benchmark(switch)
+    assert tasks
+
+
+def test_store_switch_constant_memory(lazy_dm):
+    """Переключения по всему архиву: время не зависит от позиции, память — от размера базы."""
+    dm, ids = lazy_dm
+    rss_before = _rss_mb()
+    timings = []
+    for nid in ids[:: max(1, len(ids) // 50)]:
+        start = time.perf_counter()
+        dm.switch_note(nid)
+        dm.all_notes[nid]["tasks"]
+        timings.append(time.perf_counter() - start)
+        dm.all_notes._loaded.pop(nid, None)  # Как после сохранения: в памяти только текущая
+
+    head, tail = sorted(timings[:5])[2], sorted(timings[-5:])[2]
+    assert tail < head * 3 + 0.005
+    if rss_before is not None:
+        assert _rss_mb() - rss_before < 128
@@ -0,0 +1,62 @@
+# benchmarks/test_bench_search.py
+"""Бенчмарки полнотекстового индекса: построение и запросы на ~100k задач."""
+import pytest
+from synthetic import make_db
+
+from search_index import SearchIndex
+from task_merge import ensure_task_ids
+
+SEARCH_NOTES = 20
+SEARCH_TASKS_PER_NOTE = 5000
+
+
+class IndexData:
+    def __init__(self, path, notes):
+        self.filename = str(path)
+        self.all_notes = notes
+        self.current_note_id = next(iter(notes))
+
+
+@pytest.fixture(scope="module")
+def search_notes():
+    notes = make_db(notes=SEARCH_NOTES, tasks_per_note=SEARCH_TASKS_PER_NOTE, depth=4)["notes"]
+    for note_id, note in notes.items():
+        ensure_task_ids(note["tasks"], note_id)
+    return notes
+
+
+@pytest.fixture
+def search_index(tmp_path, search_notes):
+    index = SearchIndex(IndexData(tmp_path / "seshat_db.json", search_notes))
+    index.load()
+    return index
+
+
+def test_search_build_cold(benchmark, tmp_path, search_notes):
+    def build():
+        SearchIndex(IndexData(tmp_path / "cold" / "seshat_db.json", search_notes)).load()
+
+    (tmp_path / "cold").mkdir()
+    benchmark(build)
+
+
+def test_search_build_persisted(benchmark, search_index):
+    """Старт с сохраненным индексом: токенизация не нужна, только сверка контрольных сумм."""
+    benchmark(SearchIndex(search_index.dm).load)
+
+
+@pytest.mark.parametrize("query", ["купить", "rev", "görev toplantı", "مهمة", "x"])
+def test_search_query(benchmark, search_index, query):
+    results = benchmark(search_index.search, query)
+    benchmark.extra_info["hits"] = len(results)
+
+
+def test_search_update_note(benchmark, search_index, search_notes):
+    note_id = next(iter(search_notes))
+    tasks = search_notes[note_id]["tasks"]
+
+    def edit_and_update():
+        tasks[0]["text"] += " edit"
+        search_index.update_note(note_id)
+
+    benchmark(edit_and_update)
@@ -0,0 +1,68 @@
+# benchmarks/test_bench_snapshot.py
+"""
+Форматы базы: JSON с отступами (старый save_to_disk), компактный JSON
+(NoteStreamWriter) и снимки db_snapshot с разными кодеками.
+Размер файла пишется в extra_info (size_kb). 1M задач — только с --bench-large.
+"""
+import json
+
+import pytest
+from synthetic import make_db
+
+from db_snapshot import SnapshotReader, SnapshotWriter, available_codecs, read_snapshot
+from db_stream import NoteStreamWriter
+
+SIZES = [10_000, 100_000, pytest.param(1_000_000, marks=pytest.mark.large)]
+FORMATS = ["json_indent", "json_compact"] + [f"snap_{codec}" for codec in available_codecs()]
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda n: f"{n // 1000}k")
+def db(request):
+    return make_db(notes=10, tasks_per_note=request.param // 10, depth=4)
+
+
+def save(fmt, path, db):
+    meta = {"language": db["language"], "current_note_id": db["current_note_id"]}
+    if fmt == "json_indent":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(db, f, ensure_ascii=False, indent=2)
+        return
+    writer = NoteStreamWriter(path, **meta) if fmt == "json_compact" else SnapshotWriter(path, codec=fmt[5:], **meta)
+    with writer:
+        for note_id, note in db["notes"].items():
+            writer.write_note(note_id, note)
+
+
+def load(fmt, path):
+    if fmt.startswith("snap_"):
+        return read_snapshot(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_format_save(benchmark, tmp_path, db, fmt):
+    path = str(tmp_path / "db")
+    benchmark(save, fmt, path, db)
+    benchmark.extra_info["size_kb"] = round((tmp_path / "db").stat().st_size / 1024)
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_format_load(benchmark, tmp_path, db, fmt):
+    path = str(tmp_path / "db")
+    save(fmt, path, db)
+    loaded = benchmark(load, fmt, path)
+    assert len(loaded["notes"]) == len(db["notes"])
+
+
+@pytest.mark.parametrize("fmt", ["json_compact", "snap_zlib"])
+def test_format_read_one_note(benchmark, tmp_path, db, fmt):
+    """Одна заметка из десяти: JSON разбирается целиком, снимок читает один блок."""
+    path = str(tmp_path / "db")
+    save(fmt, path, db)
+    note_id = list(db["notes"])[-1]
+    if fmt == "snap_zlib":
+        note = benchmark(lambda: SnapshotReader(path).read_note(note_id))
+    else:
+        note = benchmark(lambda: load(fmt, path)["notes"][note_id])
+    assert note["title"] == db["notes"][note_id]["title"]
@@ -0,0 +1,282 @@
+# dashboard.py
+"""
+Дашборд всех заметок: сетка карточек и "галактика" (одна звезда на заметку).
+
+Обе вкладки читают только сводки заметок (data.meta) и не трогают деревья задач.
+Сетка — QListView в режиме иконок поверх ArchiveModel: строки подгружаются
+порциями при прокрутке, делегат рисует только видимые карточки. Галактика —
+QGraphicsScene с легкими элементами, видимые элементы отсекает индекс сцены.
+"""
+import math
+from datetime import datetime
+
+from PyQt6.QtCore import QRectF, QSize, Qt
+from PyQt6.QtGui import QBrush, QColor, QFont, QPainter, QPen
+from PyQt6.QtWidgets import (
+    QButtonGroup,
+    QComboBox,
+    QGraphicsItem,
+    QGraphicsScene,
+    QGraphicsView,
+    QHBoxLayout,
+    QLineEdit,
+    QListView,
+    QPushButton,
+    QStackedWidget,
+    QStyle,
+    QStyledItemDelegate,
+    QVBoxLayout,
+    QWidget,
+)
+
+from archive import ArchiveModel
+from localization import Loc
+
+CARD_SIZE = QSize(230, 96)
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+
+def _fmt_date(ts):
+    return datetime.fromtimestamp(ts).strftime("%d.%m.%Y") if ts else "—"
+
+
+class NoteCardDelegate(QStyledItemDelegate):
+    """Рисует карточку заметки по её метаданным (заголовок, прогресс, даты, счетчики)."""
+
+    def __init__(self, accent, parent=None):
+        super().__init__(parent)
+        self.accent = QColor(accent)
+        self.title_font = QFont()
+        self.title_font.setBold(True)
+        self.small_font = QFont()
+        self.small_font.setPointSizeF(max(6.0, self.small_font.pointSizeF() - 1.5))
+
+    def sizeHint(self, option, index):
+        return CARD_SIZE
+
+    def paint(self, painter, option, index):
+        meta = index.data(ArchiveModel.MetaRole)
+        if not meta:
+            return
+        rect = QRectF(option.rect).adjusted(4, 4, -4, -4)
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+        is_current = index.data(ArchiveModel.NoteIdRole) == index.model().dm.current_note_id
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Фон
+        border = self.accent if (selected or is_current) else QColor("#333333")
+        painter.setPen(QPen(border, 2 if selected else 1))
+        painter.setBrush(QColor("#2c2c2c") if selected else QColor("#252525"))
+        painter.drawRoundedRect(rect, 8, 8)
+
+        inner = rect.adjusted(10, 8, -10, -8)
+
+        # Заголовок
+        painter.setFont(self.title_font)
+        painter.setPen(QColor("#e0e0e0"))
+        title = painter.fontMetrics().elidedText(meta["title"], Qt.TextElideMode.ElideRight, int(inner.width()))
+        painter.drawText(QRectF(inner.left(), inner.top(), inner.width(), 20), Qt.AlignmentFlag.AlignLeft, title)
+
+        # Прогресс
+        bar = QRectF(inner.left(), inner.top() + 28, inner.width() - 40, 6)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#3a3a3a"))
+        painter.drawRoundedRect(bar, 3, 3)
+        if meta["progress"] > 0:
+            done = QRectF(bar.left(), bar.top(), bar.width() * meta["progress"] / 100, bar.height())
+            painter.setBrush(self.accent if meta["progress"] < 100 else QColor("#66bb6a"))
+            painter.drawRoundedRect(done, 3, 3)
+
+        painter.setFont(self.small_font)
+        painter.setPen(QColor("#9e9e9e"))
+        painter.drawText(
+            QRectF(bar.right() + 4, bar.top() - 6, 36, 18),
+            Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+            f"{meta['progress']}%",
+        )
+
+        # Даты и счетчики
+        painter.setPen(QColor("#757575"))
+        painter.drawText(
+            QRectF(inner.left(), inner.top() + 42, inner.width(), 16),
+            Qt.AlignmentFlag.AlignLeft,
+            f"{_fmt_date(meta['start'])} → {_fmt_date(meta['finish'])}",
+        )
+        painter.drawText(
+            QRectF(inner.left(), inner.top() + 58, inner.width(), 16),
+            Qt.AlignmentFlag.AlignLeft,
+            f"✓ {meta['done']}   ✕ {meta['cancelled']}   ○ {meta['open']}   Σ {meta['total']}",
+        )
+        painter.restore()
+
+
+class NoteStarItem(QGraphicsItem):
+    """Звезда одной заметки: размер — число задач, заливка — прогресс."""
+
+    def __init__(self, meta, accent, on_open):
+        super().__init__()
+        self.note_id = meta["id"]
+        self.progress = meta["progress"]
+        self.accent = accent
+        self.on_open = on_open
+        self.radius = 6 + 4 * math.sqrt(meta["total"])
+        self.rect = QRectF(-self.radius, -self.radius, self.radius * 2, self.radius * 2)
+        self.setToolTip(f"{meta['title']}\n{meta['progress']}%  ({meta['done']}/{meta['total']})")
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable)
+
+    def boundingRect(self):
+        return self.rect.adjusted(-3, -3, 3, 3)
+
+    def paint(self, painter, option, widget=None):
+        color = QColor("#66bb6a") if self.progress >= 100 else self.accent
+        fill = QColor(color.red(), color.green(), color.blue(), 70 + int(1.8 * self.progress))
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        if lod * self.radius < 3:
+            # Звезда в пару пикселей (обзор тысяч заметок): квадрат без сглаживания в разы дешевле круга
+            painter.fillRect(self.rect, fill)
+            return
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(fill)
+        painter.drawEllipse(self.rect)
+        if lod * self.radius < 6:
+            return  # Мелкий масштаб: без дуги прогресса
+        painter.setPen(QPen(QColor("#e0e0e0") if self.isSelected() else color.lighter(130), 2))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawArc(self.rect, 90 * 16, int(-self.progress / 100 * 360 * 16))
+
+    def mouseDoubleClickEvent(self, event):
+        self.on_open(self.note_id)
+
+
+class GalaxyView(QGraphicsView):
+    """Обзор всех заметок: колесо — масштаб, перетаскивание — панорама."""
+
+    def __init__(self, scene):
+        super().__init__(scene)
+        self.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate)
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontSavePainterState)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setBackgroundBrush(QBrush(QColor("#050505")))
+        self.setStyleSheet("border: none;")
+
+    def wheelEvent(self, event):
+        factor = 1.15 if event.angleDelta().y() > 0 else 1 / 1.15
+        self.scale(factor, factor)
+
+
+class DashboardWindow(QWidget):
+    def __init__(self, main_window):
+        super().__init__()
+        self.mw = main_window
+        self.accent = QColor(self.mw.default_accent)
+        self._galaxy_dirty = True
+
+        self.setWindowTitle(Loc.t("dashboard_title", "Dashboard"))
+        self.resize(1000, 700)
+        self.setStyleSheet("""
+            QWidget { background-color: #1e1e1e; color: #e0e0e0; }
+            QListView { background-color: #1a1a1a; border: none; }
+            QLineEdit, QComboBox { background-color: #252525; border: 1px solid #333; color: #e0e0e0; padding: 4px; }
+            QPushButton { background-color: #333; color: #e0e0e0; border: none; padding: 6px 12px; border-radius: 4px; }
+            QPushButton:checked { background-color: #7c4dff; color: white; }
+        """)
+
+        layout = QVBoxLayout(self)
+
+        # Панель: режим, фильтр, сортировка
+        top = QHBoxLayout()
+        self.btn_grid = QPushButton(Loc.t("dashboard_grid", "▦ Cards"))
+        self.btn_galaxy = QPushButton(Loc.t("dashboard_galaxy", "✦ Galaxy"))
+        modes = QButtonGroup(self)
+        for i, btn in enumerate((self.btn_grid, self.btn_galaxy)):
+            btn.setCheckable(True)
+            modes.addButton(btn, i)
+            top.addWidget(btn)
+        self.btn_grid.setChecked(True)
+        modes.idClicked.connect(self.set_mode)
+
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText(Loc.t("archive_filter", "Filter..."))
+        top.addWidget(self.filter_edit, 1)
+
+        self.sort_combo = QComboBox()
+        for key in ("date_desc", "date_asc", "progress_desc", "progress_asc", "title"):
+            self.sort_combo.addItem(Loc.t(f"sort_{key}", key), key)
+        top.addWidget(self.sort_combo)
+        layout.addLayout(top)
+
+        # Сетка карточек
+        self.model = ArchiveModel(self.mw.data, self)
+        self.grid = QListView()
+        self.grid.setViewMode(QListView.ViewMode.IconMode)
+        self.grid.setResizeMode(QListView.ResizeMode.Adjust)
+        self.grid.setMovement(QListView.Movement.Static)
+        self.grid.setUniformItemSizes(True)
+        self.grid.setGridSize(CARD_SIZE)
+        self.grid.setSpacing(0)
+        self.grid.setItemDelegate(NoteCardDelegate(self.accent, self.grid))
+        self.grid.setModel(self.model)
+        self.grid.doubleClicked.connect(lambda index: self.open_note(index.data(ArchiveModel.NoteIdRole)))
+
+        # Галактика (строится при первом показе)
+        self.scene = QGraphicsScene(self)
+        self.galaxy = GalaxyView(self.scene)
+
+        self.stack = QStackedWidget()
+        self.stack.addWidget(self.grid)
+        self.stack.addWidget(self.galaxy)
+        layout.addWidget(self.stack)
+
+        self.filter_edit.textChanged.connect(self.on_filter_changed)
+        self.sort_combo.currentIndexChanged.connect(lambda _: self.model.set_sort(self.sort_combo.currentData()))
+
+    # --- Режимы ---
+    def set_mode(self, mode):
+        self.stack.setCurrentIndex(mode)
+        if mode == 1 and self._galaxy_dirty:
+            self.build_galaxy()
+
+    def on_filter_changed(self, text):
+        self.model.set_filter(text)
+        self._galaxy_dirty = True
+        if self.stack.currentIndex() == 1:
+            self.build_galaxy()
+
+    def refresh(self):
+        """Перечитывает сводки (после правок в главном окне)."""
+        self.model.reload()
+        self._galaxy_dirty = True
+        if self.stack.currentIndex() == 1:
+            self.build_galaxy()
+
+    def build_galaxy(self):
+        """Раскладывает звезды по золотой спирали: самые новые заметки — в центре."""
+        self.scene.clear()
+        needle = self.model.filter_text.casefold()
+        metas = [m for m in self.mw.data.meta.all() if needle in m["title"].casefold()]
+        metas.sort(key=lambda m: m["start"] or 0, reverse=True)
+
+        spacing = 2.2 * max((6 + 4 * math.sqrt(m["total"]) for m in metas), default=10)
+        for i, meta in enumerate(metas):
+            star = NoteStarItem(meta, self.accent, self.open_note)
+            r = spacing * math.sqrt(i)
+            star.setPos(r * math.cos(i * GOLDEN_ANGLE), r * math.sin(i * GOLDEN_ANGLE))
+            self.scene.addItem(star)
+
+        bounds = self.scene.itemsBoundingRect().adjusted(-100, -100, 100, 100)
+        self.scene.setSceneRect(bounds)
+        self.galaxy.resetTransform()
+        self.galaxy.fitInView(bounds, Qt.AspectRatioMode.KeepAspectRatio)
+        self._galaxy_dirty = False
+
+    # --- Действия ---
+    def open_note(self, note_id):
+        if not note_id:
+            return
+        self.mw.menu_logic.switch_to_note(note_id)
+        self.model.refresh_markers()
+        self.mw.activateWindow()
@@ -29,6 +29,7 @@ class DataHistory:
         if self.history_index > 0:
             self.history_index -= 1
             tasks = self.history[self.history_index]
+            self.dm.will_change(self.dm.current_note_id)
             self.dm.all_notes[self.dm.current_note_id]["tasks"] = tasks
             self.dm.save_to_disk(skip_history=True)  # Не писать в историю
             return True
@@ -38,6 +39,7 @@ class DataHistory:
         if self.history_index < len(self.history) - 1:
             self.history_index += 1
             tasks = self.history[self.history_index]
+            self.dm.will_change(self.dm.current_note_id)
             self.dm.all_notes[self.dm.current_note_id]["tasks"] = tasks
             self.dm.save_to_disk(skip_history=True)  # Не писать в историю
             return True
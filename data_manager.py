@@ -2,20 +2,49 @@
 import json
 import os
 import uuid
+from contextlib import contextmanager
 
 from PyQt6.QtCore import QDateTime
 
 # Импортируем наши новые модули
 from data_history import DataHistory
 from data_parser import DataParser
+from db_integrity import IntegrityChecker
+from db_lock import db_lock
+from db_snapshot import SNAPSHOT_EXT, SnapshotWriter, is_snapshot
+from db_stream import NoteStreamWriter, note_checksums
+from db_watcher import DbWatcher
 from localization import Loc
+from note_meta import NoteMetaIndex
+from note_store import LazyNotes
+from perf import Perf
+from search_index import SearchIndex
+from task_merge import ensure_task_ids, stamp_modified
+
+# Сколько недавних заметок помнить для меню "Перейти"
+RECENT_LIMIT = 10
+
+JSON_FILENAME = "seshat_db.json"
+SNAPSHOT_FILENAME = "seshat_db" + SNAPSHOT_EXT  # Сжатый формат (db_snapshot), если он создан
+
+
+def db_filename():
+    """Файл базы в текущей папке: снимок, если он создан, иначе JSON"""
+    return SNAPSHOT_FILENAME if os.path.exists(SNAPSHOT_FILENAME) else JSON_FILENAME
 
 
 class DataManager:
     def __init__(self):
-        self.filename = "seshat_db.json"
+        self.filename = db_filename()
+        self._snapshot_cache = {}  # id -> (crc, сжатый блок): неизмененные заметки не сжимаются заново
         self.all_notes = {}
         self.current_note_id = None
+        self.recent = []  # MRU: id заметок, последняя открытая — первой
+        # Заметки, чей dict держит открытое окно (карта): LazyNotes не выгружает их при записи,
+        # иначе правки окна после переключения заметки уходили бы в забытую копию
+        self.pinned = set()
+        self.on_saved = None  # on_saved(note_id) после каждой записи (события локального API)
+        self._tx_levels = []  # Открытые транзакции (transaction()), внешняя — первой
 
         self.start_time = None
         self.finish_time = None
@@ -23,45 +52,90 @@ class DataManager:
         # --- Инициализация модулей ---
         self.history = DataHistory(self)
         self.parser = DataParser(self)
+        self.search = SearchIndex(self)
+        self.meta = NoteMetaIndex(self)
+        self.integrity = IntegrityChecker(self)
+        self.watcher = DbWatcher(self)  # Правки базы другими процессами
 
         self.load_from_file()
+        self.watcher.watch()
 
     def load_from_file(self):
+        self.recent = []
         if not os.path.exists(self.filename):
             self.create_new_note()
+            self.search.load()
             return
 
         try:
-            with open(self.filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = self._read_db()
 
-                if "language" in data:
-                    Loc.lang = data["language"]
+            if "language" in data:
+                Loc.lang = data["language"]
 
-                self.all_notes = data.get("notes", {})
-                self.current_note_id = data.get("current_note_id")
+            self.all_notes = data.get("notes", {})
+            self.current_note_id = data.get("current_note_id")
+            self.recent = [nid for nid in data.get("recent_notes", []) if nid in self.all_notes]
 
-                if not self.all_notes:
-                    self.create_new_note()
-                    return
+            if not self.all_notes:
+                self.create_new_note()
+                return
+
+            if not self.current_note_id or self.current_note_id not in self.all_notes:
+                self.current_note_id = list(self.all_notes.keys())[0]
+            self._touch_recent(self.current_note_id)
 
-                if not self.current_note_id or self.current_note_id not in self.all_notes:
-                    self.current_note_id = list(self.all_notes.keys())[0]
+            # Старые базы: проставляем стабильные id задачам (нужны для merge);
+            # ленивое хранилище делает это при декодировании каждой заметки
+            if isinstance(self.all_notes, LazyNotes):
+                self.all_notes.on_load = lambda note_id, note: ensure_task_ids(note["tasks"], note_id)
+            else:
+                for note_id, note in self.all_notes.items():
+                    ensure_task_ids(note.setdefault("tasks", []), note_id)
 
-                # Делегируем парсинг времени
-                self.parser.load_timings()
+            # Делегируем парсинг времени
+            self.parser.load_timings()
+
+            # crc заметок "как на диске" — по ним db_watcher узнает, что поменял другой процесс
+            if isinstance(self.all_notes, LazyNotes):
+                self.watcher.remember(self.all_notes.disk_checksums())
+            else:
+                self.watcher.remember(note_checksums(self.all_notes))
 
         except Exception as e:
             print(f"Error loading: {e}")
-            # Если файл битый, не затираем его сразу, а создаем новую сессию в памяти
-            # (но лучше бы сделать бэкап битого файла, если это критично)
+            # Битый файл уходит в карантин ДО первой записи (заметки из него вытащит
+            # фоновая проверка), а работа продолжается в новой заметке
+            self._release_store()
+            self.all_notes = {}
+            self.recent = []
+            self.integrity.quarantine_current()
             self.create_new_note()
 
+        # Со снимком индекс поиска строится при первом поиске (иначе старт декодирует весь архив)
+        self.search.load(defer=isinstance(self.all_notes, LazyNotes))
+
+    def _read_db(self):
+        self._release_store()
+        if is_snapshot(self.filename):
+            # Снимок: mmap + индекс смещений, заметки декодируются по требованию
+            store = LazyNotes(self.filename)
+            return {**store.meta, "notes": store}
+        with open(self.filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _release_store(self):
+        if isinstance(self.all_notes, LazyNotes):
+            self.all_notes.close()
+
     def save_current_state(self, tasks):
         """Единая точка сохранения состояния задачи (вызывается из TreeLogic)"""
         if not self.current_note_id:
             return
+        self.will_change(self.current_note_id)
 
+        # Переносим mtime неизмененных задач, изменившимся ставим текущее время
+        stamp_modified(self.all_notes[self.current_note_id].get("tasks"), tasks)
         self.all_notes[self.current_note_id]["tasks"] = tasks
 
         # --- ЛОГИКА ВРЕМЕНИ (FIX/UPDATE) ---
@@ -87,44 +161,54 @@ class DataManager:
 
         self.save_to_disk()
 
-        # Делегируем запись в историю
-        self.history.add_to_history(tasks)
+        # Делегируем запись в историю (в транзакции — один шаг на всю группу)
+        if self._tx_levels:
+            self._tx_levels[-1]["history"] = self.current_note_id
+        else:
+            self.history.add_to_history(tasks)
 
+    @Perf.timed("data.save_to_disk")
     def save_to_disk(self, skip_history=False):
         """
         АТОМАРНАЯ ЗАПИСЬ НА ДИСК.
         Защищает от потери данных при отключении электричества.
         """
-        data = {
-            "language": Loc.lang,
-            "notes": self.all_notes,
-            "current_note_id": self.current_note_id,
-        }
-        
-        # Временное имя файла
-        temp_file = f"{self.filename}.tmp"
-        
+        # Индекс поиска и сводка догоняют текущую заметку (правки дерева, карты, undo, переименование)
+        self.search.update_note(self.current_note_id)
+        self.meta.update(self.current_note_id)
+        if self._tx_levels:
+            # Запись — одна, при выходе из внешней транзакции
+            self._tx_levels[-1]["save"] = True
+            return
+
         try:
-            # 1. Пишем во временный файл
-            with open(temp_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-                
-                # 2. Принудительно сбрасываем буферы на физический диск
-                f.flush()
-                os.fsync(f.fileno())
-            
-            # 3. Атомарно подменяем старый файл новым
-            # На Windows начиная с Python 3.3 os.replace() атомарен
-            os.replace(temp_file, self.filename)
-            
+            # Другой процесс (db_merger_v3, импорт) не пишет базу, пока мы её читаем и пишем
+            with db_lock(self.filename):
+                # Сначала забираем чужие правки, иначе запись их затрет
+                self.watcher.merge_before_write()
+                self._write_db()
         except Exception as e:
             print(f"CRITICAL ERROR SAVING: {e}")
-            # Если что-то пошло не так, удаляем временный файл, чтобы не мусорить
-            if os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
+            return
+        if self.on_saved:
+            self.on_saved(self.current_note_id)
+
+    def _write_db(self):
+        # Временный файл + fsync + os.replace; заметки пишутся по одной вместе с их crc32
+        meta = {"language": Loc.lang, "current_note_id": self.current_note_id, "recent_notes": self.recent}
+        if isinstance(self.all_notes, LazyNotes):
+            # Неизмененные заметки копируются блоками из mmap, в памяти остаются текущая и открытые в окнах
+            self.all_notes.save(self.filename, keep={self.current_note_id} | self.pinned, **meta)
+            self.watcher.remember(self.all_notes.disk_checksums())
+            return
+        if self.filename.endswith(SNAPSHOT_EXT):
+            writer = SnapshotWriter(self.filename, cache=self._snapshot_cache, **meta)
+        else:
+            writer = NoteStreamWriter(self.filename, **meta)
+        with writer:
+            for note_id, note in self.all_notes.items():
+                writer.write_note(note_id, note)
+        self.watcher.remember(writer.checksums)
 
     # --- УПРАВЛЕНИЕ ЗАМЕТКАМИ ---
 
@@ -135,6 +219,8 @@ class DataManager:
         self.start_time = QDateTime.currentDateTime()
         self.finish_time = None
 
+        self._touch_recent(new_id)
+
         self.all_notes[new_id] = {
             "title": Loc.t("title_default"),
             "tasks": [],
@@ -145,20 +231,58 @@ class DataManager:
         self.parser.update_smart_title()
         self.save_to_disk()
 
+    def add_note(self, title, tasks):
+        """Заметка с готовыми задачами (импорт); текущая заметка не меняется. Возвращает id."""
+        new_id = str(uuid.uuid4())
+        ensure_task_ids(tasks, new_id)
+        self.all_notes[new_id] = {
+            "title": title,
+            "tasks": tasks,
+            "start_time_str": QDateTime.currentDateTime().toString("dd.MM.yyyy HH:mm:ss"),
+            "finish_time_str": None,
+        }
+        self.search.update_note(new_id)
+        self.meta.update(new_id)
+        return new_id
+
     def switch_note(self, note_id):
         if note_id in self.all_notes:
             self.current_note_id = note_id
+            self._touch_recent(note_id)
             self.parser.load_timings()
             self.history.history = []
             self.history.history_index = -1
+            self.watcher.rebase()
             return True
         return False
 
+    def _touch_recent(self, note_id):
+        """Поднимает заметку в начало MRU-списка"""
+        if note_id in self.recent:
+            self.recent.remove(note_id)
+        self.recent.insert(0, note_id)
+        del self.recent[RECENT_LIMIT:]
+
     def rename_current(self, new_title):
         if self.current_note_id:
+            self.will_change(self.current_note_id)
             self.all_notes[self.current_note_id]["title"] = new_title
             self.save_to_disk()
 
+    def set_view_filter(self, state):
+        """Фильтр вида текущей заметки (None — снять). Задачи не меняются, шага undo нет."""
+        if not self.current_note_id:
+            return
+        note = self.all_notes[self.current_note_id]
+        if note.get("view_filter") == state:
+            return
+        self.will_change(self.current_note_id)
+        if state is None:
+            note.pop("view_filter", None)
+        else:
+            note["view_filter"] = state
+        self.save_to_disk()
+
     def undo(self):
         if self.history.undo():
             self.parser.load_timings()
@@ -174,7 +298,12 @@ class DataManager:
     def delete_note(self, note_id):
         """Удаляет заметку по ID"""
         if note_id in self.all_notes:
+            self.will_change(note_id)
             del self.all_notes[note_id]
+            self.pinned.discard(note_id)
+            self.search.remove_note(note_id)
+            if note_id in self.recent:
+                self.recent.remove(note_id)
             
             # Если удалили текущую
             if note_id == self.current_note_id:
@@ -189,4 +318,92 @@ class DataManager:
             self.save_to_disk()
 
     def update_smart_title(self):
-        self.parser.update_smart_title()
\ No newline at end of file
+        self.will_change(self.current_note_id)
+        self.parser.update_smart_title()
+
+    # --- ТРАНЗАКЦИИ ---
+
+    @contextmanager
+    def transaction(self):
+        """
+        Группа изменений как одно действие:
+
+            with data.transaction():
+                ...
+
+        Внутри save_to_disk() и запись в историю только отмечаются; при выходе из
+        ВНЕШНЕЙ транзакции база пишется один раз и в undo попадает один шаг.
+        Вложенные транзакции сливаются с внешней. Если наружу вылетает исключение,
+        память (заметки, текущая заметка, MRU, история, язык) возвращается к
+        состоянию на входе в эту транзакцию, а на диск ничего не пишется.
+        """
+        level = {
+            "ids": list(self.all_notes),
+            "copies": {},  # id -> JSON заметки до первой правки в этой транзакции
+            "state": (
+                self.current_note_id,
+                list(self.recent),
+                self.start_time,
+                self.finish_time,
+                Loc.lang,
+                list(self.history.history),
+                self.history.history_index,
+            ),
+            "save": False,
+            "history": None,  # id заметки, для которой нужен шаг undo
+        }
+        self._tx_levels.append(level)
+        try:
+            yield self
+        except BaseException:
+            self._tx_levels.pop()
+            self._rollback(level)
+            raise
+        self._tx_levels.pop()
+
+        if self._tx_levels:
+            outer = self._tx_levels[-1]
+            outer["save"] = outer["save"] or level["save"]
+            outer["history"] = level["history"] or outer["history"]
+            return
+        if level["history"] is not None and level["history"] == self.current_note_id:
+            self.history.add_to_history(self.all_notes[self.current_note_id]["tasks"])
+        if level["save"]:
+            self.save_to_disk()
+
+    def will_change(self, note_id):
+        """Вызывается ПЕРЕД правкой заметки: открытые транзакции запоминают её прежний вид."""
+        if not self._tx_levels or note_id not in self.all_notes:
+            return
+        text = None
+        for level in self._tx_levels:
+            if note_id not in level["copies"]:
+                if text is None:
+                    text = json.dumps(self.all_notes[note_id], ensure_ascii=False)
+                level["copies"][note_id] = text
+
+    def _rollback(self, level):
+        (
+            self.current_note_id,
+            self.recent,
+            self.start_time,
+            self.finish_time,
+            Loc.lang,
+            self.history.history,
+            self.history.history_index,
+        ) = level["state"]
+
+        ids = level["ids"]
+        known = set(ids)
+        changed = [note_id for note_id in self.all_notes if note_id not in known]
+        for note_id in changed:
+            del self.all_notes[note_id]
+        for note_id, text in level["copies"].items():
+            self.all_notes[note_id] = json.loads(text)
+            changed.append(note_id)
+        if isinstance(self.all_notes, dict):
+            # Восстановленные заметки — на прежние места
+            self.all_notes = {note_id: self.all_notes[note_id] for note_id in ids if note_id in self.all_notes}
+
+        for note_id in changed:
+            self.search.update_note(note_id)
\ No newline at end of file
@@ -0,0 +1,30 @@
+# data_storage.py
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_open(filename, mode="w", encoding="utf-8", newline=None):
+    """
+    АТОМАРНАЯ ЗАПИСЬ: пишем во временный файл, сбрасываем на диск и подменяем оригинал.
+    Если внутри блока случилось исключение — временный файл удаляется, оригинал не трогаем.
+    """
+    temp_file = f"{filename}.tmp"
+    kwargs = {} if "b" in mode else {"encoding": encoding, "newline": newline}
+
+    try:
+        with open(temp_file, mode, **kwargs) as f:
+            yield f
+            # Принудительно сбрасываем буферы на физический диск
+            f.flush()
+            os.fsync(f.fileno())
+
+        # На Windows начиная с Python 3.3 os.replace() атомарен
+        os.replace(temp_file, filename)
+    except BaseException:
+        if os.path.exists(temp_file):
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+        raise
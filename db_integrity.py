@@ -0,0 +1,327 @@
+# db_integrity.py
+"""
+Проверка целостности seshat_db.json, карантин и восстановление.
+
+- При сохранении каждая заметка получает crc32 (ключ "checksums", см. db_stream).
+- После старта фоновый поток перечитывает файл, сверяет суммы и схему задач
+  (text, checked, done_date, cancelled, children) и, если всё в порядке,
+  кладет сжатую копию в backups/ (хранятся последние BACKUP_KEEP).
+- Если файл не читается, DataManager сразу отодвигает его в карантин
+  (seshat_db.corrupt-<время>.json), а поток вытаскивает из него все заметки,
+  которые удается разобрать и починить.
+
+GUI-поток получает отчет сигналом и сам правит данные в памяти: поток не
+трогает all_notes и открывает базу только на время одного чтения
+(на Windows открытый файл мешает os.replace при сохранении).
+"""
+import gzip
+import io
+import json
+import os
+import shutil
+import time
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from db_snapshot import MAGIC, SnapshotError, SnapshotReader, is_snapshot
+from db_stream import NoteStreamReader, StreamFormatError, note_checksum, validate_note
+from task_merge import ensure_task_ids
+
+BACKUP_DIR = "backups"
+BACKUP_KEEP = 7
+
+
+# --- РЕМОНТ ---
+
+def repair_task(task):
+    """Чинит задачу и её потомков на месте. Возвращает задачу или None, если это не задача."""
+    if not isinstance(task, dict):
+        return None
+    stack = [task]
+    while stack:
+        item = stack.pop()
+        if not isinstance(item.get("text"), str):
+            item["text"] = "" if item.get("text") is None else str(item["text"])
+        if not isinstance(item.get("checked"), bool):
+            item["checked"] = bool(item.get("checked"))
+        if "cancelled" in item and not isinstance(item["cancelled"], bool):
+            item["cancelled"] = bool(item["cancelled"])
+        if "expanded" in item and not isinstance(item["expanded"], bool):
+            item["expanded"] = bool(item["expanded"])
+        if item.get("done_date") is not None and not isinstance(item["done_date"], str):
+            item["done_date"] = None
+        children = item.get("children", [])
+        if not isinstance(children, list):
+            children = []
+        item["children"] = [c for c in children if isinstance(c, dict)]
+        stack.extend(item["children"])
+    return task
+
+
+def repair_note(note):
+    """Чинит заметку на месте (битые задачи выбрасываются). None — заметку не спасти."""
+    if not isinstance(note, dict):
+        return None
+    if "title" in note and not isinstance(note["title"], str):
+        note["title"] = str(note["title"])
+    tasks = note.get("tasks", [])
+    note["tasks"] = [t for t in (tasks if isinstance(tasks, list) else []) if repair_task(t) is not None]
+    # Сводка пересчитается лениво (NoteMetaIndex)
+    note.pop("summary", None)
+    return note
+
+
+# --- ФАЙЛОВЫЕ ОПЕРАЦИИ ---
+
+def _stamp():
+    return time.strftime("%Y%m%d-%H%M%S")
+
+
+def quarantine_path(db_path):
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.corrupt-{_stamp()}{ext or '.json'}"
+
+
+def quarantine(db_path):
+    """Отодвигает битый файл в сторону (мгновенно, без копирования). Возвращает новый путь."""
+    target = quarantine_path(db_path)
+    os.replace(db_path, target)
+    return target
+
+
+def backup(db_path, raw=None, backup_dir=None, keep=BACKUP_KEEP):
+    """
+    Пишет raw (содержимое базы) в backups/<имя>.<время><расширение>.gz и удаляет старые копии.
+    Без raw файл копируется как есть (снимки уже сжаты и могут не помещаться в память).
+    """
+    backup_dir = backup_dir or os.path.join(os.path.dirname(os.path.abspath(db_path)), BACKUP_DIR)
+    os.makedirs(backup_dir, exist_ok=True)
+    name, ext = os.path.splitext(os.path.basename(db_path))
+    suffix = f"{ext or '.json'}.gz" if raw is not None else ext
+    target = os.path.join(backup_dir, f"{name}.{_stamp()}{suffix}")
+    if raw is None:
+        shutil.copyfile(db_path, target + ".tmp")
+    else:
+        with gzip.open(target + ".tmp", "wb", compresslevel=6) as f:
+            f.write(raw)
+    os.replace(target + ".tmp", target)
+
+    # Имена содержат время, поэтому сортировка по имени = по возрасту
+    prefix = f"{name}."
+    old = sorted(f for f in os.listdir(backup_dir) if f.startswith(prefix) and f.endswith(suffix))
+    for f in old[:-keep] if keep else old:
+        try:
+            os.remove(os.path.join(backup_dir, f))
+        except OSError:
+            pass
+    return target
+
+
+# --- ПРОВЕРКА ---
+
+def check_raw(raw):
+    """
+    Проверяет содержимое базы (bytes), разбирая его по одной заметке.
+    Отчет: checked, bad {id: ошибки схемы}, mismatch [id с неверной суммой], unsigned, error.
+    """
+    report = {"checked": 0, "bad": {}, "mismatch": [], "unsigned": False, "error": None}
+    if raw.startswith(MAGIC):
+        return _check_snapshot(raw, report)
+    reader = NoteStreamReader(io.BytesIO(raw))
+    actual = {}
+    try:
+        for note_id, note in reader.iter_notes():
+            report["checked"] += 1
+            errors = validate_note(note)
+            if errors:
+                report["bad"][note_id] = errors
+            actual[note_id] = note_checksum(note)
+    except StreamFormatError as e:
+        report["error"] = str(e)
+        return report
+
+    stored = reader.meta.get("checksums")
+    if not isinstance(stored, dict):
+        # База записана до появления сумм — проверяем только схему, суммы появятся при сохранении
+        report["unsigned"] = True
+        return report
+    report["mismatch"] = [nid for nid, crc in actual.items() if stored.get(nid) != crc and nid not in report["bad"]]
+    return report
+
+
+def _check_snapshot(source, report):
+    """Снимок (db_snapshot, bytes или путь): суммы лежат в индексе, каждая заметка распаковывается отдельно."""
+    try:
+        reader = SnapshotReader.from_bytes(source) if isinstance(source, bytes) else SnapshotReader(source)
+    except SnapshotError as e:
+        report["error"] = str(e)
+        return report
+    for note_id in reader.ids():
+        report["checked"] += 1
+        try:
+            text = reader.read_text(note_id)
+            errors = validate_note(json.loads(text))
+        except (SnapshotError, ValueError) as e:
+            report["bad"][note_id] = [str(e)]
+            continue
+        if errors:
+            report["bad"][note_id] = errors
+        elif note_checksum(None, text) != reader.entries[note_id][2]:
+            report["mismatch"].append(note_id)
+    return report
+
+
+def _salvage_snapshot(path):
+    notes = []
+    try:
+        reader = SnapshotReader(path)
+    except (SnapshotError, OSError):
+        return notes  # Без индекса границы заметок неизвестны
+    for note_id in reader.ids():
+        try:
+            note = repair_note(reader.read_note(note_id))
+        except (SnapshotError, ValueError, OSError):
+            continue
+        if note is not None:
+            notes.append((note_id, note))
+    return notes
+
+
+def salvage(path):
+    """Все заметки битого файла, которые удается прочитать и починить: [(id, note)]."""
+    if is_snapshot(path):
+        return _salvage_snapshot(path)
+    notes = []
+    try:
+        for note_id, note in NoteStreamReader(path).iter_notes():
+            note = repair_note(note)
+            if note is not None:
+                notes.append((note_id, note))
+    except (StreamFormatError, OSError):
+        pass  # Всё, что было до места поломки, уже собрано
+    return notes
+
+
+def run_check(db_path, salvage_from=None, backup_dir=None):
+    """Полная проверка (выполняется в фоне). Возвращает отчет для GUI-потока."""
+    if salvage_from:
+        return {"salvaged": salvage(salvage_from), "quarantine": salvage_from}
+    if not os.path.exists(db_path):
+        return {"checked": 0}
+    if is_snapshot(db_path):
+        return _check_snapshot_file(db_path, backup_dir)
+
+    # Одно короткое чтение: дальше работаем с копией в памяти
+    with open(db_path, "rb") as f:
+        raw = f.read()
+    report = check_raw(raw)
+
+    if report["error"] or report["bad"] or report["mismatch"]:
+        # Сохраняем файл как есть, прежде чем GUI починит и перезапишет базу
+        report["quarantine"] = quarantine_path(db_path)
+        with open(report["quarantine"], "wb") as f:
+            f.write(raw)
+    else:
+        report["backup"] = backup(db_path, raw, backup_dir)
+    return report
+
+
+def _check_snapshot_file(db_path, backup_dir=None):
+    """
+    Снимок не читается целиком: заметки читаются по одной короткими чтениями
+    (память не растет с размером базы, файл не держится открытым).
+    """
+    before = os.stat(db_path)
+    report = _check_snapshot(db_path, {"checked": 0, "bad": {}, "mismatch": [], "unsigned": False, "error": None})
+    after = os.stat(db_path)
+    if (before.st_mtime_ns, before.st_size) != (after.st_mtime_ns, after.st_size):
+        # Базу сохранили во время проверки: смещения из старого индекса недостоверны
+        return {"checked": 0, "skipped": True}
+
+    if report["error"] or report["bad"] or report["mismatch"]:
+        report["quarantine"] = quarantine_path(db_path)
+        shutil.copyfile(db_path, report["quarantine"])
+    else:
+        report["backup"] = backup(db_path, backup_dir=backup_dir)
+    return report
+
+
+class IntegrityWorker(QThread):
+    report_ready = pyqtSignal(dict)
+
+    def __init__(self, db_path, salvage_from=None):
+        super().__init__()
+        self.db_path = db_path
+        self.salvage_from = salvage_from
+
+    def run(self):
+        try:
+            report = run_check(self.db_path, self.salvage_from)
+        except Exception as e:
+            report = {"error": str(e)}
+        self.report_ready.emit(report)
+
+
+class IntegrityChecker:
+    """Фоновая проверка базы DataManager и применение её результатов в GUI-потоке."""
+
+    def __init__(self, data_manager):
+        self.dm = data_manager
+        self.salvage_from = None  # Файл в карантине, из которого нужно вытащить заметки
+        self.worker = None
+
+    def quarantine_current(self):
+        """Вызывается, когда базу не удалось загрузить: файл уходит в карантин до любой записи."""
+        try:
+            self.salvage_from = quarantine(self.dm.filename)
+        except OSError as e:
+            print(f"Quarantine failed: {e}")
+
+    def start(self, on_done=None):
+        """Запускает проверку в фоне. on_done(report, changed) вызывается в GUI-потоке после apply()."""
+        self.worker = IntegrityWorker(self.dm.filename, self.salvage_from)
+        self.salvage_from = None
+
+        def finish(report):
+            changed = self.apply(report)
+            if on_done:
+                on_done(report, changed)
+
+        self.worker.report_ready.connect(finish)
+        self.worker.start()
+
+    def apply(self, report):
+        """Переносит результат проверки в данные. Возвращает True, если данные изменились."""
+        dm = self.dm
+        changed = False
+
+        salvaged = report.get("salvaged")
+        if salvaged:
+            # Пустая заметка, созданная вместо битой базы, больше не нужна
+            placeholder = dm.all_notes.get(dm.current_note_id)
+            if len(dm.all_notes) == 1 and placeholder is not None and not placeholder.get("tasks"):
+                dm.all_notes.clear()
+                dm.recent = []
+            for note_id, note in salvaged:
+                ensure_task_ids(note["tasks"], note_id)
+                dm.all_notes.setdefault(note_id, note)
+                dm.search.update_note(note_id)
+            if dm.current_note_id not in dm.all_notes:
+                dm.switch_note(salvaged[0][0])
+            changed = True
+
+        for note_id in report.get("bad", {}):
+            note = dm.all_notes.get(note_id)
+            if note is None:
+                continue
+            if repair_note(note) is None:
+                dm.delete_note(note_id)
+            else:
+                dm.search.update_note(note_id)
+            changed = True
+
+        # Расхождение сумм при верной схеме: заметку не трогаем (копия уже в карантине),
+        # новое сохранение перепишет суммы
+        if changed or report.get("mismatch"):
+            dm.save_to_disk()
+        return changed
@@ -0,0 +1,84 @@
+# db_lock.py
+"""
+Межпроцессная (рекомендательная) блокировка базы.
+
+Стикер и db_merger_v3 (или скрипт импорта) пишут один и тот же файл. Каждый,
+кто делает "прочитать -> изменить -> записать", держит блокировку на всё время
+операции:
+
+    with db_lock("seshat_db.json"):
+        ...
+
+Блокируется файл-спутник seshat_db.lock, а не сама база: базу подменяет
+os.replace, и блокировка на старом файле ничего бы не защищала. Блокировка
+повторно входима в пределах потока (save_to_disk -> LazyNotes.save и т.п.).
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+LOCK_TIMEOUT = 10.0
+POLL_INTERVAL = 0.05
+
+_local = threading.local()
+
+
+class DbLockTimeout(TimeoutError):
+    """База занята другим процессом дольше LOCK_TIMEOUT."""
+
+
+def lock_path(db_path):
+    return f"{os.path.splitext(os.path.abspath(db_path))[0]}.lock"
+
+
+def _try_lock(fd):
+    try:
+        if os.name == "nt":
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd):
+    if os.name == "nt":
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+@contextmanager
+def db_lock(db_path, timeout=LOCK_TIMEOUT):
+    path = lock_path(db_path)
+    held = getattr(_local, "held", None)
+    if held is None:
+        held = _local.held = set()
+    if path in held:
+        # Этот поток уже держит блокировку: отпустит её внешний with
+        yield
+        return
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                raise DbLockTimeout(f"База занята другим процессом: {path}")
+            time.sleep(POLL_INTERVAL)
+        held.add(path)
+        try:
+            yield
+        finally:
+            held.discard(path)
+            _unlock(fd)
+    finally:
+        os.close(fd)
@@ -2,26 +2,77 @@ import json
 import os
 import sys
 
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtWidgets import (
     QApplication,
     QComboBox,
+    QFileDialog,
     QFrame,
     QHBoxLayout,
     QLabel,
     QMessageBox,
+    QProgressDialog,
     QPushButton,
     QTextEdit,
     QVBoxLayout,
     QWidget,
 )
 
+from data_manager import db_filename
+from data_storage import atomic_open
+from db_lock import db_lock
+from db_snapshot import is_snapshot
+from db_stream import (
+    StreamFormatError,
+    export_notes,
+    iter_notes,
+    merge_file_into_db,
+    note_checksums,
+    rewrite_db,
+    validate_note,
+    validate_task,
+)
+from note_import import format_for_path as import_format_for_path, import_into_db
+from note_meta import compute_summary
+from task_merge import merge_databases
+
+
+class StreamWorker(QThread):
+    """Запускает потоковую операцию с базой в фоне и сообщает прогресс (0..1000)"""
+
+    progress = pyqtSignal(int)
+    finished_ok = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, func, *args):
+        super().__init__()
+        self.func = func
+        self.args = args
+
+    def _report(self, done, total):
+        self.progress.emit(int(done * 1000 / total) if total else 1000)
+
+    def run(self):
+        try:
+            result = self.func(*self.args, progress=self._report)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished_ok.emit(result)
+
 
 class DatabaseInjector(QWidget):
     def __init__(self):
         super().__init__()
-        self.db_filename = "seshat_db.json"
+        self.db_filename = db_filename()  # Тот же файл, что откроет стикер
         self.init_ui()
-        self.refresh_notes_list()  # Сразу загружаем список заметок
+        # Инжектор читает и пишет базу потоково как JSON. Сжатый снимок он не разберет,
+        # а правки в оставшемся рядом seshat_db.json стикер не увидит — не работаем вовсе
+        self.snapshot_db = is_snapshot(self.db_filename)
+        if self.snapshot_db:
+            self.setEnabled(False)
+        else:
+            self.refresh_notes_list()  # Сразу загружаем список заметок
 
     def init_ui(self):
         self.setWindowTitle("Seshat DB Injector v2.0 💉")
@@ -109,40 +160,73 @@ class DatabaseInjector(QWidget):
         self.btn_append.clicked.connect(self.append_tasks_to_existing)
         layout.addWidget(self.btn_append)
 
+        # Разделитель
+        layout.addSpacing(10)
+        line3 = QFrame()
+        line3.setObjectName("Line")
+        line3.setFrameShape(QFrame.Shape.HLine)
+        layout.addWidget(line3)
+
+        # Секция В: Потоковый импорт/экспорт файлов (без загрузки базы целиком)
+        layout.addWidget(QLabel("ВАРИАНТ В: Импорт / экспорт файлов базы"))
+        hbox_files = QHBoxLayout()
+
+        self.btn_import_file = QPushButton("📂 ИМПОРТ ЗАМЕТОК ИЗ ФАЙЛА")
+        self.btn_import_file.clicked.connect(self.import_from_file)
+        hbox_files.addWidget(self.btn_import_file)
+
+        self.btn_export_file = QPushButton("💾 ЭКСПОРТ БАЗЫ В ФАЙЛ")
+        self.btn_export_file.clicked.connect(self.export_to_file)
+        hbox_files.addWidget(self.btn_export_file)
+
+        layout.addLayout(hbox_files)
+
+        # Внешние форматы: новые заметки или задачи в выбранную заметку (Вариант Б)
+        hbox_outline = QHBoxLayout()
+        self.btn_import_outline = QPushButton("📥 OPML / MARKDOWN / TODO.TXT / CSV → НОВЫЕ ЗАМЕТКИ")
+        self.btn_import_outline.clicked.connect(lambda: self.import_outline_file(into_selected=False))
+        hbox_outline.addWidget(self.btn_import_outline)
+
+        self.btn_import_outline_into = QPushButton("📥 … → В ВЫБРАННУЮ ЗАМЕТКУ")
+        self.btn_import_outline_into.clicked.connect(lambda: self.import_outline_file(into_selected=True))
+        hbox_outline.addWidget(self.btn_import_outline_into)
+        layout.addLayout(hbox_outline)
+
+        # Синхронизация двух копий базы (ноутбук <-> десктоп) через общего предка
+        self.btn_sync = QPushButton("🔀 СИНХРОНИЗИРОВАТЬ С ДРУГОЙ КОПИЕЙ БАЗЫ (3-WAY)")
+        self.btn_sync.setToolTip(
+            "Общий предок хранится рядом с базой (*.base.json) и обновляется после каждой синхронизации"
+        )
+        self.btn_sync.clicked.connect(self.sync_with_file)
+        layout.addWidget(self.btn_sync)
+
         self.setLayout(layout)
 
     # --- ЛОГИКА ---
 
-    def load_db(self):
-        if not os.path.exists(self.db_filename):
-            return None
+    def rewrite_db(self, *args, **kwargs):
+        """Потоковая атомарная перезапись базы (temp + fsync + replace) с обработкой ошибок"""
         try:
-            with open(self.db_filename, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
+            return rewrite_db(self.db_filename, *args, **kwargs)
+        except StreamFormatError as e:
             QMessageBox.critical(self, "Ошибка БД", f"Не удалось прочитать файл:\n{e}")
-            return None
-
-    def save_db(self, data):
-        try:
-            with open(self.db_filename, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            return True
         except Exception as e:
             QMessageBox.critical(self, "Ошибка сохранения", f"Не удалось записать файл:\n{e}")
-            return False
+        return None
 
     def refresh_notes_list(self):
-        """Загружает заголовки заметок в выпадающий список"""
+        """Загружает заголовки заметок в выпадающий список (по одной заметке за раз)"""
         self.combo_notes.clear()
-        data = self.load_db()
-        if not data or "notes" not in data:
+        if not os.path.exists(self.db_filename):
             return
 
-        for note_id, note_data in data["notes"].items():
-            title = note_data.get("title", "Без названия")
-            # Добавляем ID в скрытые данные элемента (UserRole)
-            self.combo_notes.addItem(f"{title} ({note_id})", note_id)
+        try:
+            for note_id, note_data in iter_notes(self.db_filename):
+                title = note_data.get("title", "Без названия")
+                # Добавляем ID в скрытые данные элемента (UserRole)
+                self.combo_notes.addItem(f"{title} ({note_id})", note_id)
+        except (StreamFormatError, OSError) as e:
+            QMessageBox.critical(self, "Ошибка БД", f"Не удалось прочитать файл:\n{e}")
 
     def get_json_input(self):
         raw = self.text_area.toPlainText()
@@ -167,26 +251,24 @@ class DatabaseInjector(QWidget):
             )
             return
 
-        current_db = self.load_db()
-        if not current_db:
-            current_db = {"language": "ru", "notes": {}}
-
-        if "notes" not in current_db:
-            current_db["notes"] = {}
-
-        added = 0
-        overwritten = 0
-        for nid, ncontent in new_data["notes"].items():
-            if nid in current_db["notes"]:
-                overwritten += 1
-            else:
-                added += 1
-            current_db["notes"][nid] = ncontent
+        # Проверяем схему каждой заметки до записи
+        bad = {nid: validate_note(n) for nid, n in new_data["notes"].items()}
+        bad = {nid: errs for nid, errs in bad.items() if errs}
+        if bad:
+            QMessageBox.critical(self, "Ошибка схемы", self._format_errors(bad))
+            return
 
+        incoming = new_data["notes"]
+        meta = {}
         if "current_note_id" in new_data:
-            current_db["current_note_id"] = new_data["current_note_id"]
+            meta["current_note_id"] = new_data["current_note_id"]
 
-        if self.save_db(current_db):
+        stats = self.rewrite_db(
+            lambda nid, note: None if nid in incoming else note, incoming.items(), meta
+        )
+        if stats is not None:
+            overwritten = stats["dropped"]
+            added = len(incoming) - overwritten
             QMessageBox.information(self, "Успех", f"Создано: {added}, Обновлено: {overwritten}")
             self.refresh_notes_list()
 
@@ -234,9 +316,27 @@ class DatabaseInjector(QWidget):
             QMessageBox.warning(self, "Пусто", "Не найдено задач для добавления.")
             return
 
-        # 3. Обновляем базу
-        current_db = self.load_db()
-        if not current_db or target_id not in current_db["notes"]:
+        errors = []
+        for i, task in enumerate(tasks_to_append):
+            errors.extend(validate_task(task, f"[{i}]"))
+        if errors:
+            QMessageBox.critical(self, "Ошибка схемы", "\n".join(errors[:20]))
+            return
+
+        # 3. Обновляем базу потоково: трогаем только целевую заметку
+        found = {}
+
+        def append_to_target(note_id, note):
+            if note_id == target_id:
+                note["tasks"] = note.get("tasks", []) + tasks_to_append
+                note["summary"] = compute_summary(note)
+                found["title"] = note.get("title", "???")
+            return note
+
+        if self.rewrite_db(append_to_target) is None:
+            return
+
+        if "title" not in found:
             QMessageBox.critical(
                 self,
                 "Ошибка",
@@ -244,22 +344,161 @@ class DatabaseInjector(QWidget):
             )
             return
 
-        # Добавляем
-        current_tasks = current_db["notes"][target_id].get("tasks", [])
-        current_tasks.extend(tasks_to_append)
-        current_db["notes"][target_id]["tasks"] = current_tasks
+        QMessageBox.information(
+            self,
+            "Успех",
+            f"Добавлено {len(tasks_to_append)} задач(и) в заметку:\n'{found['title']}'",
+        )
 
-        if self.save_db(current_db):
-            note_title = current_db["notes"][target_id].get("title", "???")
-            QMessageBox.information(
-                self,
-                "Успех",
-                f"Добавлено {len(tasks_to_append)} задач(и) в заметку:\n'{note_title}'",
-            )
+    # --- ВАРИАНТ В: ПОТОКОВЫЙ ИМПОРТ / ЭКСПОРТ ---
+    def import_from_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Импорт заметок", "", "JSON (*.json);;Все файлы (*)")
+        if not path:
+            return
+        self._run_stream_job("Импорт заметок...", self._on_import_done, merge_file_into_db, self.db_filename, path)
+
+    def import_outline_file(self, into_selected):
+        target_id = None
+        if into_selected:
+            index = self.combo_notes.currentIndex()
+            if index == -1:
+                QMessageBox.warning(self, "Ошибка", "Выберите заметку из списка!")
+                return
+            target_id = self.combo_notes.itemData(index)
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Импорт задач", "", "OPML, Markdown, todo.txt, CSV (*.opml *.xml *.md *.markdown *.txt *.csv)"
+        )
+        if not path:
+            return
+        try:
+            fmt = import_format_for_path(path)
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", str(e))
+            return
+        self._run_stream_job(
+            "Импорт задач...", self._on_outline_import_done, import_into_db, self.db_filename, path, fmt, target_id
+        )
+
+    def _on_outline_import_done(self, stats):
+        if not stats["found"]:
+            QMessageBox.critical(self, "Ошибка", "Целевая заметка не найдена в базе (возможно, файл был изменен извне).")
+            return
+        QMessageBox.information(
+            self, "Импорт завершен", f"Импортировано задач: {stats['tasks']} (заметок в файле: {stats['notes']})"
+        )
+        self.refresh_notes_list()
+
+    def export_to_file(self):
+        if not os.path.exists(self.db_filename):
+            QMessageBox.warning(self, "Пусто", "База ещё не создана.")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт базы", "seshat_export.json", "JSON (*.json)")
+        if not path:
+            return
+        self._run_stream_job("Экспорт базы...", self._on_export_done, export_notes, self.db_filename, path)
+
+    def _run_stream_job(self, label, on_done, func, *args):
+        dialog = QProgressDialog(label, None, 0, 1000, self)
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(300)
+
+        self.worker = StreamWorker(func, *args)
+        self.worker.progress.connect(dialog.setValue)
+        self.worker.finished_ok.connect(on_done)
+        self.worker.failed.connect(lambda msg: QMessageBox.critical(self, "Ошибка", msg))
+        self.worker.finished.connect(dialog.close)
+        self.setEnabled(False)
+        self.worker.finished.connect(lambda: self.setEnabled(True))
+        self.worker.start()
+
+    def _on_import_done(self, result):
+        text = f"Создано: {result['added']}, Обновлено: {result['overwritten']}"
+        if result["invalid"]:
+            text += "\n\nПропущены заметки с ошибками схемы:\n" + self._format_errors(result["invalid"])
+        QMessageBox.information(self, "Импорт завершен", text)
+        self.refresh_notes_list()
+
+    def _on_export_done(self, count):
+        QMessageBox.information(self, "Экспорт завершен", f"Экспортировано заметок: {count}")
+
+    # --- СИНХРОНИЗАЦИЯ (3-WAY MERGE) ---
+    @property
+    def base_filename(self):
+        return f"{os.path.splitext(self.db_filename)[0]}.base.json"
+
+    def sync_with_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Другая копия базы", "", "JSON (*.json);;Все файлы (*)")
+        if not path:
+            return
+        if os.path.abspath(path) == os.path.abspath(self.db_filename):
+            QMessageBox.warning(self, "Ошибка", "Выберите другую копию базы, а не текущий файл.")
+            return
+
+        # Запущенный стикер не должен писать базу между чтением и записью результата
+        # (диалоги об ошибках — уже после снятия блокировки)
+        error = None
+        with db_lock(self.db_filename):
+            try:
+                ours = self._read_json(self.db_filename) or {"language": "ru", "notes": {}}
+                theirs = self._read_json(path) or {"notes": {}}
+                base = self._read_json(self.base_filename) or {}
+            except (OSError, ValueError) as e:
+                error = ("Ошибка БД", f"Не удалось прочитать файл:\n{e}")
+            else:
+                merged, conflicts = merge_databases(base, ours, theirs)
+                merged["checksums"] = note_checksums(merged["notes"])
+                try:
+                    # Обе копии и общий предок получают одинаковый результат
+                    for target in (self.db_filename, path, self.base_filename):
+                        with atomic_open(target) as f:
+                            json.dump(merged, f, ensure_ascii=False, indent=2)
+                except OSError as e:
+                    error = ("Ошибка сохранения", f"Не удалось записать файл:\n{e}")
+        if error:
+            QMessageBox.critical(self, *error)
+            return
+
+        text = f"Заметок после слияния: {len(merged['notes'])}"
+        if not base:
+            text += "\n(общий предок не найден — слияние по времени изменений)"
+        if conflicts:
+            lines = [
+                f"{c['note_id']} / {c['task_id'] or '-'}: {c['field']} -> {c['chosen']}" for c in conflicts[:20]
+            ]
+            if len(conflicts) > 20:
+                lines.append(f"... и ещё {len(conflicts) - 20}")
+            text += f"\n\nКонфликтов: {len(conflicts)}\n" + "\n".join(lines)
+        QMessageBox.information(self, "Синхронизация завершена", text)
+        self.refresh_notes_list()
+
+    @staticmethod
+    def _read_json(path):
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _format_errors(errors_by_note, limit=10):
+        lines = []
+        for nid, errors in list(errors_by_note.items())[:limit]:
+            lines.append(f"{nid}: {'; '.join(errors[:3])}")
+        if len(errors_by_note) > limit:
+            lines.append(f"... и ещё {len(errors_by_note) - limit}")
+        return "\n".join(lines)
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = DatabaseInjector()
+    if window.snapshot_db:
+        QMessageBox.critical(
+            None,
+            "Ошибка БД",
+            f"База хранится в сжатом снимке {window.db_filename}.\n"
+            "Распакуйте её (python db_snapshot.py unpack -o seshat_db.json), удалите снимок\n"
+            "и запустите инжектор снова.",
+        )
+        sys.exit(1)
     window.show()
     sys.exit(app.exec())
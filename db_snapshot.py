@@ -0,0 +1,327 @@
+# db_snapshot.py
+"""
+Компактный формат базы (seshat_db.snap): сжатые заметки и индекс смещений.
+
+    [заголовок 26 байт][заметка 1][заметка 2]...[индекс]
+
+Заголовок: сигнатура SESHAT, версия формата, кодек, смещение и длина индекса.
+Каждая заметка — минифицированный JSON, сжатый отдельно, поэтому одну заметку
+можно прочитать, не разбирая остальные. Индекс (сжат тем же кодеком) хранит
+верхние ключи базы (language, current_note_id, ...) и для каждой заметки
+[id, смещение, длина, crc32, метаданные]; crc считается по несжатому JSON и
+совпадает с db_stream.note_checksum, метаданные — заголовок и сводка
+(note_meta), их читают списки заметок без распаковки самих заметок.
+
+Если рядом с программой есть seshat_db.snap, DataManager открывает его через
+mmap и декодирует заметки по требованию (note_store.LazyNotes).
+Конвертация и читаемый JSON-экспорт:
+    python db_snapshot.py pack seshat_db.json            # -> seshat_db.snap
+    python db_snapshot.py unpack seshat_db.snap -o export.json
+    python db_snapshot.py info seshat_db.snap
+"""
+import argparse
+import json
+import os
+import struct
+import zlib
+
+from data_storage import atomic_open
+from db_stream import NoteStreamReader, note_checksum
+from note_meta import SUMMARY_VERSION, compute_summary
+
+MAGIC = b"SESHAT"
+VERSION = 2  # 2: метаданные заметок в индексе
+HEADER = struct.Struct("<6sHBxQQ")  # сигнатура, версия, кодек, (выравнивание), смещение и длина индекса
+SNAPSHOT_EXT = ".snap"
+
+try:  # Python 3.14+
+    from compression import zstd as _zstd
+except ImportError:
+    try:
+        import zstandard as _zstd
+    except ImportError:
+        _zstd = None
+
+
+class SnapshotError(ValueError):
+    """Файл не является снимком Seshat или поврежден."""
+
+
+# --- КОДЕКИ ---
+
+def _zstd_compress(data, level):
+    if hasattr(_zstd, "ZstdCompressor"):
+        return _zstd.ZstdCompressor(level=level).compress(data)
+    return _zstd.compress(data, level)
+
+
+def _zstd_decompress(data):
+    if hasattr(_zstd, "ZstdDecompressor"):
+        return _zstd.ZstdDecompressor().decompress(data)
+    return _zstd.decompress(data)
+
+
+# id кодека: (имя, сжатие(data, level), распаковка(data), уровень по умолчанию)
+CODECS = {
+    0: ("none", lambda data, level: data, lambda data: data, 0),
+    1: ("zlib", zlib.compress, zlib.decompress, 1),
+    2: ("zstd", _zstd_compress, _zstd_decompress, 3),
+}
+CODEC_IDS = {name: codec_id for codec_id, (name, *_rest) in CODECS.items()}
+
+
+def available_codecs():
+    return [name for name in CODEC_IDS if name != "zstd" or _zstd is not None]
+
+
+def _codec(codec_id):
+    if codec_id not in CODECS:
+        raise SnapshotError(f"Неизвестный кодек: {codec_id}")
+    if CODECS[codec_id][0] == "zstd" and _zstd is None:
+        raise SnapshotError("Снимок сжат zstd, но модуль zstd недоступен")
+    return CODECS[codec_id]
+
+
+# --- ЗАПИСЬ ---
+
+class SnapshotWriter:
+    """
+    Тот же интерфейс, что у db_stream.NoteStreamWriter:
+
+        with SnapshotWriter("seshat_db.snap", language="ru") as w:
+            w.write_note(note_id, note)
+
+    cache — словарь {id: (crc, сжатые байты)}, общий между сохранениями:
+    заметки с тем же crc повторно не сжимаются.
+    """
+
+    def __init__(self, path, codec="zlib", level=None, cache=None, **meta):
+        if codec not in available_codecs():
+            raise SnapshotError(f"Кодек недоступен: {codec}")
+        self.path = path
+        self.codec_id = CODEC_IDS[codec]
+        _name, self._compress, _decompress, default_level = CODECS[self.codec_id]
+        self.level = default_level if level is None else level
+        self.meta = dict(meta)
+        self.cache = cache
+        self.count = 0
+        self.checksums = {}
+        self._entries = []
+        self._offset = HEADER.size
+        self._ctx = None
+        self._f = None
+
+    def __enter__(self):
+        self._ctx = atomic_open(self.path, "wb")
+        self._f = self._ctx.__enter__()
+        self._f.write(bytes(HEADER.size))  # Заголовок допишем в конце, когда известен индекс
+        return self
+
+    def write_note(self, note_id, note):
+        summary = note.get("summary")
+        if not isinstance(summary, dict) or summary.get("v") != SUMMARY_VERSION:
+            summary = compute_summary(note)
+        meta = {"title": note.get("title", "Untitled"), **summary}
+
+        text = json.dumps(note, ensure_ascii=False)
+        crc = note_checksum(note, text)
+        cached = self.cache.get(note_id) if self.cache is not None else None
+        if cached and cached[0] == crc:
+            blob = cached[1]
+        else:
+            blob = self._compress(text.encode("utf-8"), self.level)
+            if self.cache is not None:
+                self.cache[note_id] = (crc, blob)
+        self.write_blob(note_id, blob, crc, meta)
+
+    def write_blob(self, note_id, blob, crc, meta=None):
+        """Уже сжатый блок заметки (копирование из другого снимка с тем же кодеком без распаковки)."""
+        self._f.write(blob)
+        self._entries.append([note_id, self._offset, len(blob), crc, meta])
+        self._offset += len(blob)
+        self.checksums[note_id] = crc
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.meta.pop("checksums", None)  # Суммы уже лежат в индексе
+            index = json.dumps({"meta": self.meta, "notes": self._entries}, ensure_ascii=False)
+            blob = self._compress(index.encode("utf-8"), self.level)
+            self._f.write(blob)
+            self._f.seek(0)
+            self._f.write(HEADER.pack(MAGIC, VERSION, self.codec_id, self._offset, len(blob)))
+            if self.cache is not None:
+                # Удаленные заметки не должны копиться в кэше
+                for note_id in self.cache.keys() - self.checksums.keys():
+                    del self.cache[note_id]
+        return self._ctx.__exit__(exc_type, exc, tb)
+
+
+# --- ЧТЕНИЕ ---
+
+def is_snapshot(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class SnapshotReader:
+    """
+    Читает заголовок и индекс; заметки — по запросу.
+
+        reader = SnapshotReader(path)          # или SnapshotReader.from_bytes(raw / mmap)
+        reader.meta, reader.ids(), reader.note_meta[note_id]
+        reader.read_note(note_id)
+        for note_id, note in reader.iter_notes(): ...
+    """
+
+    def __init__(self, path=None, raw=None):
+        self.path = path
+        self._raw = raw
+        head = raw[: HEADER.size] if raw is not None else self._read(0, HEADER.size)
+        if len(head) < HEADER.size:
+            raise SnapshotError("Файл обрезан: нет заголовка")
+        magic, version, codec_id, index_offset, index_length = HEADER.unpack(head)
+        if magic != MAGIC:
+            raise SnapshotError("Это не снимок базы Seshat")
+        if version > VERSION:
+            raise SnapshotError(f"Снимок версии {version} новее поддерживаемой ({VERSION})")
+        _name, _compress, self._decompress, _level = _codec(codec_id)
+        self.codec = CODECS[codec_id][0]
+
+        try:
+            index = json.loads(self._decompress(self._read(index_offset, index_length)))
+        except (zlib.error, ValueError) as e:
+            raise SnapshotError(f"Индекс снимка поврежден: {e}") from e
+        self.meta = index.get("meta", {})
+        self.entries = {}  # id -> (смещение, длина, crc)
+        self.note_meta = {}  # id -> {title, ...сводка} (None в снимках версии 1)
+        for entry in index.get("notes", []):
+            note_id = entry[0]
+            self.entries[note_id] = tuple(entry[1:4])
+            self.note_meta[note_id] = entry[4] if len(entry) > 4 else None
+
+    @classmethod
+    def from_bytes(cls, raw):
+        return cls(raw=raw)
+
+    def _read(self, offset, length):
+        if self._raw is not None:
+            return self._raw[offset : offset + length]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def ids(self):
+        return list(self.entries)
+
+    def read_blob(self, note_id):
+        offset, length, _crc = self.entries[note_id]
+        return self._read(offset, length)
+
+    def read_text(self, note_id, blob=None):
+        """Несжатый JSON заметки; SnapshotError, если блок поврежден."""
+        offset, length, crc = self.entries[note_id]
+        if blob is None:
+            blob = self._read(offset, length)
+        try:
+            text = self._decompress(blob).decode("utf-8")
+        except (zlib.error, UnicodeDecodeError, ValueError) as e:
+            raise SnapshotError(f"{note_id}: блок заметки поврежден ({e})") from e
+        return text
+
+    def read_note(self, note_id):
+        """Одна заметка: читается и распаковывается только её блок."""
+        return json.loads(self.read_text(note_id))
+
+    def iter_texts(self):
+        """(id, JSON заметки, crc из индекса) в порядке файла, одним проходом по файлу."""
+        if self._raw is not None:
+            for note_id, (offset, length, crc) in self.entries.items():
+                yield note_id, self.read_text(note_id, self._raw[offset : offset + length]), crc
+            return
+        with open(self.path, "rb") as f:
+            for note_id, (offset, length, crc) in self.entries.items():
+                f.seek(offset)
+                yield note_id, self.read_text(note_id, f.read(length)), crc
+
+    def iter_notes(self):
+        for note_id, text, _crc in self.iter_texts():
+            yield note_id, json.loads(text)
+
+
+def read_snapshot(path):
+    """Вся база в той же структуре, что дает json.load(seshat_db.json)."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    reader = SnapshotReader.from_bytes(raw)
+    return {**reader.meta, "notes": dict(reader.iter_notes())}
+
+
+# --- КОНВЕРТАЦИЯ ---
+
+def pack(json_path, snap_path, codec="zlib", level=None):
+    """seshat_db.json -> снимок (потоково, по одной заметке). Возвращает число заметок."""
+    reader = NoteStreamReader(json_path)
+    writer = SnapshotWriter(snap_path, codec=codec, level=level)
+    with writer:
+        for note_id, note in reader.iter_notes():
+            writer.write_note(note_id, note)
+        writer.meta.update(reader.meta)
+    return writer.count
+
+
+def unpack(snap_path, json_path):
+    """Снимок -> читаемый JSON (с отступами), по одной заметке. Возвращает число заметок."""
+    reader = SnapshotReader(snap_path)
+    count = 0
+    with atomic_open(json_path) as f:
+        f.write('{\n  "notes": {')
+        for note_id, note in reader.iter_notes():
+            body = json.dumps(note, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+            f.write(f"{',' if count else ''}\n    {json.dumps(note_id, ensure_ascii=False)}: {body}")
+            count += 1
+        f.write("\n  }")
+        for key, value in reader.meta.items():
+            f.write(f',\n  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}')
+        f.write("\n}\n")
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Снимки базы Seshat")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_pack = sub.add_parser("pack", help="JSON -> снимок")
+    p_pack.add_argument("src", nargs="?", default="seshat_db.json")
+    p_pack.add_argument("-o", "--output", help="по умолчанию рядом, с расширением .snap")
+    p_pack.add_argument("--codec", default="zlib", choices=available_codecs())
+    p_pack.add_argument("--level", type=int, default=None)
+
+    p_unpack = sub.add_parser("unpack", help="снимок -> читаемый JSON")
+    p_unpack.add_argument("src", nargs="?", default="seshat_db" + SNAPSHOT_EXT)
+    p_unpack.add_argument("-o", "--output", default="seshat_export.json")
+
+    p_info = sub.add_parser("info", help="заголовок и размеры заметок")
+    p_info.add_argument("src", nargs="?", default="seshat_db" + SNAPSHOT_EXT)
+
+    args = parser.parse_args(argv)
+    if args.command == "pack":
+        out = args.output or os.path.splitext(args.src)[0] + SNAPSHOT_EXT
+        count = pack(args.src, out, args.codec, args.level)
+        print(f"Packed {count} notes: {os.path.getsize(args.src)} -> {os.path.getsize(out)} bytes ({out})")
+    elif args.command == "unpack":
+        count = unpack(args.src, args.output)
+        print(f"Unpacked {count} notes to {args.output}")
+    else:
+        reader = SnapshotReader(args.src)
+        print(f"{args.src}: codec {reader.codec}, {len(reader.entries)} notes, {os.path.getsize(args.src)} bytes")
+        for note_id, (offset, length, crc) in reader.entries.items():
+            print(f"  {note_id}  @{offset}  {length} bytes  crc {crc:08x}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
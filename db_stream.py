@@ -0,0 +1,362 @@
+# db_stream.py
+"""
+Потоковое чтение и запись seshat_db.json по одной заметке.
+
+В памяти одновременно держится только текущая заметка и буфер чтения,
+поэтому импорт/экспорт работает с файлами больше оперативной памяти.
+"""
+import codecs
+import json
+import os
+import zlib
+from contextlib import nullcontext
+
+from data_storage import atomic_open
+from db_lock import db_lock
+
+CHUNK_SIZE = 1 << 16
+# Защита от "бесконечного" буфера на битом файле (одна заметка больше не бывает)
+MAX_VALUE_SIZE = 512 * 1024 * 1024
+
+_WS = " \t\r\n"
+
+
+class StreamFormatError(ValueError):
+    """Файл не похож на базу Seshat или оборван посередине."""
+
+
+# --- КОНТРОЛЬНЫЕ СУММЫ ---
+
+def note_checksum(note, text=None):
+    """
+    crc32 заметки в компактной сериализации (та же строка, что пишет NoteStreamWriter).
+    Форматирование файла (indent) на сумму не влияет: она считается по разобранной заметке.
+    """
+    if text is None:
+        text = json.dumps(note, ensure_ascii=False)
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def note_checksums(notes):
+    return {note_id: note_checksum(note) for note_id, note in notes.items()}
+
+
+# --- ВАЛИДАЦИЯ СХЕМЫ ---
+
+def validate_task(task, path="tasks[0]"):
+    """Возвращает список ошибок для задачи и всех её потомков (без рекурсии)."""
+    errors = []
+    stack = [(task, path)]
+    while stack:
+        item, where = stack.pop()
+        if not isinstance(item, dict):
+            errors.append(f"{where}: задача должна быть объектом")
+            continue
+        if not isinstance(item.get("text"), str):
+            errors.append(f"{where}.text: ожидается строка")
+        if not isinstance(item.get("checked"), bool):
+            errors.append(f"{where}.checked: ожидается true/false")
+        if "cancelled" in item and not isinstance(item["cancelled"], bool):
+            errors.append(f"{where}.cancelled: ожидается true/false")
+        if "expanded" in item and not isinstance(item["expanded"], bool):
+            errors.append(f"{where}.expanded: ожидается true/false")
+        if item.get("done_date") is not None and not isinstance(item["done_date"], str):
+            errors.append(f"{where}.done_date: ожидается строка или null")
+
+        children = item.get("children", [])
+        if not isinstance(children, list):
+            errors.append(f"{where}.children: ожидается список")
+            continue
+        for i, child in enumerate(children):
+            stack.append((child, f"{where}.children[{i}]"))
+    return errors
+
+
+def validate_note(note):
+    if not isinstance(note, dict):
+        return ["заметка должна быть объектом"]
+    errors = []
+    if "title" in note and not isinstance(note["title"], str):
+        errors.append("title: ожидается строка")
+    tasks = note.get("tasks", [])
+    if not isinstance(tasks, list):
+        return errors + ["tasks: ожидается список"]
+    for i, task in enumerate(tasks):
+        errors.extend(validate_task(task, f"tasks[{i}]"))
+    return errors
+
+
+# --- ЧТЕНИЕ ---
+
+class NoteStreamReader:
+    """
+    Инкрементальный парсер файла базы.
+
+        reader = NoteStreamReader("seshat_db.json")
+        for note_id, note in reader.iter_notes():
+            ...
+        reader.meta  # language, current_note_id и прочие ключи верхнего уровня
+
+    `progress(done_bytes, total_bytes)` вызывается после каждого прочитанного блока.
+    Вместо пути можно передать io.BytesIO (уже прочитанный в память файл).
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE, progress=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.meta = {}
+        self._is_path = isinstance(path, (str, os.PathLike))
+        self.total_bytes = os.path.getsize(path) if self._is_path else len(path.getbuffer())
+        self.done_bytes = 0
+
+        self._file = None
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    # --- Буфер ---
+    def _fill(self, size=None):
+        if self._eof:
+            return False
+        raw = self._file.read(size or self.chunk_size)
+        if not raw:
+            self._eof = True
+            self._buf += self._utf8.decode(b"", final=True)
+            return False
+        self.done_bytes += len(raw)
+        # Сдвигаем буфер, чтобы он не рос на весь файл
+        if self._pos > self.chunk_size:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        self._buf += self._utf8.decode(raw)
+        if self.progress:
+            self.progress(self.done_bytes, self.total_bytes)
+        return True
+
+    def _skip_ws(self):
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf) or not self._fill():
+                return
+
+    def _peek(self):
+        self._skip_ws()
+        if self._pos >= len(self._buf):
+            raise StreamFormatError("Неожиданный конец файла")
+        return self._buf[self._pos]
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise StreamFormatError(f"Ожидался '{char}' на позиции ~{self.done_bytes}")
+        self._pos += 1
+
+    def _value(self):
+        """Декодирует одно JSON-значение, дочитывая файл, пока значение не поместится в буфер."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # Число на краю буфера могло оборваться: убеждаемся, что за ним что-то есть
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    raise StreamFormatError(f"Битый JSON: {e}") from e
+            if len(self._buf) - self._pos > MAX_VALUE_SIZE:
+                raise StreamFormatError("Слишком большое значение в файле базы")
+            # Читаем столько же, сколько уже есть в буфере: повторный разбор амортизирован
+            self._fill(max(self.chunk_size, len(self._buf) - self._pos))
+
+    def _key(self):
+        key = self._value()
+        if not isinstance(key, str):
+            raise StreamFormatError("Ключ объекта должен быть строкой")
+        self._expect(":")
+        return key
+
+    def _iter_object(self):
+        """Итерирует ключи объекта; значение после каждого ключа читает вызывающий."""
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            yield self._key()
+            char = self._peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise StreamFormatError(f"Ожидалась ',' или '}}' на позиции ~{self.done_bytes}")
+
+    def iter_notes(self):
+        """Генератор пар (note_id, note) в порядке файла."""
+        with open(self.path, "rb") if self._is_path else nullcontext(self.path) as f:
+            self._file = f
+            try:
+                for key in self._iter_object():
+                    if key == "notes":
+                        for note_id in self._iter_object():
+                            yield note_id, self._value()
+                    else:
+                        self.meta[key] = self._value()
+            finally:
+                self._file = None
+
+
+def iter_notes(path, progress=None):
+    yield from NoteStreamReader(path, progress=progress).iter_notes()
+
+
+# --- ЗАПИСЬ ---
+
+class NoteStreamWriter:
+    """
+    Пишет базу по одной заметке через атомарную запись (atomic_open).
+    Контрольные суммы заметок считаются по уже сериализованной строке и пишутся
+    в ключ "checksums" (старые суммы из meta заменяются).
+
+        with NoteStreamWriter("seshat_db.json", language="ru") as w:
+            w.write_note(note_id, note)
+            w.meta["current_note_id"] = note_id
+    """
+
+    def __init__(self, path, **meta):
+        self.path = path
+        self.meta = dict(meta)
+        self.count = 0
+        self.checksums = {}
+        self._ctx = None
+        self._f = None
+
+    def __enter__(self):
+        self._ctx = atomic_open(self.path)
+        self._f = self._ctx.__enter__()
+        self._f.write('{\n  "notes": {')
+        return self
+
+    def write_note(self, note_id, note):
+        sep = "," if self.count else ""
+        self._f.write(f"{sep}\n    {json.dumps(note_id, ensure_ascii=False)}: ")
+        text = json.dumps(note, ensure_ascii=False)
+        self._f.write(text)
+        self.checksums[note_id] = note_checksum(note, text)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._f.write("\n  }")
+            self.meta["checksums"] = self.checksums
+            for key, value in self.meta.items():
+                self._f.write(f',\n  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}')
+            self._f.write("\n}\n")
+        return self._ctx.__exit__(exc_type, exc, tb)
+
+
+# --- КОНВЕЙЕРЫ ---
+
+def rewrite_db(db_path, transform=None, extra_notes=(), meta_updates=None, progress=None):
+    """
+    Переписывает базу потоково.
+
+    transform(note_id, note) -> note | None  — None удаляет заметку;
+    extra_notes — итерируемое (note_id, note), дописывается в конец (может быть генератором);
+    meta_updates — ключи верхнего уровня, которые нужно заменить.
+    Если базы ещё нет, создается новая.
+    """
+    stats = {"kept": 0, "dropped": 0, "added": 0}
+    # Чтение и запись под одной блокировкой: запущенный стикер не вклинится между ними
+    with db_lock(db_path):
+        _rewrite_locked(db_path, transform, extra_notes, meta_updates, progress, stats)
+    return stats
+
+
+def _rewrite_locked(db_path, transform, extra_notes, meta_updates, progress, stats):
+    reader = NoteStreamReader(db_path, progress=progress) if os.path.exists(db_path) else None
+
+    writer = NoteStreamWriter(db_path)
+    with writer:
+        if reader:
+            for note_id, note in reader.iter_notes():
+                if transform:
+                    note = transform(note_id, note)
+                if note is None:
+                    stats["dropped"] += 1
+                    continue
+                writer.write_note(note_id, note)
+                stats["kept"] += 1
+            writer.meta.update(reader.meta)
+
+        for note_id, note in extra_notes:
+            writer.write_note(note_id, note)
+            stats["added"] += 1
+
+        writer.meta.setdefault("language", "ru")
+        writer.meta.update(meta_updates or {})
+
+
+def merge_file_into_db(db_path, incoming_path, progress=None):
+    """
+    Импортирует все заметки из incoming_path в базу (перезапись по id), не загружая файлы целиком.
+    Проход 1 собирает только id и ошибки схемы, проход 2 переписывает базу.
+    """
+    incoming_ids = set()
+    invalid = {}
+
+    def scan_progress(done, total):
+        if progress:
+            progress(done // 2, total)
+
+    scan = NoteStreamReader(incoming_path, progress=scan_progress)
+    for note_id, note in scan.iter_notes():
+        errors = validate_note(note)
+        if errors:
+            invalid[note_id] = errors
+        else:
+            incoming_ids.add(note_id)
+
+    def incoming_notes():
+        def second_half(done, total):
+            if progress:
+                progress(total // 2 + done // 2, total)
+
+        for note_id, note in NoteStreamReader(incoming_path, progress=second_half).iter_notes():
+            if note_id in incoming_ids:
+                yield note_id, note
+
+    def drop_overwritten(note_id, note):
+        return None if note_id in incoming_ids else note
+
+    meta = {}
+    # Текущей становится только импортированная заметка (не отброшенная как невалидная)
+    if scan.meta.get("current_note_id") in incoming_ids:
+        meta["current_note_id"] = scan.meta["current_note_id"]
+
+    stats = rewrite_db(db_path, drop_overwritten, incoming_notes(), meta)
+    return {
+        "added": len(incoming_ids) - stats["dropped"],
+        "overwritten": stats["dropped"],
+        "invalid": invalid,
+    }
+
+
+def export_notes(db_path, out_path, note_ids=None, progress=None):
+    """Копирует заметки (все или из note_ids) в отдельный файл, потоково."""
+    reader = NoteStreamReader(db_path, progress=progress)
+    writer = NoteStreamWriter(out_path)
+    with writer:
+        for note_id, note in reader.iter_notes():
+            if note_ids is None or note_id in note_ids:
+                writer.write_note(note_id, note)
+        writer.meta["language"] = reader.meta.get("language", "ru")
+        current = reader.meta.get("current_note_id")
+        if current and (note_ids is None or current in note_ids):
+            writer.meta["current_note_id"] = current
+    return writer.count
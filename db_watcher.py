@@ -0,0 +1,219 @@
+# db_watcher.py
+"""
+Изменения базы другими процессами (db_merger_v3, скрипты импорта).
+
+DataManager помнит crc32 каждой заметки в том виде, в каком она лежит на диске
+(после своего чтения или записи), и stat файла. Когда файл меняется:
+
+  * QFileSystemWatcher (с задержкой DEBOUNCE_MS) сравнивает stat со своим —
+    собственные записи стикера так отсеиваются;
+  * файл читается потоково, и в памяти заменяются только заметки, чей crc
+    изменился; заметки, измененные и у нас, и на диске, сливаются через
+    task_merge (для текущей заметки — трехсторонне, от версии с диска);
+  * save_to_disk делает то же самое под db_lock перед записью, поэтому чужие
+    правки, пришедшие между проверками, не затираются.
+
+Удаленная на диске текущая заметка остается открытой (и вернется в базу при
+следующем сохранении), остальные удаленные заметки убираются. Пропавший или
+нечитаемый файл не сливается: следующая запись восстановит базу из памяти.
+"""
+import json
+import os
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+from db_lock import db_lock
+from db_stream import iter_notes, note_checksum, note_checksums
+from note_store import LazyNotes
+from task_merge import ensure_task_ids, merge_databases
+
+DEBOUNCE_MS = 200
+MAX_RETRIES = 5  # Повторы check после ошибки; дальше — до следующего сигнала о файле
+
+
+def _disk_state(path):
+    """Подпись файла: os.replace дает новый inode, запись на месте — новые mtime/размер."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class DbWatcher(QObject):
+    # {"changed": [id], "removed": [id], "current": bool}
+    notes_reloaded = pyqtSignal(dict)
+
+    def __init__(self, data_manager):
+        super().__init__()
+        self.dm = data_manager
+        self.sums = {}  # id -> crc32 заметки на диске (после нашего последнего чтения/записи)
+        self.state = None  # _disk_state() файла в тот же момент
+        self._base = (None, None)  # (id, JSON) текущей заметки с диска — база для 3-way merge
+        self._retries = 0
+
+        self._fs = QFileSystemWatcher(self)
+        self._fs.fileChanged.connect(self._schedule)
+        self._fs.directoryChanged.connect(self._schedule)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_MS)
+        self._timer.timeout.connect(self.check)
+
+    def watch(self):
+        """Следит за файлом базы и его папкой (os.replace подменяет файл, и слежка за ним слетает)."""
+        path = os.path.abspath(self.dm.filename)
+        paths = [os.path.dirname(path)]
+        if os.path.exists(path):
+            paths.append(path)
+        missing = [p for p in paths if p not in self._fs.files() + self._fs.directories()]
+        if missing:
+            self._fs.addPaths(missing)
+
+    def _schedule(self, _path=None):
+        self._retries = 0
+        self._timer.start()
+
+    def stop(self):
+        """Больше не следит за файлом (закрытие базы)."""
+        self._timer.stop()
+        watched = self._fs.files() + self._fs.directories()
+        if watched:
+            self._fs.removePaths(watched)
+
+    # --- Состояние диска ---
+    def remember(self, sums):
+        """Вызывается после чтения/записи файла: память и диск совпадают."""
+        self.sums = dict(sums)
+        self.state = _disk_state(self.dm.filename)
+        self.rebase()
+
+    def rebase(self):
+        """Запоминает текущую заметку как базу для слияния (после загрузки, записи, переключения)."""
+        note_id = self.dm.current_note_id
+        note = self.dm.all_notes.get(note_id) if note_id in self.dm.all_notes else None
+        self._base = (note_id, json.dumps(note, ensure_ascii=False) if note is not None else None)
+
+    def changed_on_disk(self):
+        return self.state is not None and _disk_state(self.dm.filename) != self.state
+
+    def check(self):
+        """Слот таймера: перечитывает базу, если её записал кто-то другой."""
+        self.watch()
+        if _disk_state(self.dm.filename) is None:
+            return  # Файл удален или перенесен: сливать нечего, запись создаст его заново
+        try:
+            with db_lock(self.dm.filename):
+                if self.changed_on_disk():
+                    self.merge_external()
+        except Exception as e:
+            # База занята или файл недописан (запись без atomic_open) — попробуем позже,
+            # но не бесконечно: битый файл ждет следующей записи или сигнала
+            print(f"External DB change not applied: {e}")
+            if self._retries < MAX_RETRIES:
+                self._retries += 1
+                self._timer.start()
+        else:
+            self._retries = 0
+
+    def merge_before_write(self):
+        """
+        save_to_disk под db_lock: забирает чужие правки перед записью. Если файл
+        пропал или не читается, слияние пропускается — запись не должна срываться,
+        иначе теряются все следующие правки.
+        """
+        if not self.changed_on_disk():
+            return
+        try:
+            self.merge_external()
+        except Exception as e:
+            print(f"External DB change not applied: {e}")
+
+    def merge_external(self):
+        """merge_from_disk + сигнал для интерфейса (после выхода из текущего обработчика)."""
+        report = self.merge_from_disk()
+        if report["changed"] or report["removed"]:
+            QTimer.singleShot(0, lambda: self.notes_reloaded.emit(report))
+        return report
+
+    # --- Слияние ---
+    def _modified(self, note_id):
+        """Отличается ли заметка в памяти от своей версии на диске (на момент remember)."""
+        notes = self.dm.all_notes
+        if isinstance(notes, LazyNotes) and not notes.is_loaded(note_id):
+            return False
+        return note_checksum(notes[note_id]) != self.sums.get(note_id)
+
+    def _read_disk(self):
+        """(crc заметок на диске, функция чтения заметки с диска)."""
+        notes = self.dm.all_notes
+        if isinstance(notes, LazyNotes):
+            notes.attach(self.dm.filename)
+            return notes.disk_checksums(), notes.read_disk
+        disk = dict(iter_notes(self.dm.filename))
+        return note_checksums(disk), disk.__getitem__
+
+    def merge_from_disk(self):
+        """
+        Применяет к памяти изменения файла с момента remember(). Перезаписывает
+        только заметки с другим crc. Возвращает отчет для обновления интерфейса.
+        """
+        dm = self.dm
+        notes = dm.all_notes
+        lazy = isinstance(notes, LazyNotes)
+        disk_sums, read_disk = self._read_disk()
+        current = dm.current_note_id
+        report = {"changed": [], "removed": [], "current": False}
+        adopted = []
+
+        for note_id, crc in disk_sums.items():
+            if crc == self.sums.get(note_id):
+                continue  # Не менялась (или удалена у нас и не тронута на диске)
+            if note_id in notes and self._modified(note_id):
+                notes[note_id] = self._merge(note_id, notes[note_id], read_disk(note_id))
+            elif lazy:
+                notes.adopt(note_id)
+                adopted.append(note_id)
+            else:
+                note = read_disk(note_id)
+                ensure_task_ids(note.setdefault("tasks", []), note_id)
+                notes[note_id] = note
+            report["changed"].append(note_id)
+
+        for note_id in self.sums.keys() - disk_sums.keys():
+            if note_id == current or note_id not in notes or self._modified(note_id):
+                continue
+            del notes[note_id]
+            if note_id in dm.recent:
+                dm.recent.remove(note_id)
+            report["removed"].append(note_id)
+
+        for note_id in report["removed"]:
+            dm.search.remove_note(note_id)
+        for note_id in report["changed"]:
+            if not lazy:
+                dm.meta.update(note_id)
+            dm.search.update_note(note_id)
+        for note_id in adopted:
+            notes.adopt(note_id)  # Индекс поиска мог декодировать заметку — выгружаем обратно
+
+        report["current"] = current in report["changed"]
+        self.sums = disk_sums
+        self.state = _disk_state(dm.filename)
+        if report["current"]:
+            dm.parser.load_timings()
+            self.rebase()
+        return report
+
+    def _merge(self, note_id, ours, theirs):
+        """Заметка изменена с обеих сторон: слияние задач (база известна только для текущей)."""
+        base_id, base_text = self._base
+        base = json.loads(base_text) if base_id == note_id and base_text else None
+        merged, _conflicts = merge_databases(
+            {"notes": {note_id: base}} if base else {},
+            {"notes": {note_id: ours}},
+            {"notes": {note_id: theirs}},
+        )
+        note = merged["notes"][note_id]
+        ensure_task_ids(note["tasks"], note_id)
+        return note
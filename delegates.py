@@ -46,6 +46,8 @@ class DateDelegate(QStyledItemDelegate):
 
         if item.checkState(0) == Qt.CheckState.Checked:
             check_opt.state |= QStyle.StateFlag.State_On
+        elif item.checkState(0) == Qt.CheckState.PartiallyChecked:
+            check_opt.state |= QStyle.StateFlag.State_NoChange
         else:
             check_opt.state |= QStyle.StateFlag.State_Off
 
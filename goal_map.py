@@ -30,6 +30,7 @@ from PyQt6.QtWidgets import (
 # Импортируем наши классы
 from gm_planet import TaskPlanetItem
 from gm_sun import SunItem
+from perf import Perf
 
 # --- ДАННЫЕ ЗОДИАКА (Шаблоны) ---
 ZODIAC_PATTERNS_DATA = {
@@ -466,11 +467,13 @@ class DynamicStarryScene(QGraphicsScene):
 
 
 class GoalMapWindow(QWidget):
-    def __init__(self, note_data, default_accent, save_callback=None):
+    def __init__(self, note_data, default_accent, save_callback=None, summary_getter=None):
         super().__init__()
         self.note_data = note_data
         self.accent = QColor(default_accent)
         self.save_callback = save_callback
+        # Готовая сводка заметки из DataManager (прогресс без обхода задач)
+        self.summary_getter = summary_getter
 
         raw_title = self.note_data.get("title", "Note")
         clean_title = raw_title.split(" - ")[0]
@@ -687,6 +690,8 @@ class GoalMapWindow(QWidget):
         QTimer.singleShot(50, self._initial_fit)
 
     def _calculate_progress(self):
+        if self.summary_getter:
+            return self.summary_getter()["progress"] / 100
         tasks = self.note_data.get("tasks", [])
         if not tasks:
             return 0.0
@@ -704,10 +709,10 @@ class GoalMapWindow(QWidget):
         return total / len(tasks)
 
     def update_progress(self):
-        ratio = self._calculate_progress()
-        self.sun.set_progress(ratio)
+        # Сначала сохраняем: сохранение пересчитывает сводку, из которой берется прогресс
         if self.save_callback:
             self.save_callback()
+        self.sun.set_progress(self._calculate_progress())
 
     def _initial_fit(self):
         self.view.fitInView(
@@ -747,6 +752,7 @@ class GoalMapWindow(QWidget):
     def _focus_on_rect(self, rect):
         self.view.fitInView(rect, Qt.AspectRatioMode.KeepAspectRatio)
 
+    @Perf.timed("map.game_loop")
     def game_loop(self):
         self.scene.advance()
         self.sun.advance(1)
@@ -1,10 +1,17 @@
 # input_logic.py
+import os
+
+from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QKeySequence, QShortcut
 
+from perf import Perf
+from perf_hud import PerfHud
+
 
 class InputLogic:
     def __init__(self, main_window):
         self.mw = main_window
+        self.perf_hud = None
 
     def setup(self):
         self.connect_signals()
@@ -19,11 +26,15 @@ class InputLogic:
 
         # Ввод
         self.mw.inp.returnPressed.connect(self.mw.tree_logic.add_task)
+        self.mw.inp.outlinePasted.connect(self.mw.tree_logic.paste_outline)
 
         # Дерево
         self.mw.tree.itemChanged.connect(self.mw.tree_logic.on_item_changed)
         self.mw.tree.customContextMenuRequested.connect(self.mw.tree_logic.show_context_menu)
         self.mw.tree.on_change_callback = self.mw.save_and_update
+        self.mw.tree.on_drop_callback = self.mw.tree_logic.drop_items
+        self.mw.crumbs.crumbClicked.connect(self.mw.tree_logic.hoist_up)
+        self.mw.filter_bar.clicked.connect(lambda: self.mw.tree_logic.set_filter(clear=True))
 
         # Трей
         self.mw.tray.activated.connect(self.mw.menu_logic.on_tray_click)
@@ -49,6 +60,20 @@ class InputLogic:
         )
         QShortcut(QKeySequence("Ctrl+Right"), self.mw).activated.connect(tl.indent_item)
         QShortcut(QKeySequence("Ctrl+Left"), self.mw).activated.connect(tl.unindent_item)
+        # Фокус на ветке: войти в текущую задачу / подняться на уровень
+        QShortcut(QKeySequence("Alt+Right"), self.mw).activated.connect(lambda: tl.hoist_item())
+        QShortcut(QKeySequence("Alt+Left"), self.mw).activated.connect(lambda: tl.hoist_up())
+        # Delete — только в фокусе дерева (в поле ввода и редакторе задачи это правка текста)
+        QShortcut(
+            QKeySequence(QKeySequence.StandardKey.Delete), self.mw.tree, context=Qt.ShortcutContext.WidgetShortcut
+        ).activated.connect(tl.delete_selected)
+
+        # Поиск по всем заметкам
+        QShortcut(QKeySequence("Ctrl+F"), self.mw).activated.connect(self.mw.menu_logic.open_search)
+
+        # Диагностика производительности
+        QShortcut(QKeySequence("Ctrl+Shift+P"), self.mw).activated.connect(self.toggle_perf_hud)
+        QShortcut(QKeySequence("Ctrl+Shift+T"), self.mw).activated.connect(self.export_perf_trace)
 
     def perform_undo(self):
         if self.mw.data.undo():
@@ -58,6 +83,30 @@ class InputLogic:
         if self.mw.data.redo():
             self.mw.refresh_ui()
 
+    def toggle_perf_hud(self):
+        if self.perf_hud is None:
+            self.perf_hud = PerfHud()
+
+        if self.perf_hud.isVisible():
+            self.perf_hud.hide()
+            Perf.enabled = os.environ.get("SESHAT_PERF") == "1"
+            return
+
+        Perf.enabled = True
+        geo = self.mw.frameGeometry()
+        self.perf_hud.move(geo.right() + 8, geo.top())
+        self.perf_hud.show()
+
+    def export_perf_trace(self):
+        path = os.path.abspath("seshat_trace.json")
+        try:
+            count = Perf.export_chrome_trace(path)
+        except OSError as e:
+            print(f"Error exporting trace: {e}")
+            return
+        if self.perf_hud:
+            self.perf_hud.set_status(f"trace: {count} events -> {path}")
+
     def focus_input(self):
         if not self.mw.locked:
             self.mw.inp.setFocus()
@@ -0,0 +1,454 @@
+# local_api.py
+"""
+Локальный API запущенного стикера: JSON-RPC 2.0 поверх QLocalServer
+(Unix-сокет / именованный канал Windows, доступ только текущему пользователю).
+
+Одна строка — один запрос (или пакет-массив запросов), ответ — тоже строкой:
+
+    {"jsonrpc": "2.0", "id": 1, "method": "tasks.add",
+     "params": {"tasks": [{"text": "Купить хлеб"}, {"text": "Релиз", "children": [{"text": "Тесты"}]}]}}
+
+Методы (note_id по умолчанию — текущая заметка):
+    notes.list                                  -> [{id, title, total, done, progress, ...}]
+    notes.get        {note_id}                  -> {id, title, tasks}
+    tasks.add        {note_id, parent_id, tasks} -> {ids}: id новых задач в порядке обхода
+    tasks.check      {note_id, ids, checked=true}
+    tasks.cancel     {note_id, ids, cancelled=true}
+    events.subscribe                            -> далее приходят уведомления
+        {"method": "notes.changed", "params": {"note_ids": [...], "source": "api" | "app" | "external"}}
+
+Запросы, пришедшие за один проход цикла событий, применяются в памяти через
+DataManager и сохраняются ОДНОЙ записью базы; ответы уходят после неё. Поэтому
+скрипт, отправляющий запросы потоком (не дожидаясь ответов), добавляет тысячи
+задач в секунду, а файл пишет только сам стикер.
+
+Клиент из командной строки:
+    python local_api.py notes.list
+    python local_api.py tasks.add '{"tasks": [{"text": "из скрипта"}]}'
+    python local_api.py --events
+"""
+import argparse
+import copy
+import getpass
+import json
+import sys
+import time
+from datetime import datetime
+
+from PyQt6.QtCore import QCoreApplication, QObject, QTimer
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+from task_merge import new_task_id
+
+SERVER_NAME = f"seshat-sticky-note-{getpass.getuser()}"
+# Одна строка запроса больше не бывает (защита от клиента, не шлющего '\n')
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+CONNECT_TIMEOUT_MS = 1000
+
+# Коды ошибок JSON-RPC 2.0
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+
+
+class ApiError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+def _done_date():
+    # Тот же формат, что ставит дерево при отметке задачи
+    return datetime.now().strftime("%d.%m.%Y, %H:%M")
+
+
+def _build_task(spec, ids, now):
+    """Задача из описания клиента {text, checked, cancelled, children}; id дописываются в ids."""
+    if not isinstance(spec, dict) or not isinstance(spec.get("text"), str):
+        raise ApiError(INVALID_PARAMS, "task must be an object with a string 'text'")
+    checked = bool(spec.get("checked", False))
+    task = {
+        "id": new_task_id(),
+        "text": spec["text"],
+        "checked": checked,
+        "done_date": _done_date() if checked else None,
+        "cancelled": bool(spec.get("cancelled", False)),
+        "children": [],
+        "mtime": now,
+    }
+    ids.append(task["id"])
+    children = spec.get("children", [])
+    if not isinstance(children, list):
+        raise ApiError(INVALID_PARAMS, "'children' must be a list")
+    task["children"] = [_build_task(child, ids, now) for child in children]
+    return task
+
+
+class LocalApi(QObject):
+    def __init__(self, main_window):
+        super().__init__()
+        self.mw = main_window
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self._on_connection)
+
+        self._buffers = {}  # сокет -> недочитанный хвост
+        self._subscribers = set()
+        self._replies = []  # (сокет, ответ) — отправляются после записи базы
+        self._dirty = set()  # id заметок, измененных с последней записи
+        self._index = {}  # note_id -> {task_id: (задача, родитель)}; живет до записи
+        self._flushing = False
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(0)  # После всех уже пришедших данных
+        self._flush_timer.timeout.connect(self.flush)
+
+        self.methods = {
+            "notes.list": self.notes_list,
+            "notes.get": self.notes_get,
+            "tasks.add": self.tasks_add,
+            "tasks.check": self.tasks_check,
+            "tasks.cancel": self.tasks_cancel,
+        }
+
+        self.mw.data.on_saved = self._on_app_saved
+        self.mw.data.watcher.notes_reloaded.connect(
+            lambda report: self.broadcast(report["changed"] + report["removed"], "external")
+        )
+
+    # --- Сервер ---
+    def start(self, name=SERVER_NAME):
+        """Слушает name. False, если имя уже занято другим запущенным стикером."""
+        probe = QLocalSocket()
+        probe.connectToServer(name)
+        if probe.waitForConnected(100):
+            probe.abort()
+            print(f"Local API: {name} is already served by another instance")
+            return False
+        # Сокет, оставшийся от упавшего процесса, мешает listen()
+        QLocalServer.removeServer(name)
+        if not self.server.listen(name):
+            print(f"Local API: {self.server.errorString()}")
+            return False
+        return True
+
+    def close(self):
+        self.flush()
+        self.server.close()
+
+    def _on_connection(self):
+        while self.server.hasPendingConnections():
+            sock = self.server.nextPendingConnection()
+            self._buffers[sock] = b""
+            sock.readyRead.connect(lambda s=sock: self._on_ready_read(s))
+            sock.disconnected.connect(lambda s=sock: self._on_disconnected(s))
+
+    def _on_disconnected(self, sock):
+        self._buffers.pop(sock, None)
+        self._subscribers.discard(sock)
+        sock.deleteLater()
+
+    def _on_ready_read(self, sock):
+        buf = self._buffers.get(sock, b"") + bytes(sock.readAll())
+        *lines, rest = buf.split(b"\n")
+        if len(rest) > MAX_REQUEST_SIZE:
+            self._send(sock, self._error(None, INVALID_REQUEST, "request too large"))
+            sock.disconnectFromServer()
+            return
+        self._buffers[sock] = rest
+        for line in lines:
+            if line.strip():
+                reply = self.handle_line(line, sock)
+                if reply is not None:
+                    self._replies.append((sock, reply))
+        self._flush_timer.start()
+
+    # --- Протокол ---
+    def handle_line(self, line, sock=None):
+        """Разбирает одну строку; возвращает ответ (dict/list) или None для уведомлений."""
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            return self._error(None, PARSE_ERROR, f"parse error: {e}")
+        if isinstance(message, list):
+            if not message:
+                return self._error(None, INVALID_REQUEST, "empty batch")
+            replies = [r for r in (self.handle(m, sock) for m in message) if r is not None]
+            return replies or None
+        return self.handle(message, sock)
+
+    def handle(self, message, sock=None):
+        if not isinstance(message, dict) or not isinstance(message.get("method"), str):
+            return self._error(None, INVALID_REQUEST, "invalid request")
+        req_id = message.get("id")
+        method = message["method"]
+        params = message.get("params") or {}
+        try:
+            if not isinstance(params, dict):
+                raise ApiError(INVALID_PARAMS, "params must be an object")
+            if method == "events.subscribe":
+                if sock is not None:
+                    self._subscribers.add(sock)
+                result = True
+            elif method in self.methods:
+                result = self.methods[method](**params)
+            else:
+                raise ApiError(METHOD_NOT_FOUND, f"method not found: {method}")
+        except ApiError as e:
+            return self._error(req_id, e.code, str(e)) if "id" in message else None
+        except TypeError as e:
+            # Лишний или недостающий параметр
+            return self._error(req_id, INVALID_PARAMS, str(e)) if "id" in message else None
+        if "id" not in message:
+            return None
+        return {"jsonrpc": "2.0", "id": req_id, "result": result}
+
+    @staticmethod
+    def _error(req_id, code, message):
+        return {"jsonrpc": "2.0", "id": req_id, "error": {"code": code, "message": message}}
+
+    def _send(self, sock, payload):
+        if sock.state() == QLocalSocket.LocalSocketState.ConnectedState:
+            sock.write(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    # --- Методы ---
+    def notes_list(self):
+        # Сводки измененных, но еще не записанных заметок
+        for note_id in self._dirty:
+            self.mw.data.meta.update(note_id)
+        return self.mw.data.meta.all()
+
+    def notes_get(self, note_id=None):
+        note_id = self._note_id(note_id)
+        note = self.mw.data.all_notes[note_id]
+        return {"id": note_id, "title": note.get("title", ""), "tasks": note.get("tasks", [])}
+
+    def tasks_add(self, tasks, note_id=None, parent_id=None):
+        note_id = self._note_id(note_id)
+        if not isinstance(tasks, list):
+            raise ApiError(INVALID_PARAMS, "'tasks' must be a list")
+        index = self._task_index(note_id)
+        if parent_id is None:
+            siblings = self.mw.data.all_notes[note_id]["tasks"]
+            parent = None
+        elif parent_id in index:
+            parent = index[parent_id][0]
+            siblings = parent.setdefault("children", [])
+        else:
+            raise ApiError(INVALID_PARAMS, f"unknown task: {parent_id}")
+
+        ids = []
+        now = int(time.time())
+        new_tasks = [_build_task(spec, ids, now) for spec in tasks]  # Сначала проверка всего запроса
+        siblings.extend(new_tasks)
+        stack = [(task, parent) for task in new_tasks]
+        while stack:
+            task, task_parent = stack.pop()
+            index[task["id"]] = (task, task_parent)
+            stack.extend((child, task) for child in task["children"])
+        self._dirty.add(note_id)
+        return {"ids": ids}
+
+    def tasks_check(self, ids, note_id=None, checked=True):
+        """Как клик по флажку: задача и её потомки, затем пересчет предков до корня."""
+        if not isinstance(checked, bool):
+            raise ApiError(INVALID_PARAMS, "'checked' must be true or false")
+        note_id = self._note_id(note_id)
+        tasks = self._tasks_by_ids(note_id, ids)
+        index = self._task_index(note_id)
+        now = int(time.time())
+        for task, parent in tasks:
+            stack = [task]
+            while stack:
+                item = stack.pop()
+                self._set_checked(item, checked, now)
+                stack.extend(item.get("children", []))
+            while parent is not None:
+                children = parent.get("children", [])
+                if not self._set_checked(parent, all(c.get("checked") for c in children), now):
+                    break  # Состояние не изменилось — выше тоже
+                parent = index.get(parent.get("id"), (None, None))[1]
+        self._dirty.add(note_id)
+        return {"updated": len(tasks)}
+
+    def tasks_cancel(self, ids, note_id=None, cancelled=True):
+        note_id = self._note_id(note_id)
+        tasks = self._tasks_by_ids(note_id, ids)
+        now = int(time.time())
+        for task, _parent in tasks:
+            if task.get("cancelled", False) != bool(cancelled):
+                task["cancelled"] = bool(cancelled)
+                task["mtime"] = now
+        self._dirty.add(note_id)
+        return {"updated": len(tasks)}
+
+    @staticmethod
+    def _set_checked(task, checked, now):
+        if task.get("checked", False) == checked:
+            return False
+        task["checked"] = checked
+        task["done_date"] = (task.get("done_date") or _done_date()) if checked else None
+        task["mtime"] = now
+        return True
+
+    # --- Адресация ---
+    def _note_id(self, note_id):
+        note_id = note_id or self.mw.data.current_note_id
+        if note_id not in self.mw.data.all_notes:
+            raise ApiError(INVALID_PARAMS, f"unknown note: {note_id}")
+        return note_id
+
+    def _task_index(self, note_id):
+        """
+        id -> (задача, родитель) для заметки; строится один раз до ближайшей записи.
+        Методы правят задачи на месте, поэтому заметка сначала получает свою копию
+        списка: прежний может быть шагом undo (после DataHistory.undo) или жить в
+        открытой транзакции.
+        """
+        index = self._index.get(note_id)
+        if index is None:
+            dm = self.mw.data
+            dm.will_change(note_id)
+            note = dm.all_notes[note_id]
+            note["tasks"] = copy.deepcopy(note.get("tasks", []))
+            index = self._index[note_id] = {}
+            stack = [(task, None) for task in note["tasks"]]
+            while stack:
+                task, parent = stack.pop()
+                if task.get("id"):
+                    index[task["id"]] = (task, parent)
+                stack.extend((child, task) for child in task.get("children", []))
+        return index
+
+    def _tasks_by_ids(self, note_id, ids):
+        if not isinstance(ids, list):
+            raise ApiError(INVALID_PARAMS, "'ids' must be a list")
+        index = self._task_index(note_id)
+        missing = [tid for tid in ids if tid not in index]
+        if missing:
+            raise ApiError(INVALID_PARAMS, f"unknown tasks: {', '.join(map(str, missing[:10]))}")
+        return [index[tid] for tid in ids]
+
+    # --- Запись и события ---
+    def flush(self):
+        """Одна запись базы на все накопленные изменения, затем ответы и события."""
+        changed = sorted(self._dirty)
+        self._dirty.clear()
+        self._index.clear()  # После записи ленивое хранилище выгружает заметки
+        if changed:
+            dm = self.mw.data
+            current = dm.current_note_id
+            for note_id in changed:
+                dm.meta.update(note_id)
+                dm.search.update_note(note_id)
+            if current in changed:
+                dm.history.add_to_history(dm.all_notes[current]["tasks"])
+                dm.update_smart_title()
+            self._flushing = True
+            try:
+                dm.save_to_disk()
+            finally:
+                self._flushing = False
+            if current in changed:
+                self.mw.refresh_ui()
+                self.mw.refresh_map_if_open()
+            else:
+                self.mw.tree_logic.update_title_ui()
+
+        replies, self._replies = self._replies, []
+        for sock, reply in replies:
+            self._send(sock, reply)
+        if changed:
+            self.broadcast(changed, "api")
+
+    def _on_app_saved(self, note_id):
+        # Правки из самого стикера (дерево, карта, переименование)
+        if not self._flushing:
+            self.broadcast([note_id], "app")
+
+    def broadcast(self, note_ids, source):
+        if not self._subscribers or not note_ids:
+            return
+        event = {"jsonrpc": "2.0", "method": "notes.changed", "params": {"note_ids": list(note_ids), "source": source}}
+        for sock in list(self._subscribers):
+            self._send(sock, event)
+
+
+# --- КЛИЕНТ ---
+
+class ApiClient:
+    """Синхронный клиент для скриптов (без цикла событий Qt)."""
+
+    def __init__(self, name=SERVER_NAME, timeout_ms=CONNECT_TIMEOUT_MS):
+        self.timeout_ms = timeout_ms
+        self.sock = QLocalSocket()
+        self.sock.connectToServer(name)
+        if not self.sock.waitForConnected(timeout_ms):
+            raise ConnectionError(f"Seshat is not running ({name}): {self.sock.errorString()}")
+        self._buf = b""
+        self._next_id = 0
+
+    def close(self):
+        self.sock.disconnectFromServer()
+
+    def send(self, method, params=None, notify=False):
+        """Отправляет запрос, не дожидаясь ответа; возвращает его id (None для уведомления)."""
+        message = {"jsonrpc": "2.0", "method": method, "params": params or {}}
+        req_id = None
+        if not notify:
+            self._next_id += 1
+            req_id = message["id"] = self._next_id
+        self.sock.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.sock.flush()
+        return req_id
+
+    def read(self, timeout_ms=30000):
+        """Следующее сообщение сервера (ответ или событие)."""
+        while b"\n" not in self._buf:
+            if not self.sock.waitForReadyRead(timeout_ms):
+                raise TimeoutError("no reply from Seshat")
+            self._buf += bytes(self.sock.readAll())
+        line, self._buf = self._buf.split(b"\n", 1)
+        return json.loads(line)
+
+    def call(self, method, **params):
+        req_id = self.send(method, params)
+        while True:
+            reply = self.read()
+            if reply.get("id") == req_id:
+                break
+        if "error" in reply:
+            raise RuntimeError(reply["error"]["message"])
+        return reply["result"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальный API запущенного Seshat")
+    parser.add_argument("method", nargs="?", help="например notes.list, tasks.add")
+    parser.add_argument("params", nargs="?", default="{}", help="параметры в JSON")
+    parser.add_argument("--events", action="store_true", help="печатать события изменения заметок")
+    args = parser.parse_args(argv)
+    if not args.method and not args.events:
+        parser.print_help()
+        return 1
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)  # noqa: F841 — нужен QLocalSocket
+    client = ApiClient()
+    if args.method:
+        result = client.call(args.method, **json.loads(args.params))
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.events:
+        client.call("events.subscribe")
+        while True:
+            try:
+                print(json.dumps(client.read(timeout_ms=-1)["params"], ensure_ascii=False), flush=True)
+            except (TimeoutError, KeyboardInterrupt):
+                break
+    client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
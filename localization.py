@@ -61,6 +61,61 @@ class Loc:
             "current_note": "Current Note",
             "delete_confirm_title": "Delete Note?",
             "delete_confirm_text": "Delete this note forever?",
+            "menu_search": "🔍 Search",
+            "search_title": "SEARCH",
+            "search_hint": "Search notes and tasks...",
+            "search_empty": "Nothing found",
+            "archive_filter": "Filter by title...",
+            "sort_date_desc": "Newest first",
+            "sort_date_asc": "Oldest first",
+            "sort_progress_desc": "Most done",
+            "sort_progress_asc": "Least done",
+            "sort_title": "By title",
+            "menu_more": "More...",
+            "menu_dashboard": "📊 Dashboard",
+            "dashboard_title": "Dashboard",
+            "dashboard_grid": "▦ Cards",
+            "dashboard_galaxy": "✦ Galaxy",
+            "integrity_salvaged": "Database was damaged. Recovered notes: {n}",
+            "integrity_repaired": "Database problems were fixed. Original saved as backup",
+            "ctx_bulk_check": "Mark done ({n})",
+            "ctx_bulk_uncheck": "Mark not done ({n})",
+            "ctx_bulk_cancel": "Cancel ({n})",
+            "ctx_bulk_restore": "Restore ({n})",
+            "ctx_bulk_delete": "Delete ({n})",
+            "ctx_move_up": "Move up",
+            "ctx_move_down": "Move down",
+            "ctx_indent": "Indent",
+            "ctx_unindent": "Outdent",
+            "menu_filter": "🔎 Filter",
+            "filter_all": "All tasks",
+            "filter_open": "Open",
+            "filter_done": "Completed",
+            "filter_cancelled": "Cancelled",
+            "filter_text": "Text contains...",
+            "filter_since": "Completed since...",
+            "filter_clear": "Clear filter",
+            "filter_text_prompt": "Show tasks containing (empty — any text):",
+            "filter_since_prompt": "Show tasks completed on or after (dd.mm.yyyy, empty — any date):",
+            "filter_bad_date": "Date must look like 31.12.2024",
+            "filter_bar": "Filter: {f}  ✕",
+            "menu_export": "📤 Export",
+            "export_current": "Current note...",
+            "export_all": "All notes...",
+            "export_title": "Export notes",
+            "export_progress": "Exporting notes...",
+            "export_done": "Exported notes: {n}",
+            "export_failed": "Export failed",
+            "menu_import": "📥 Import",
+            "import_new_notes": "As new notes...",
+            "import_into_current": "Into current note...",
+            "import_title": "Import tasks",
+            "import_progress": "Reading file...",
+            "import_done": "Imported tasks: {tasks} (notes: {notes})",
+            "import_empty": "No tasks found in the file",
+            "import_failed": "Import failed",
+            "ctx_hoist": "Focus on this task",
+            "hoist_root": "All tasks",
         },
         "ru": {
             "title_default": "ЗАДАЧИ",
@@ -92,6 +147,61 @@ class Loc:
             "current_note": "текущую заметку",
             "delete_confirm_title": "Удалить заметку?",
             "delete_confirm_text": "Вы точно хотите удалить эту заметку навсегда?",
+            "menu_search": "🔍 Поиск",
+            "search_title": "ПОИСК",
+            "search_hint": "Поиск по заметкам и задачам...",
+            "search_empty": "Ничего не найдено",
+            "archive_filter": "Фильтр по названию...",
+            "sort_date_desc": "Сначала новые",
+            "sort_date_asc": "Сначала старые",
+            "sort_progress_desc": "Больше сделано",
+            "sort_progress_asc": "Меньше сделано",
+            "sort_title": "По названию",
+            "menu_more": "Ещё...",
+            "menu_dashboard": "📊 Дашборд",
+            "dashboard_title": "Дашборд",
+            "dashboard_grid": "▦ Карточки",
+            "dashboard_galaxy": "✦ Галактика",
+            "integrity_salvaged": "База была повреждена. Восстановлено заметок: {n}",
+            "integrity_repaired": "Ошибки в базе исправлены. Исходный файл сохранен копией",
+            "ctx_bulk_check": "Отметить выполненными ({n})",
+            "ctx_bulk_uncheck": "Снять отметку ({n})",
+            "ctx_bulk_cancel": "Зачеркнуть ({n})",
+            "ctx_bulk_restore": "Восстановить ({n})",
+            "ctx_bulk_delete": "Удалить ({n})",
+            "ctx_move_up": "Выше",
+            "ctx_move_down": "Ниже",
+            "ctx_indent": "Вложить",
+            "ctx_unindent": "Вынести уровнем выше",
+            "menu_filter": "🔎 Фильтр",
+            "filter_all": "Все задачи",
+            "filter_open": "Открытые",
+            "filter_done": "Выполненные",
+            "filter_cancelled": "Отмененные",
+            "filter_text": "Текст содержит...",
+            "filter_since": "Выполненные с даты...",
+            "filter_clear": "Снять фильтр",
+            "filter_text_prompt": "Показывать задачи с текстом (пусто — любой):",
+            "filter_since_prompt": "Показывать выполненные не раньше (дд.мм.гггг, пусто — любая дата):",
+            "filter_bad_date": "Дата в виде 31.12.2024",
+            "filter_bar": "Фильтр: {f}  ✕",
+            "menu_export": "📤 Экспорт",
+            "export_current": "Текущая заметка...",
+            "export_all": "Все заметки...",
+            "export_title": "Экспорт заметок",
+            "export_progress": "Экспорт заметок...",
+            "export_done": "Экспортировано заметок: {n}",
+            "export_failed": "Ошибка экспорта",
+            "menu_import": "📥 Импорт",
+            "import_new_notes": "Новыми заметками...",
+            "import_into_current": "В текущую заметку...",
+            "import_title": "Импорт задач",
+            "import_progress": "Чтение файла...",
+            "import_done": "Импортировано задач: {tasks} (заметок: {notes})",
+            "import_empty": "В файле не найдено задач",
+            "import_failed": "Ошибка импорта",
+            "ctx_hoist": "Фокус на этой задаче",
+            "hoist_root": "Все задачи",
         },
         "kk": {
             "title_default": "ТАПСЫРМАЛАР",
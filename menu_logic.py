@@ -1,17 +1,42 @@
 # menu_logic.py
-from PyQt6.QtCore import QPoint
-from PyQt6.QtGui import QAction
-from PyQt6.QtWidgets import QInputDialog, QMenu, QMessageBox, QSystemTrayIcon
+from datetime import datetime
+
+from PyQt6.QtCore import QPoint, Qt
+from PyQt6.QtGui import QAction, QActionGroup
+from PyQt6.QtWidgets import (
+    QFileDialog,
+    QInputDialog,
+    QMenu,
+    QMessageBox,
+    QProgressDialog,
+    QSystemTrayIcon,
+)
 
 # [NEW] Импортируем нашу карту
+from archive import ArchiveDialog
+from dashboard import DashboardWindow
 from goal_map import GoalMapWindow
 from localization import Loc
+from note_export import EXPORTERS, ExportWorker, format_for_path, write_export
+from note_import import ImportWorker, as_tasks, format_for_path as import_format_for_path
+from search_dialog import SearchDialog
 from styles import Styles
+from tree_filter import MODES, SINCE_FORMAT
 
 
 class MenuLogic:
     def __init__(self, main_window):
         self.mw = main_window
+        self.search_dialog = None
+        self.dashboard = None
+        self.file_worker = None  # Фоновый импорт / экспорт (один за раз)
+
+        # Главное меню строится один раз (пересоздается при смене языка),
+        # подменю "Перейти" и "Язык" наполняются лениво при открытии
+        self.main_menu = None
+        self._goto_key = None
+        self._lang_actions = {}
+        self._filter_actions = {}
 
     def setup_tray(self):
         self.update_tray_menu()
@@ -22,6 +47,14 @@ class MenuLogic:
         tray_menu.addAction(Loc.t("menu_exit")).triggered.connect(self.mw.close)
         self.mw.tray.setContextMenu(tray_menu)
 
+    def update_tray_tooltip(self):
+        """Подсказка трея: текущая заметка и её прогресс (из сводки, без обхода задач)"""
+        nid = self.mw.data.current_note_id
+        if not nid or nid not in self.mw.data.all_notes:
+            return
+        meta = self.mw.data.meta.get(nid)
+        self.mw.tray.setToolTip(f"{meta['title']} — {meta['progress']}% ({meta['done']}/{meta['total']})")
+
     def on_tray_click(self, reason):
         if reason == QSystemTrayIcon.ActivationReason.Trigger:
             if self.mw.isMinimized() or not self.mw.isVisible():
@@ -31,6 +64,20 @@ class MenuLogic:
                 self.mw.toggle_lock_mode()
 
     def show_main_menu(self):
+        if self.main_menu is None:
+            self.main_menu = self._build_main_menu()
+        self.main_menu.exec(self.mw.menu_btn.mapToGlobal(QPoint(0, self.mw.menu_btn.height())))
+
+    def invalidate_menu(self):
+        """Сбрасывает кэш меню (нужно, когда меняются тексты интерфейса)"""
+        if self.main_menu is not None:
+            self.main_menu.deleteLater()
+        self.main_menu = None
+        self._goto_key = None
+        self._lang_actions = {}
+        self._filter_actions = {}
+
+    def _build_main_menu(self):
         menu = QMenu(self.mw)
         menu.setStyleSheet(Styles.get_menu(self.mw.default_accent))
 
@@ -38,6 +85,10 @@ class MenuLogic:
         # Добавляем её в самый верх или перед разделителем
         map_text = f"🌌 {Loc.t('menu_map', 'Goal Map')}"
         menu.addAction(map_text).triggered.connect(self.open_goal_map)
+        menu.addAction(Loc.t("menu_dashboard", "📊 Dashboard")).triggered.connect(self.open_dashboard)
+        menu.addAction(Loc.t("menu_search", "🔍 Search")).triggered.connect(self.open_search)
+        filter_menu = menu.addMenu(Loc.t("menu_filter", "🔎 Filter"))
+        filter_menu.aboutToShow.connect(lambda: self._populate_filter(filter_menu))
 
         menu.addSeparator()
 
@@ -51,55 +102,268 @@ class MenuLogic:
         del_action = menu.addAction(del_text)
         del_action.triggered.connect(self.delete_current_note)
 
-        # 4. Языки
+        # 4. Языки (действия создаются при первом открытии подменю)
         lang_menu = menu.addMenu(Loc.t("menu_language"))
-        for code, name in Loc.lang_names.items():
-            action = QAction(name, self.mw)
-            action.setCheckable(True)
-            if code == Loc.lang:
-                action.setChecked(True)
-            action.triggered.connect(lambda checked, c=code: self.set_language(c))
-            lang_menu.addAction(action)
+        lang_menu.aboutToShow.connect(lambda: self._populate_languages(lang_menu))
 
         menu.addSeparator()
 
-        # 5. Переход к заметкам
-        archive_menu = menu.addMenu(Loc.t("menu_go_to"))
-        if not self.mw.data.all_notes:
-            archive_menu.addAction(Loc.t("menu_empty")).setEnabled(False)
-        else:
-            for note_id, note_data in self.mw.data.all_notes.items():
-                title = note_data.get("title", "No Title")
-                action = QAction(title, self.mw)
+        # 5. Переход к заметкам: только недавние (MRU), остальное — через архив
+        menu.addAction(Loc.t("menu_archive")).triggered.connect(self.open_archive)
+        goto_menu = menu.addMenu(Loc.t("menu_go_to"))
+        goto_menu.aboutToShow.connect(lambda: self._populate_goto(goto_menu))
+
+        # 6. Импорт и экспорт (OPML / Markdown / todo.txt / CSV / iCalendar)
+        import_menu = menu.addMenu(Loc.t("menu_import", "📥 Import"))
+        import_menu.addAction(Loc.t("import_new_notes", "As new notes...")).triggered.connect(
+            lambda: self.import_notes(into_current=False)
+        )
+        import_menu.addAction(Loc.t("import_into_current", "Into current note...")).triggered.connect(
+            lambda: self.import_notes(into_current=True)
+        )
+        export_menu = menu.addMenu(Loc.t("menu_export", "📤 Export"))
+        export_menu.addAction(Loc.t("export_current", "Current note...")).triggered.connect(
+            lambda: self.export_notes(all_notes=False)
+        )
+        export_menu.addAction(Loc.t("export_all", "All notes...")).triggered.connect(
+            lambda: self.export_notes(all_notes=True)
+        )
+        return menu
+
+    def _populate_languages(self, lang_menu):
+        if not self._lang_actions:
+            group = QActionGroup(lang_menu)
+            for code, name in Loc.lang_names.items():
+                action = QAction(name, lang_menu)
                 action.setCheckable(True)
-                if note_id == self.mw.data.current_note_id:
-                    action.setChecked(True)
-                action.triggered.connect(lambda checked, nid=note_id: self.switch_to_note(nid))
-                archive_menu.addAction(action)
+                action.setActionGroup(group)
+                action.triggered.connect(lambda checked, c=code: self.set_language(c))
+                lang_menu.addAction(action)
+                self._lang_actions[code] = action
+        if Loc.lang in self._lang_actions:
+            self._lang_actions[Loc.lang].setChecked(True)
 
-        menu.exec(self.mw.menu_btn.mapToGlobal(QPoint(0, self.mw.menu_btn.height())))
+    def _populate_filter(self, filter_menu):
+        view_filter = self.mw.tree_logic.filter
+        if not self._filter_actions:
+            group = QActionGroup(filter_menu)
+            for mode in MODES:
+                action = QAction(Loc.t(f"filter_{mode}"), filter_menu)
+                action.setCheckable(True)
+                action.setActionGroup(group)
+                action.triggered.connect(lambda checked, m=mode: self.mw.tree_logic.set_filter(mode=m))
+                filter_menu.addAction(action)
+                self._filter_actions[mode] = action
+            filter_menu.addSeparator()
+            for key, slot in (("filter_text", self.ask_filter_text), ("filter_since", self.ask_filter_since)):
+                action = QAction(Loc.t(key), filter_menu)
+                action.setCheckable(True)
+                action.triggered.connect(slot)
+                filter_menu.addAction(action)
+                self._filter_actions[key] = action
+            filter_menu.addSeparator()
+            self._filter_actions["clear"] = filter_menu.addAction(Loc.t("filter_clear"))
+            self._filter_actions["clear"].triggered.connect(lambda: self.mw.tree_logic.set_filter(clear=True))
+        # Отметки — по фильтру текущей заметки
+        self._filter_actions[view_filter.mode].setChecked(True)
+        self._filter_actions["filter_text"].setChecked(bool(view_filter.text))
+        self._filter_actions["filter_since"].setChecked(view_filter.since is not None)
+        self._filter_actions["clear"].setEnabled(view_filter.active)
+
+    def _populate_goto(self, goto_menu):
+        data = self.mw.data
+        recent = [nid for nid in data.recent if nid in data.all_notes]
+        # Действия пересоздаются, только если изменился состав, заголовки или текущая заметка
+        key = (tuple((nid, data.meta.get(nid)["title"]) for nid in recent), data.current_note_id)
+        if key == self._goto_key:
+            return
+        self._goto_key = key
+
+        goto_menu.clear()
+        if not recent:
+            goto_menu.addAction(Loc.t("menu_empty")).setEnabled(False)
+        for note_id, title in key[0]:
+            action = QAction(title, goto_menu)
+            action.setCheckable(True)
+            action.setChecked(note_id == data.current_note_id)
+            action.triggered.connect(lambda checked, nid=note_id: self.switch_to_note(nid))
+            goto_menu.addAction(action)
+
+        if len(data.all_notes) > len(recent):
+            goto_menu.addSeparator()
+            goto_menu.addAction(Loc.t("menu_more", "More...")).triggered.connect(self.open_archive)
 
     # --- Actions ---
     def set_language(self, lang_code):
-        Loc.lang = lang_code
+        with self.mw.data.transaction():
+            Loc.lang = lang_code
+            self.mw.data.update_smart_title()
+            self.mw.data.save_to_disk()
+        self.invalidate_menu()
         self.mw.update_interface_texts()
         self.update_tray_menu()
-        self.mw.data.update_smart_title()
         self.mw.tree_logic.update_title_ui()
-        self.mw.data.save_to_disk()
         self.mw.repaint()
 
     def create_new_note(self):
-        self.mw.save_and_update()
-        self.mw.data.create_new_note()
+        # Сохранение текущей и создание новой — одна запись базы
+        with self.mw.data.transaction():
+            self.mw.save_and_update()
+            self.mw.data.create_new_note()
         self.mw.refresh_ui()
         self.mw.inp.clear()
 
+    def ask_filter_text(self):
+        text, ok = QInputDialog.getText(
+            self.mw, Loc.t("menu_filter"), Loc.t("filter_text_prompt"), text=self.mw.tree_logic.filter.text
+        )
+        if ok:
+            self.mw.tree_logic.set_filter(text=text)
+
+    def ask_filter_since(self):
+        since = self.mw.tree_logic.filter.since
+        current = since.strftime(SINCE_FORMAT) if since else datetime.now().strftime(SINCE_FORMAT)
+        text, ok = QInputDialog.getText(self.mw, Loc.t("menu_filter"), Loc.t("filter_since_prompt"), text=current)
+        if not ok:
+            return
+        try:
+            since = datetime.strptime(text.strip(), SINCE_FORMAT) if text.strip() else False
+        except ValueError:
+            QMessageBox.warning(self.mw, Loc.t("menu_filter"), Loc.t("filter_bad_date"))
+            return
+        self.mw.tree_logic.set_filter(since=since)
+
     def switch_to_note(self, nid):
         self.mw.save_and_update()
         if self.mw.data.switch_note(nid):
             self.mw.refresh_ui()
 
+    def open_archive(self):
+        # Модель строится заново при каждом открытии: метаданные берутся из кэша DataManager
+        dialog = ArchiveDialog(self.mw)
+        dialog.exec()
+
+    def open_dashboard(self):
+        # Правки дерева уже сохранены (TreeCore сохраняет после каждой) — достаточно
+        # пересчитать сводку текущей заметки, без записи на диск и шага истории
+        self.mw.data.meta.update(self.mw.data.current_note_id)
+        if self.dashboard is None:
+            self.dashboard = DashboardWindow(self.mw)
+        else:
+            self.dashboard.refresh()
+        self.dashboard.show()
+        self.dashboard.raise_()
+        self.dashboard.activateWindow()
+
+    def open_search(self):
+        if self.search_dialog is None:
+            self.search_dialog = SearchDialog(self.mw)
+        self.search_dialog.show()
+        self.search_dialog.raise_()
+        self.search_dialog.activateWindow()
+
+    def export_notes(self, all_notes):
+        """Экспорт текущей заметки (сразу) или всей базы (потоково, в фоне)"""
+        if self.file_worker is not None:
+            return
+        # Сохраняем текущую заметку, чтобы в файл попало то, что на экране
+        self.mw.save_and_update()
+        filters = [f"{exporter.name} (*{exporter.extension})" for exporter in EXPORTERS.values()]
+        path, chosen = QFileDialog.getSaveFileName(
+            self.mw, Loc.t("export_title", "Export notes"), "seshat_export.md", ";;".join(filters)
+        )
+        if not path:
+            return
+        # Расширение из имени файла важнее выбранного фильтра
+        fmt = format_for_path(path, default=list(EXPORTERS)[filters.index(chosen)] if chosen in filters else "md")
+
+        if not all_notes:
+            nid = self.mw.data.current_note_id
+            try:
+                count = write_export([(nid, self.mw.data.all_notes[nid])], path, fmt)
+            except OSError as e:
+                QMessageBox.critical(self.mw, Loc.t("export_failed", "Export failed"), str(e))
+                return
+            self._on_export_done(count)
+            return
+
+        worker = ExportWorker(self.mw.data.filename, path, fmt)
+        worker.finished_ok.connect(self._on_export_done)
+        self._run_file_worker(worker, Loc.t("export_progress", "Exporting notes..."), Loc.t("export_failed", "Export failed"))
+
+    def _run_file_worker(self, worker, label, failed_title):
+        """Фоновый поток с прогрессом 0..1000 (ExportWorker, ImportWorker)"""
+        dialog = QProgressDialog(label, None, 0, 1000, self.mw)
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(300)
+        worker.progress.connect(dialog.setValue)
+        worker.failed.connect(lambda msg: QMessageBox.critical(self.mw, failed_title, msg))
+        worker.finished.connect(dialog.close)
+        worker.finished.connect(self._on_file_worker_finished)
+        self.file_worker = worker
+        worker.start()
+
+    def _on_file_worker_finished(self):
+        self.file_worker = None
+
+    def _on_export_done(self, count):
+        QMessageBox.information(
+            self.mw, Loc.t("export_title", "Export notes"), Loc.t("export_done", "Exported notes: {n}").format(n=count)
+        )
+
+    def import_notes(self, into_current):
+        """Импорт OPML / Markdown / todo.txt / CSV: разбор в фоне, вставка одной записью"""
+        if self.file_worker is not None:
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self.mw,
+            Loc.t("import_title", "Import tasks"),
+            "",
+            "OPML, Markdown, todo.txt, CSV (*.opml *.xml *.md *.markdown *.txt *.csv)",
+        )
+        if not path:
+            return
+        try:
+            fmt = import_format_for_path(path)
+        except ValueError as e:
+            QMessageBox.warning(self.mw, Loc.t("import_failed", "Import failed"), str(e))
+            return
+        worker = ImportWorker(path, fmt)
+        worker.finished_ok.connect(lambda notes: self._on_import_parsed(notes, into_current))
+        self._run_file_worker(worker, Loc.t("import_progress", "Reading file..."), Loc.t("import_failed", "Import failed"))
+
+    def _on_import_parsed(self, notes, into_current):
+        title = Loc.t("import_title", "Import tasks")
+        if not notes:
+            QMessageBox.information(self.mw, title, Loc.t("import_empty", "No tasks found in the file"))
+            return
+        data = self.mw.data
+        if into_current:
+            tasks = as_tasks(notes)
+            self.mw.tree_logic.append_tasks(tasks)
+        else:
+            # Все заметки файла — одна запись базы; открываем первую из них
+            with data.transaction():
+                ids = [data.add_note(note_title, note_tasks) for note_title, note_tasks in notes]
+                data.switch_note(ids[0])
+                data.save_to_disk()
+            self.mw.refresh_ui()
+            tasks = [task for _title, note_tasks in notes for task in note_tasks]
+        count, stack = 0, list(tasks)
+        while stack:
+            count += 1
+            stack.extend(stack.pop()["children"])
+        QMessageBox.information(
+            self.mw, title, Loc.t("import_done", "Imported tasks: {tasks} (notes: {notes})").format(tasks=count, notes=len(notes))
+        )
+
+    def jump_to(self, nid, task_id=None):
+        """Переход к заметке (и задаче в ней) из результатов поиска"""
+        if nid != self.mw.data.current_note_id:
+            self.switch_to_note(nid)
+        if task_id:
+            self.mw.tree_logic.select_task(task_id)
+
     def rename_current_note(self):
         if not self.mw.data.current_note_id:
             return
@@ -122,19 +386,21 @@ class MenuLogic:
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            if hasattr(self.mw.data, "delete_note"):
-                self.mw.data.delete_note(self.mw.data.current_note_id)
-            else:
-                cid = self.mw.data.current_note_id
-                if cid in self.mw.data.all_notes:
-                    del self.mw.data.all_notes[cid]
-                    if self.mw.data.all_notes:
-                        next_id = list(self.mw.data.all_notes.keys())[0]
-                        self.mw.data.switch_note(next_id)
-                    else:
-                        self.mw.data.create_new_note()
+            # Удаление, переход на другую заметку и запись — одним действием
+            with self.mw.data.transaction():
+                if hasattr(self.mw.data, "delete_note"):
+                    self.mw.data.delete_note(self.mw.data.current_note_id)
+                else:
+                    cid = self.mw.data.current_note_id
+                    if cid in self.mw.data.all_notes:
+                        del self.mw.data.all_notes[cid]
+                        if self.mw.data.all_notes:
+                            next_id = list(self.mw.data.all_notes.keys())[0]
+                            self.mw.data.switch_note(next_id)
+                        else:
+                            self.mw.data.create_new_note()
 
-            self.mw.data.save_to_disk()
+                self.mw.data.save_to_disk()
             self.mw.refresh_ui()
 
     # --- [NEW] Метод открытия карты ---
@@ -151,9 +417,15 @@ class MenuLogic:
         if hasattr(self, "map_window") and self.map_window.isVisible():
             self.map_window.close()
 
+        # Карта правит этот dict и после переключения заметки — он должен остаться в базе
+        self.mw.data.pinned = {nid}
+
         # [FIX] Передаем self.mw.on_map_data_changed как callback для сохранения!
         self.map_window = GoalMapWindow(
-            current_note_data, self.mw.default_accent, save_callback=self.mw.on_map_data_changed
+            current_note_data,
+            self.mw.default_accent,
+            save_callback=self.mw.on_map_data_changed,
+            summary_getter=lambda: self.mw.data.meta.summary(nid),
         )
         self.map_window.show()
 
@@ -167,3 +439,4 @@ class MenuLogic:
         except RuntimeError:
             # Если окно уже удалено (C++ object deleted), просто игнорируем
             pass
+        self.mw.data.pinned.clear()
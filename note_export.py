@@ -0,0 +1,341 @@
+# note_export.py
+"""
+Потоковый экспорт заметок: Markdown, OPML, CSV и iCalendar (VTODO).
+
+Каждый формат — генератор строк по одной заметке, деревья задач обходятся
+итеративно (стек вместо рекурсии). Заметки из базы читаются по одной
+(db_stream / db_snapshot), поэтому память не зависит от размера архива.
+Читается копия базы, снятая под db_lock: долгий экспорт не держит открытым
+живой файл, и запись стикера (os.replace) в это время не ломается.
+
+    python note_export.py md                      # вся база -> seshat_export.md
+    python note_export.py ics -o todo.ics --note <id> seshat_db.snap
+"""
+import argparse
+import csv
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from xml.sax.saxutils import quoteattr
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from data_storage import atomic_open
+from db_lock import db_lock
+from db_snapshot import SnapshotReader, is_snapshot
+from db_stream import NoteStreamReader
+
+DONE_FORMATS = ("%d.%m.%Y, %H:%M", "%d.%m.%Y %H:%M", "%d.%m.%Y")
+
+
+def walk(tasks):
+    """(глубина, id родителя, задача) в порядке дерева, без рекурсии."""
+    stack = [(0, None, task) for task in reversed(tasks)]
+    while stack:
+        depth, parent_id, task = stack.pop()
+        yield depth, parent_id, task
+        children = task.get("children") or []
+        stack.extend((depth + 1, task.get("id"), child) for child in reversed(children))
+
+
+def parse_done_date(text):
+    """done_date задачи ("dd.MM.yyyy, HH:mm", локальное время) -> datetime или None."""
+    for fmt in DONE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _title(note):
+    return note.get("title") or "Untitled"
+
+
+# --- ФОРМАТЫ ---
+
+class MarkdownExporter:
+    """Чек-лист: "## Заголовок", затем "- [ ]" / "- [x]" / "- [-]" (зачеркнута) с отступами."""
+
+    name = "Markdown"
+    extension = ".md"
+
+    def head(self):
+        return ()
+
+    def note(self, note_id, note):
+        yield f"## {_title(note)}\n\n"
+        for depth, _parent, task in walk(note.get("tasks", [])):
+            mark = "-" if task.get("cancelled") else "x" if task.get("checked") else " "
+            yield f"{'  ' * depth}- [{mark}] {task.get('text', '')}\n"
+        yield "\n"
+
+    def tail(self):
+        return ()
+
+
+class OpmlExporter:
+    """OPML 2.0: заметка — outline верхнего уровня, задачи — вложенные outline."""
+
+    name = "OPML"
+    extension = ".opml"
+
+    def head(self):
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n<opml version="2.0">\n'
+        yield "  <head><title>Seshat Sticky Note</title></head>\n  <body>\n"
+
+    def note(self, note_id, note):
+        yield f"    <outline text={quoteattr(_title(note))} _note_id={quoteattr(note_id)}>\n"
+        opened = []  # Глубины открытых outline, у которых есть дети
+        for depth, _parent, task in walk(note.get("tasks", [])):
+            while opened and opened[-1] >= depth:
+                yield f"{'  ' * (opened.pop() + 3)}</outline>\n"
+            attrs = f"text={quoteattr(task.get('text', ''))}"
+            if task.get("checked"):
+                attrs += ' _complete="true"'
+                if task.get("done_date"):
+                    attrs += f" _done_date={quoteattr(task['done_date'])}"
+            if task.get("cancelled"):
+                attrs += ' _cancelled="true"'
+            indent = "  " * (depth + 3)
+            if task.get("children"):
+                yield f"{indent}<outline {attrs}>\n"
+                opened.append(depth)
+            else:
+                yield f"{indent}<outline {attrs}/>\n"
+        while opened:
+            yield f"{'  ' * (opened.pop() + 3)}</outline>\n"
+        yield "    </outline>\n"
+
+    def tail(self):
+        yield "  </body>\n</opml>\n"
+
+
+class CsvExporter:
+    """Строка на задачу; дерево восстанавливается по parent_id (или depth)."""
+
+    name = "CSV"
+    extension = ".csv"
+    newline = ""  # csv сам пишет \r\n
+    COLUMNS = ("note_id", "note_title", "task_id", "parent_id", "depth", "text", "checked", "cancelled", "done_date")
+
+    def __init__(self):
+        self._buffer = _LineBuffer()
+        self._writer = csv.writer(self._buffer)
+
+    def _row(self, row):
+        self._writer.writerow(row)
+        return self._buffer.take()
+
+    def head(self):
+        yield self._row(self.COLUMNS)
+
+    def note(self, note_id, note):
+        title = _title(note)
+        for depth, parent_id, task in walk(note.get("tasks", [])):
+            yield self._row(
+                (
+                    note_id,
+                    title,
+                    task.get("id", ""),
+                    parent_id or "",
+                    depth,
+                    task.get("text", ""),
+                    int(bool(task.get("checked"))),
+                    int(bool(task.get("cancelled"))),
+                    task.get("done_date") or "",
+                )
+            )
+
+    def tail(self):
+        return ()
+
+
+class _LineBuffer:
+    """Приемник для csv.writer: отдает записанную строку и очищается."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def take(self):
+        text = "".join(self.parts)
+        self.parts.clear()
+        return text
+
+
+def _ical_text(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ical_line(line):
+    """Строка iCalendar с переносом по 75 октетов (RFC 5545, 3.1)."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:  # Не режем символ UTF-8
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start, limit = end, 74  # Продолжение начинается с пробела
+    return "\r\n ".join(parts) + "\r\n"
+
+
+class ICalExporter:
+    """VCALENDAR с VTODO на каждую задачу; done_date -> COMPLETED, вложенность -> RELATED-TO."""
+
+    name = "iCalendar"
+    extension = ".ics"
+    newline = ""
+
+    def __init__(self):
+        self.stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    def head(self):
+        yield _ical_line("BEGIN:VCALENDAR")
+        yield _ical_line("VERSION:2.0")
+        yield _ical_line("PRODID:-//Seshat Sticky Note//Export//EN")
+
+    def note(self, note_id, note):
+        category = _ical_text(_title(note))
+        for index, (_depth, parent_id, task) in enumerate(walk(note.get("tasks", []))):
+            uid = task.get("id") or f"{note_id}-{index}"
+            yield _ical_line("BEGIN:VTODO")
+            yield _ical_line(f"UID:{uid}@seshat")
+            yield _ical_line(f"DTSTAMP:{self.stamp}")
+            yield _ical_line(f"SUMMARY:{_ical_text(task.get('text', ''))}")
+            yield _ical_line(f"CATEGORIES:{category}")
+            if task.get("cancelled"):
+                yield _ical_line("STATUS:CANCELLED")
+            elif task.get("checked"):
+                yield _ical_line("STATUS:COMPLETED")
+                done = parse_done_date(task.get("done_date"))
+                if done is not None:
+                    # COMPLETED — всегда UTC; done_date записан в локальном времени
+                    yield _ical_line(f"COMPLETED:{done.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}")
+            else:
+                yield _ical_line("STATUS:NEEDS-ACTION")
+            if parent_id:
+                yield _ical_line(f"RELATED-TO;RELTYPE=PARENT:{parent_id}@seshat")
+            yield _ical_line("END:VTODO")
+
+    def tail(self):
+        yield _ical_line("END:VCALENDAR")
+
+
+EXPORTERS = {
+    "md": MarkdownExporter,
+    "opml": OpmlExporter,
+    "csv": CsvExporter,
+    "ics": ICalExporter,
+}
+
+
+def format_for_path(path, default="md"):
+    ext = os.path.splitext(path)[1].lower()
+    for name, exporter in EXPORTERS.items():
+        if exporter.extension == ext:
+            return name
+    return default
+
+
+# --- ЗАПИСЬ ---
+
+def write_export(notes, out_path, fmt, total=None, progress=None):
+    """
+    Пишет пары (id, заметка) из итератора в файл формата fmt по мере чтения.
+    Возвращает число заметок. progress(done, total) — после каждой заметки.
+    """
+    exporter = EXPORTERS[fmt]()
+    count = 0
+    with atomic_open(out_path, newline=getattr(exporter, "newline", None)) as f:
+        f.writelines(exporter.head())
+        for note_id, note in notes:
+            f.writelines(exporter.note(note_id, note))
+            count += 1
+            if progress:
+                progress(count, total or count)
+        f.writelines(exporter.tail())
+    return count
+
+
+def iter_db_notes(db_path, note_ids=None, progress=None):
+    """Заметки базы (JSON или снимок) по одной; progress(done, total) — по ходу чтения."""
+    if is_snapshot(db_path):
+        reader = SnapshotReader(db_path)
+        if note_ids is not None:  # По индексу: распаковываются только нужные заметки
+            wanted = [note_id for note_id in reader.entries if note_id in note_ids]
+            for done, note_id in enumerate(wanted, 1):
+                yield note_id, reader.read_note(note_id)
+                if progress:
+                    progress(done, len(wanted))
+            return
+        total = len(reader.entries)
+        for done, (note_id, note) in enumerate(reader.iter_notes(), 1):
+            yield note_id, note
+            if progress:
+                progress(done, total)
+        return
+    for note_id, note in NoteStreamReader(db_path, progress=progress).iter_notes():
+        if note_ids is None or note_id in note_ids:
+            yield note_id, note
+
+
+def export_db(db_path, out_path, fmt=None, note_ids=None, progress=None):
+    """Экспорт всей базы (или заметок из note_ids) потоково. Возвращает число заметок."""
+    fmt = fmt or format_for_path(out_path)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Под блокировкой только копирование файла, а не разбор и запись экспорта
+        source = os.path.join(tmp, os.path.basename(db_path))
+        with db_lock(db_path):
+            shutil.copyfile(db_path, source)
+        return write_export(iter_db_notes(source, note_ids, progress), out_path, fmt)
+
+
+class ExportWorker(QThread):
+    """export_db в фоне с прогрессом 0..1000 (как StreamWorker в db_merger_v3)."""
+
+    progress = pyqtSignal(int)
+    finished_ok = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_path, out_path, fmt=None):
+        super().__init__()
+        self.db_path = db_path
+        self.out_path = out_path
+        self.fmt = fmt
+
+    def _report(self, done, total):
+        self.progress.emit(int(done * 1000 / total) if total else 1000)
+
+    def run(self):
+        try:
+            count = export_db(self.db_path, self.out_path, self.fmt, progress=self._report)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished_ok.emit(count)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Экспорт заметок Seshat")
+    parser.add_argument("format", choices=sorted(EXPORTERS))
+    parser.add_argument("src", nargs="?", help="база (по умолчанию seshat_db.snap, если есть, иначе seshat_db.json)")
+    parser.add_argument("-o", "--output", help="по умолчанию seshat_export.<формат>")
+    parser.add_argument("--note", action="append", dest="notes", help="id заметки (можно несколько раз)")
+    args = parser.parse_args(argv)
+
+    src = args.src or ("seshat_db.snap" if os.path.exists("seshat_db.snap") else "seshat_db.json")
+    out = args.output or "seshat_export" + EXPORTERS[args.format].extension
+    count = export_db(src, out, args.format, set(args.notes) if args.notes else None)
+    print(f"Exported {count} notes to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
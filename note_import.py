@@ -0,0 +1,377 @@
+# note_import.py
+"""
+Потоковый импорт задач из внешних форматов: OPML, Markdown, todo.txt и CSV.
+
+Импортер — генератор: читает файл по частям (OPML — через iterparse, остальные
+построчно) и отдает заметки (заголовок, задачи) по мере готовности. Задачи
+приходят в формате базы (text, checked, done_date, cancelled, children) с новыми id.
+Прогресс считается по прочитанным байтам. Новый формат — функция
+reader(f, title, report) в IMPORTERS.
+
+    python note_import.py outline.opml                   # новые заметки в seshat_db.json
+    python note_import.py todo.txt --into <note id>      # задачи в существующую заметку
+"""
+import argparse
+import csv
+import os
+import re
+import uuid
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from db_stream import rewrite_db
+from note_meta import TIME_FORMAT, compute_summary
+from outline_paste import OutlineBuilder, is_list_item, now_stamp, settle_parents
+from task_merge import new_task_id
+
+_HEADING = re.compile(r"#{1,6}\s+")
+_TRUE = frozenset(("1", "true", "yes", "y", "x", "done", "complete", "completed", "checked"))
+_CANCELLED = frozenset(("cancelled", "canceled"))
+
+# Колонки CSV: поле задачи -> допустимые заголовки (без учета регистра)
+CSV_COLUMNS = {
+    "text": ("text", "task", "content", "summary", "name"),
+    "checked": ("checked", "done", "completed", "complete", "status"),
+    "cancelled": ("cancelled", "canceled"),
+    "done_date": ("done_date", "completed_date", "completion_date", "completed_at"),
+    "id": ("task_id", "id"),
+    "parent": ("parent_id", "parent"),
+    "depth": ("depth", "level", "indent"),
+    "note_id": ("note_id",),
+    "note": ("note_title", "note", "list", "project"),
+}
+
+
+class ImportFormatError(ValueError):
+    """Файл не удалось разобрать как выбранный формат."""
+
+
+class _Progress:
+    """Сообщает progress(done, total) по позиции в файле, не чаще раза на промилле."""
+
+    def __init__(self, f, progress):
+        self.f = f
+        self.progress = progress
+        self.total = os.fstat(f.fileno()).st_size
+        self._last = -1
+
+    def __call__(self):
+        if not self.progress:
+            return
+        done = self.f.tell()
+        step = done * 1000 // self.total if self.total else 1000
+        if step != self._last:
+            self._last = step
+            self.progress(done, self.total)
+
+
+def _lines(f, report):
+    for number, raw in enumerate(f):
+        yield raw.decode("utf-8-sig" if number == 0 else "utf-8", errors="replace")
+        if number % 256 == 0:
+            report()
+    report()
+
+
+def _task(text, checked, cancelled, done_date, now):
+    return {
+        "id": new_task_id(),
+        "text": text,
+        "checked": checked,
+        "done_date": (done_date or now) if checked else None,
+        "cancelled": cancelled,
+        "children": [],
+    }
+
+
+# --- ФОРМАТЫ ---
+
+def read_markdown(f, title, report):
+    """Пункты списков — задачи, заголовки "#" в начале строки начинают новую заметку."""
+    builder = OutlineBuilder()
+    for line in _lines(f, report):
+        heading = _HEADING.match(line)
+        if heading:
+            if builder.roots:
+                yield title, builder.finish()
+                builder = OutlineBuilder(builder.now)
+            title = line[heading.end():].strip() or title
+        elif is_list_item(line):
+            builder.feed(line)
+    if builder.roots:
+        yield title, builder.finish()
+
+
+def read_todo_txt(f, title, report):
+    """Строка — задача; "x [дата выполнения] [дата создания]" — выполнена."""
+    builder = OutlineBuilder()
+    for line in _lines(f, report):
+        builder.feed(line.strip())  # В todo.txt нет вложенности
+    if builder.roots:
+        yield title, builder.finish()
+
+
+def _opml_task(attrib, now):
+    status = attrib.get("_status", "").lower()
+    return _task(
+        attrib.get("text") or attrib.get("title") or "",
+        attrib.get("_complete", "").lower() == "true" or status in _TRUE,
+        attrib.get("_cancelled", "").lower() == "true" or status in _CANCELLED,
+        attrib.get("_done_date"),
+        now,
+    )
+
+
+def read_opml(f, title, report):
+    """
+    outline -> задача. Верхние outline с _note_id (экспорт note_export) — отдельные
+    заметки, остальное — одна заметка с заголовком из <head><title>.
+    Разобранные элементы сразу очищаются, дерево XML в памяти не копится.
+    """
+    now = now_stamp()
+    roots = []
+    stack = []  # (список детей, это заметка?) для открытых outline
+    body = None
+    note_title = None
+    try:
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if elem.tag == "body":
+                    body = elem
+                elif elem.tag == "outline":
+                    if not stack and "_note_id" in elem.attrib:
+                        note_title = elem.get("text") or title
+                        stack.append(([], True))
+                    else:
+                        task = _opml_task(elem.attrib, now)
+                        (stack[-1][0] if stack else roots).append(task)
+                        stack.append((task["children"], False))
+                continue
+
+            if elem.tag == "title" and body is None:
+                title = (elem.text or "").strip() or title
+            elif elem.tag == "outline":
+                tasks, is_note = stack.pop()
+                if is_note:
+                    settle_parents(tasks, now)
+                    yield note_title, tasks
+                elem.clear()
+                if not stack and body is not None:
+                    body.clear()  # Отработанные элементы верхнего уровня
+                report()
+    except ET.ParseError as e:
+        raise ImportFormatError(f"OPML: {e}") from e
+    report()
+    if roots:
+        settle_parents(roots, now)
+        yield title, roots
+
+
+def _csv_columns(header):
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    if "text" not in columns:
+        raise ImportFormatError("CSV: нет колонки с текстом задачи (text / task / content)")
+    return columns
+
+
+def read_csv(f, title, report):
+    """
+    Строка — задача. Вложенность — по parent_id или depth, заметки — по note_id /
+    note_title (строки одной заметки идут подряд, как в экспорте note_export).
+    """
+    reader = csv.reader(_lines(f, report))
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = _csv_columns(header)
+    now = now_stamp()
+
+    def get(row, field):
+        index = columns.get(field)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    note_key, note_title = None, title
+    builder = None
+    by_id = {}
+    for row in reader:
+        if not any(row):
+            continue
+        key = (get(row, "note_id"), get(row, "note"))
+        if builder is None or key != note_key:
+            if builder is not None and builder.roots:
+                yield note_title, builder.finish()
+            note_key, note_title = key, key[1] or title
+            builder = OutlineBuilder(now)
+            by_id = {}
+
+        status = get(row, "checked").lower()
+        task = _task(
+            get(row, "text"),
+            status in _TRUE,
+            status in _CANCELLED or get(row, "cancelled").lower() in _TRUE,
+            get(row, "done_date") or None,
+            now,
+        )
+        parent = by_id.get(get(row, "parent"))
+        if parent is not None:
+            parent["children"].append(task)
+        else:
+            depth = get(row, "depth")
+            builder.add(task, int(depth) if depth.isdigit() else 0)
+        source_id = get(row, "id")
+        if source_id:
+            by_id[source_id] = task
+    if builder is not None and builder.roots:
+        yield note_title, builder.finish()
+
+
+IMPORTERS = {
+    "opml": read_opml,
+    "md": read_markdown,
+    "txt": read_todo_txt,
+    "csv": read_csv,
+}
+EXTENSIONS = {".opml": "opml", ".xml": "opml", ".md": "md", ".markdown": "md", ".txt": "txt", ".csv": "csv"}
+
+
+def format_for_path(path):
+    fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ImportFormatError(f"Неизвестный формат файла: {os.path.basename(path)}")
+    return fmt
+
+
+def iter_import(path, fmt=None, progress=None):
+    """(заголовок, задачи) из файла по мере чтения; progress(done, total) — в байтах."""
+    fmt = fmt or format_for_path(path)
+    title = os.path.splitext(os.path.basename(path))[0]
+    with open(path, "rb") as f:
+        yield from IMPORTERS[fmt](f, title, _Progress(f, progress))
+
+
+def as_tasks(notes):
+    """Задачи для вставки в одну заметку: одна заметка — как есть, несколько — по задаче на заметку."""
+    if len(notes) == 1:
+        return notes[0][1]
+    now = now_stamp()
+    grouped = []
+    for title, tasks in notes:
+        task = _task(title, False, False, None, now)
+        task["children"] = tasks
+        grouped.append(task)
+    settle_parents(grouped, now)
+    return grouped
+
+
+def make_note(title, tasks):
+    """Новая заметка базы с готовыми задачами."""
+    note = {
+        "title": title,
+        "tasks": tasks,
+        "start_time_str": datetime.now().strftime(TIME_FORMAT),
+        "finish_time_str": None,
+    }
+    note["summary"] = compute_summary(note)
+    return note
+
+
+def import_into_db(db_path, src_path, fmt=None, target_id=None, progress=None):
+    """
+    Импорт файла в базу одной потоковой перезаписью (под db_lock).
+    target_id=None — каждая заметка файла становится новой заметкой (пишутся по мере
+    разбора); иначе все задачи дописываются в заметку target_id.
+    Возвращает {"notes": ..., "tasks": ..., "found": заметка target_id найдена}.
+    """
+    stats = {"notes": 0, "tasks": 0, "found": target_id is None}
+
+    def half(offset):
+        def report(done, total):
+            if progress:
+                progress(offset * total + done // 2, total)
+        return report
+
+    def count(tasks):
+        stack, total = list(tasks), 0
+        while stack:
+            total += 1
+            stack.extend(stack.pop()["children"])
+        return total
+
+    if target_id is None:
+        def new_notes():
+            for title, tasks in iter_import(src_path, fmt, half(0)):
+                stats["notes"] += 1
+                stats["tasks"] += count(tasks)
+                yield str(uuid.uuid4()), make_note(title, tasks)
+
+        rewrite_db(db_path, extra_notes=new_notes())
+        return stats
+
+    notes = list(iter_import(src_path, fmt, half(0)))
+    tasks = as_tasks(notes) if notes else []
+    stats["notes"], stats["tasks"] = len(notes), count(tasks)
+
+    def append_to_target(note_id, note):
+        if note_id == target_id:
+            note["tasks"] = note.get("tasks", []) + tasks
+            note["summary"] = compute_summary(note)
+            stats["found"] = True
+        return note
+
+    if not tasks:
+        stats["found"] = True  # Нечего дописывать — базу не трогаем
+        return stats
+    rewrite_db(db_path, append_to_target, progress=half(1))
+    return stats
+
+
+class ImportWorker(QThread):
+    """Разбор файла в фоне с прогрессом 0..1000; результат — список (заголовок, задачи)."""
+
+    progress = pyqtSignal(int)
+    finished_ok = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, fmt=None):
+        super().__init__()
+        self.path = path
+        self.fmt = fmt
+
+    def _report(self, done, total):
+        self.progress.emit(int(done * 1000 / total) if total else 1000)
+
+    def run(self):
+        try:
+            notes = list(iter_import(self.path, self.fmt, progress=self._report))
+        except Exception as e:  # И csv.Error и прочее от разбора: ошибка в потоке не должна ронять стикер
+            self.failed.emit(str(e))
+        else:
+            self.finished_ok.emit(notes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Импорт задач в базу Seshat")
+    parser.add_argument("src", help="файл .opml / .md / .txt (todo.txt) / .csv")
+    parser.add_argument("db", nargs="?", default="seshat_db.json")
+    parser.add_argument("--format", choices=sorted(IMPORTERS), help="по умолчанию — по расширению")
+    parser.add_argument("--into", metavar="NOTE_ID", help="дописать задачи в существующую заметку")
+    args = parser.parse_args(argv)
+
+    stats = import_into_db(args.db, args.src, args.format, args.into)
+    if not stats["found"]:
+        print(f"Note {args.into} not found in {args.db}")
+        return 1
+    print(f"Imported {stats['tasks']} tasks from {stats['notes']} notes into {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
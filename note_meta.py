@@ -0,0 +1,151 @@
+# note_meta.py
+"""
+Сводки заметок (счетчики задач, прогресс, даты) и легкие метаданные для списков.
+
+Сводка хранится в самой заметке под ключом "summary" и пересчитывается при
+каждом сохранении заметки, поэтому архив, меню, трей и карта читают готовые
+числа и не обходят деревья задач. Если сводки нет или она старой версии
+(старая база, импорт, merge), она считается лениво при первом обращении.
+
+Пересборка сводок существующей базы (потоково, по одной заметке):
+    python note_meta.py --rebuild seshat_db.json
+"""
+import argparse
+from datetime import datetime
+
+SUMMARY_VERSION = 1
+TIME_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+
+def _parse_time(note, key):
+    """Время заметки в секундах epoch (строка dd.MM.yyyy HH:mm:ss или старое числовое поле)."""
+    text = note.get(f"{key}_str")
+    if text:
+        try:
+            return datetime.strptime(text, TIME_FORMAT).timestamp()
+        except ValueError:
+            return None
+    value = note.get(key)
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def compute_summary(note):
+    """Сводка одной заметки. Прогресс считается так же, как TreeProgress (по корням и их детям)."""
+    tasks = note.get("tasks", [])
+
+    total = done = cancelled = 0
+    stack = list(tasks)
+    while stack:
+        task = stack.pop()
+        total += 1
+        if task.get("cancelled", False):
+            cancelled += 1
+        elif task.get("checked", False):
+            done += 1
+        stack.extend(task.get("children", []))
+
+    completed = 0.0
+    for task in tasks:
+        if task.get("cancelled", False):
+            continue
+        children = task.get("children", [])
+        if children:
+            c_done = sum(1 for c in children if not c.get("cancelled", False) and c.get("checked", False))
+            completed += c_done / len(children)
+        elif task.get("checked", False):
+            completed += 1.0
+
+    return {
+        "v": SUMMARY_VERSION,
+        "total": total,
+        "done": done,
+        "cancelled": cancelled,
+        "open": total - done - cancelled,
+        "progress": int(completed / len(tasks) * 100) if tasks else 0,
+        "start": _parse_time(note, "start_time"),
+        "finish": _parse_time(note, "finish_time"),
+    }
+
+
+def is_complete(tasks):
+    """Прогресс 100% по правилам TreeProgress: выполненные и отмененные покрывают все корни."""
+    if not tasks:
+        return False
+    completed = cancelled = 0.0
+    for task in tasks:
+        if task.get("cancelled", False):
+            cancelled += 1.0
+            continue
+        children = task.get("children", [])
+        if children:
+            completed += sum(1 for c in children if not c.get("cancelled", False) and c.get("checked", False)) / len(children)
+            cancelled += sum(1 for c in children if c.get("cancelled", False)) / len(children)
+        elif task.get("checked", False):
+            completed += 1.0
+    return completed + cancelled >= len(tasks) - 0.001
+
+
+def compute_meta(note_id, note):
+    """Метаданные для списков: id, заголовок и поля сводки."""
+    return {"id": note_id, "title": note.get("title", "Untitled"), **compute_summary(note)}
+
+
+class NoteMetaIndex:
+    def __init__(self, data_manager):
+        self.dm = data_manager
+
+    def summary(self, note_id):
+        """Сводка заметки (при отсутствии/устаревании считается и сохраняется в заметку)."""
+        note = self.dm.all_notes[note_id]
+        summary = note.get("summary")
+        if not isinstance(summary, dict) or summary.get("v") != SUMMARY_VERSION:
+            summary = note["summary"] = compute_summary(note)
+        return summary
+
+    def get(self, note_id):
+        # Ленивое хранилище (note_store) отдает заголовок и сводку из индекса, не декодируя заметку
+        peek = getattr(self.dm.all_notes, "peek_meta", None)
+        stored = peek(note_id) if peek else None
+        if stored and stored.get("v") == SUMMARY_VERSION:
+            return {"id": note_id, **stored}
+        note = self.dm.all_notes[note_id]
+        return {"id": note_id, "title": note.get("title", "Untitled"), **self.summary(note_id)}
+
+    def all(self):
+        """Метаданные всех заметок в порядке базы."""
+        return [self.get(note_id) for note_id in self.dm.all_notes]
+
+    def update(self, note_id):
+        """Пересчитывает сводку заметки (вызывается при сохранении её задач)."""
+        note = self.dm.all_notes.get(note_id)
+        if note is not None:
+            note["summary"] = compute_summary(note)
+
+
+def rebuild_summaries(db_path, progress=None):
+    """Пересчитывает сводки всех заметок базы, не загружая её целиком. Возвращает число заметок."""
+    from db_stream import rewrite_db
+
+    def with_summary(note_id, note):
+        note["summary"] = compute_summary(note)
+        return note
+
+    return rewrite_db(db_path, with_summary, progress=progress)["kept"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сводки заметок Seshat")
+    parser.add_argument("db", nargs="?", default="seshat_db.json", help="файл базы (по умолчанию seshat_db.json)")
+    parser.add_argument("--rebuild", action="store_true", help="пересчитать сводки всех заметок")
+    args = parser.parse_args(argv)
+
+    if not args.rebuild:
+        parser.print_help()
+        return 1
+    count = rebuild_summaries(args.db)
+    print(f"Rebuilt summaries for {count} notes in {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+# note_store.py
+"""
+Ленивое хранилище заметок поверх снимка базы (db_snapshot), открытого через mmap.
+
+DataManager.all_notes становится LazyNotes: словарь по интерфейсу, но заметка
+декодируется только при обращении к ней (switch_note, карта, сохранение
+текущей). Списки (архив, дашборд, меню) читают заголовок и сводку из индекса
+снимка через peek_meta(). При сохранении неизмененные заметки копируются
+сжатыми блоками прямо из mmap, а после записи из памяти выгружаются все
+заметки, кроме текущей, — память процесса растет с размером текущей заметки,
+а не всего архива.
+"""
+import mmap
+from collections.abc import MutableMapping
+
+from db_snapshot import SnapshotReader, SnapshotWriter
+
+
+class LazyNotes(MutableMapping):
+    def __init__(self, path, on_load=None):
+        self.path = path
+        self.on_load = on_load  # on_load(note_id, note) — донастройка только что декодированной заметки
+        self.meta = {}
+        self.codec = "zlib"
+        self._keys = {}  # Упорядоченное множество id (порядок базы)
+        self._loaded = {}  # id -> заметка: декодированные, новые и измененные
+        self._reader = None
+        self._file = None
+        self._mm = None
+        self.attach(path)
+        self._keys = dict.fromkeys(self._reader.ids())
+
+    # --- mmap ---
+    def attach(self, path):
+        """
+        (Пере)открывает снимок; состав заметок (ключи) и загруженные заметки не меняются.
+        Если новый файл не открылся, остается прежний (из него еще можно записать базу).
+        """
+        file = open(path, "rb")
+        try:
+            mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                reader = SnapshotReader.from_bytes(mm)
+            except Exception:
+                mm.close()
+                raise
+        except Exception:
+            file.close()
+            raise
+        self.close()
+        self.path = path
+        self._file, self._mm, self._reader = file, mm, reader
+        self.meta = reader.meta
+        self.codec = reader.codec
+
+    def close(self):
+        """Освобождает mmap (на Windows отображенный файл нельзя заменить через os.replace)."""
+        if self._mm is not None:
+            self._reader = None
+            self._mm.close()
+            self._file.close()
+            self._mm = self._file = None
+
+    # --- Mapping API ---
+    def __getitem__(self, note_id):
+        note = self._loaded.get(note_id)
+        if note is None:
+            if note_id not in self._keys:
+                raise KeyError(note_id)
+            note = self._loaded[note_id] = self._decode(note_id)
+        return note
+
+    def __setitem__(self, note_id, note):
+        self._keys.setdefault(note_id, None)
+        self._loaded[note_id] = note
+
+    def __delitem__(self, note_id):
+        del self._keys[note_id]
+        self._loaded.pop(note_id, None)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, note_id):
+        return note_id in self._keys
+
+    def clear(self):
+        self._keys.clear()
+        self._loaded.clear()
+
+    def items(self):
+        """
+        Обход всех заметок без кэширования: незагруженные декодируются и сразу
+        отпускаются. Только для чтения (поиск, экспорт) — правки таких копий теряются.
+        """
+        for note_id in list(self._keys):
+            note = self._loaded.get(note_id)
+            yield note_id, note if note is not None else self._decode(note_id)
+
+    def values(self):
+        for _note_id, note in self.items():
+            yield note
+
+    def _decode(self, note_id):
+        note = self._reader.read_note(note_id)
+        note.setdefault("tasks", [])
+        if self.on_load:
+            self.on_load(note_id, note)
+        return note
+
+    # --- Без декодирования ---
+    def is_loaded(self, note_id):
+        return note_id in self._loaded
+
+    def loaded_count(self):
+        return len(self._loaded)
+
+    def peek_meta(self, note_id):
+        """Заголовок и сводка из индекса снимка; None, если заметка загружена (данные в памяти свежее)."""
+        if note_id in self._loaded or self._reader is None:
+            return None
+        return self._reader.note_meta.get(note_id)
+
+    # --- Внешние изменения файла (db_watcher) ---
+    def disk_checksums(self):
+        """crc32 заметок из индекса открытого снимка."""
+        return {note_id: entry[2] for note_id, entry in self._reader.entries.items()}
+
+    def read_disk(self, note_id):
+        """Версия заметки из файла (без кэширования, даже если в памяти своя)."""
+        return self._decode(note_id)
+
+    def adopt(self, note_id):
+        """Заметка появилась или изменилась на диске: берем файловую версию при следующем обращении."""
+        self._keys.setdefault(note_id, None)
+        self._loaded.pop(note_id, None)
+
+    # --- Запись ---
+    def save(self, path, keep=(), **meta):
+        """
+        Пишет снимок: загруженные заметки сериализуются, остальные копируются блоками
+        из mmap. Затем файл переоткрывается и выгружаются все заметки, кроме keep.
+        """
+        writer = SnapshotWriter(path, codec=self.codec, **meta)
+        try:
+            with writer:
+                for note_id in self._keys:
+                    note = self._loaded.get(note_id)
+                    if note is not None:
+                        writer.write_note(note_id, note)
+                    else:
+                        crc = self._reader.entries[note_id][2]
+                        writer.write_blob(note_id, self._reader.read_blob(note_id), crc, self._reader.note_meta.get(note_id))
+                self.close()  # До os.replace в atomic_open
+        finally:
+            # Новый файл после успеха или прежний, если запись не удалась
+            self.attach(path)
+
+        # Всё записано — в памяти остаются только нужные заметки
+        for note_id in list(self._loaded):
+            if note_id not in keep:
+                del self._loaded[note_id]
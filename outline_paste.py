@@ -0,0 +1,160 @@
+# outline_paste.py
+"""
+Разбор многострочной вставки в дерево задач.
+
+Понимает:
+  * отступы (пробелы или табы) — вложенность;
+  * Markdown-списки: "-", "*", "+", "1." и флажки "[ ]", "[x]", "[-]" (зачеркнута);
+  * todo.txt: "x 2024-05-01 2024-04-30 текст" — выполнена, даты не попадают в текст.
+
+Разбор идет в OutlineWorker (вне GUI-потока), в дерево результат вставляет
+TreeLogic одной операцией: одно сохранение и одна запись истории.
+"""
+import re
+from datetime import datetime
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from task_merge import new_task_id
+
+TAB_WIDTH = 4
+
+_BULLET = re.compile(r"(?:[-*+]|\d+[.)])\s+")
+_CHECKBOX = re.compile(r"\[([ xX\-~])\]\s*")
+_HEADING = re.compile(r"#{1,6}\s+")
+_TODO_DONE = re.compile(r"x\s+(?:(\d{4})-(\d{2})-(\d{2})\s+)?(?:\d{4}-\d{2}-\d{2}\s+)?")
+_TODO_CREATED = re.compile(r"((?:\([A-Z]\)\s+)?)\d{4}-\d{2}-\d{2}\s+")
+
+
+def is_outline(text):
+    """Вставка из нескольких непустых строк — это список задач, а не текст одной задачи."""
+    lines = 0
+    for line in text.splitlines():
+        if line.strip():
+            lines += 1
+            if lines > 1:
+                return True
+    return False
+
+
+def _indent(line):
+    width = 0
+    for char in line:
+        if char == " ":
+            width += 1
+        elif char == "\t":
+            width += TAB_WIDTH - width % TAB_WIDTH
+        else:
+            break
+    return width
+
+
+def parse_line(line, now):
+    """Задача одной строки (без детей, с новым id) или None для пустой строки."""
+    text = line.strip()
+    if not text:
+        return None
+    checked = cancelled = False
+    done_date = None
+
+    bullet = _BULLET.match(text) or _HEADING.match(text)
+    if bullet:
+        text = text[bullet.end():]
+        box = _CHECKBOX.match(text)
+        if box:
+            text = text[box.end():]
+            checked = box.group(1) in "xX"
+            cancelled = box.group(1) in "-~"
+    else:
+        done = _TODO_DONE.match(text)
+        if done and done.end() < len(text):
+            text = text[done.end():]
+            checked = True
+            if done.group(1):
+                year, month, day = done.groups()
+                done_date = f"{day}.{month}.{year}, 00:00"
+        else:
+            # Дату создания todo.txt убираем, приоритет "(A)" оставляем в тексте
+            text = _TODO_CREATED.sub(r"\1", text, count=1)
+
+    text = text.strip()
+    if not text:
+        return None
+    return {
+        "id": new_task_id(),
+        "text": text,
+        "checked": checked,
+        "done_date": (done_date or now) if checked else None,
+        "cancelled": cancelled,
+        "children": [],
+    }
+
+
+def is_list_item(line):
+    """Строка Markdown-списка ("- ...", "* ...", "1. ...")."""
+    return _BULLET.match(line.lstrip()) is not None
+
+
+def settle_parents(tasks, now):
+    """Родитель выполнен, только когда выполнены все дети (как TreeCore._settle)."""
+    order = []
+    stack = list(tasks)
+    while stack:
+        task = stack.pop()
+        if task["children"]:
+            order.append(task)
+            stack.extend(task["children"])
+    for task in reversed(order):  # Дети раньше родителей
+        checked = all(child["checked"] for child in task["children"])
+        if checked != task["checked"]:
+            task["checked"] = checked
+            task["done_date"] = now if checked else None
+
+
+def now_stamp():
+    """Текущее время в формате done_date."""
+    return datetime.now().strftime("%d.%m.%Y, %H:%M")
+
+
+class OutlineBuilder:
+    """Собирает дерево по строкам (вложенность — по отступу); строки можно подавать по одной."""
+
+    def __init__(self, now=None):
+        self.now = now or now_stamp()
+        self.roots = []
+        self._stack = [(-1, self.roots)]  # (отступ, список детей)
+
+    def feed(self, line):
+        task = parse_line(line, self.now)
+        if task is not None:
+            self.add(task, _indent(line))
+
+    def add(self, task, indent):
+        stack = self._stack
+        while stack[-1][0] >= indent:
+            stack.pop()
+        stack[-1][1].append(task)
+        stack.append((indent, task["children"]))
+
+    def finish(self):
+        settle_parents(self.roots, self.now)
+        return self.roots
+
+
+def parse_outline(text):
+    """Список задач в формате заметки из многострочного текста."""
+    builder = OutlineBuilder()
+    for line in text.splitlines():
+        builder.feed(line)
+    return builder.finish()
+
+
+class OutlineWorker(QThread):
+    parsed = pyqtSignal(object)
+
+    def __init__(self, text):
+        super().__init__()
+        self.text = text
+
+    def run(self):
+        self.parsed.emit(parse_outline(self.text))
@@ -0,0 +1,121 @@
+# perf.py
+"""
+Легковесные тайминги горячих путей.
+
+Выключено по умолчанию: декоратор делает одну проверку флага и вызывает функцию
+напрямую. Включается переменной окружения SESHAT_PERF=1 или HUD'ом (Ctrl+Shift+P).
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        Perf.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Perf:
+    enabled = os.environ.get("SESHAT_PERF") == "1"
+
+    # Кольцевой буфер последних замеров: (имя, начало, длительность, id потока)
+    samples = deque(maxlen=5000)
+    origin = time.perf_counter()
+
+    @staticmethod
+    def span(name):
+        """with Perf.span("name"): ..."""
+        if not Perf.enabled:
+            return _NULL_SPAN
+        return _Span(name)
+
+    @staticmethod
+    def timed(name):
+        """Декоратор для методов: @Perf.timed("data.save_to_disk")"""
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not Perf.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    Perf.record(name, start, time.perf_counter())
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def record(name, start, end):
+        Perf.samples.append((name, start, end - start, threading.get_ident()))
+
+    @staticmethod
+    def clear():
+        Perf.samples.clear()
+
+    @staticmethod
+    def summary():
+        """Агрегаты по последним замерам: {имя: {count, last, avg, max}} в миллисекундах"""
+        stats = {}
+        for name, _, duration, _ in list(Perf.samples):
+            ms = duration * 1000
+            s = stats.get(name)
+            if s is None:
+                stats[name] = {"count": 1, "last": ms, "total": ms, "max": ms}
+            else:
+                s["count"] += 1
+                s["last"] = ms
+                s["total"] += ms
+                if ms > s["max"]:
+                    s["max"] = ms
+        for s in stats.values():
+            s["avg"] = s.pop("total") / s["count"]
+        return stats
+
+    @staticmethod
+    def export_chrome_trace(path):
+        """Пишет буфер в формате Trace Event (chrome://tracing, ui.perfetto.dev)"""
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "cat": name.split(".")[0],
+                "ph": "X",
+                "ts": (start - Perf.origin) * 1_000_000,
+                "dur": duration * 1_000_000,
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, start, duration, tid in list(Perf.samples)
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
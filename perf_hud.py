@@ -0,0 +1,64 @@
+# perf_hud.py
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget
+
+from perf import Perf
+
+
+class PerfHud(QWidget):
+    """Плавающий оверлей с таймингами горячих путей (Ctrl+Shift+P)"""
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowFlags(
+            Qt.WindowType.FramelessWindowHint
+            | Qt.WindowType.WindowStaysOnTopHint
+            | Qt.WindowType.Tool
+        )
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setStyleSheet(
+            "background-color: rgba(20, 20, 20, 220); color: #b0ffb0; border: 1px solid #444; border-radius: 6px;"
+        )
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 6, 8, 6)
+
+        self.label = QLabel()
+        self.label.setFont(QFont("Courier New", 9))
+        self.label.setTextFormat(Qt.TextFormat.PlainText)
+        layout.addWidget(self.label)
+
+        self.status = ""
+
+        # Обновляем текст только пока HUD видим
+        self.timer = QTimer(self)
+        self.timer.setInterval(500)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def set_status(self, text):
+        self.status = text
+        self.refresh()
+
+    def refresh(self):
+        stats = Perf.summary()
+        lines = [f"{'span':<28}{'n':>6}{'last':>9}{'avg':>9}{'max':>9}"]
+        for name in sorted(stats, key=lambda n: -stats[n]["avg"] * stats[n]["count"]):
+            s = stats[name]
+            lines.append(f"{name:<28}{s['count']:>6}{s['last']:>9.2f}{s['avg']:>9.2f}{s['max']:>9.2f}")
+        if len(lines) == 1:
+            lines.append("(no samples yet)")
+        if self.status:
+            lines.append("")
+            lines.append(self.status)
+        self.label.setText("\n".join(lines))
+        self.adjustSize()
@@ -0,0 +1,93 @@
+# search_dialog.py
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (
+    QDialog,
+    QLabel,
+    QLineEdit,
+    QListWidget,
+    QListWidgetItem,
+    QVBoxLayout,
+)
+
+from localization import Loc
+from perf import Perf
+from search_index import TITLE_KEY
+
+
+class SearchDialog(QDialog):
+    """Поиск по всем заметкам: ввод -> мгновенный список -> Enter/двойной клик переходит к задаче."""
+
+    MAX_RESULTS = 100
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mw = parent  # Ссылка на главное окно (StickyNote)
+
+        self.setWindowTitle(Loc.t("search_title", "Search"))
+        self.setMinimumSize(360, 420)
+        self.setStyleSheet("""
+            QDialog { background-color: #1e1e1e; color: #e0e0e0; }
+            QLineEdit { background-color: #252525; border: 1px solid #333; color: #e0e0e0; padding: 6px; font-size: 14px; }
+            QListWidget { background-color: #252525; border: 1px solid #333; color: #e0e0e0; font-size: 13px; }
+            QListWidget::item { padding: 4px; }
+            QListWidget::item:selected { background-color: #7c4dff; color: white; }
+            QLabel { color: #757575; font-size: 11px; }
+        """)
+
+        layout = QVBoxLayout(self)
+
+        self.input = QLineEdit()
+        self.input.setPlaceholderText(Loc.t("search_hint", "Search notes and tasks..."))
+        self.input.textChanged.connect(self.run_query)
+        self.input.returnPressed.connect(self.open_selected)
+        layout.addWidget(self.input)
+
+        self.list_widget = QListWidget()
+        self.list_widget.itemActivated.connect(self.open_selected)
+        layout.addWidget(self.list_widget)
+
+        self.status = QLabel("")
+        layout.addWidget(self.status)
+
+    def showEvent(self, e):
+        super().showEvent(e)
+        self.input.setFocus()
+        self.input.selectAll()
+
+    def keyPressEvent(self, e):
+        # Стрелки из поля ввода листают результаты
+        if e.key() in (Qt.Key.Key_Down, Qt.Key.Key_Up) and self.list_widget.count():
+            row = self.list_widget.currentRow() + (1 if e.key() == Qt.Key.Key_Down else -1)
+            self.list_widget.setCurrentRow(max(0, min(row, self.list_widget.count() - 1)))
+            return
+        super().keyPressEvent(e)
+
+    @Perf.timed("search.query")
+    def run_query(self, text):
+        self.list_widget.clear()
+        results = self.mw.data.search.search(text, limit=self.MAX_RESULTS)
+
+        meta = self.mw.data.meta
+        for note_id, doc_key, _score in results:
+            note_title = meta.get(note_id)["title"]
+            if doc_key == TITLE_KEY:
+                display = f"🗂 {note_title}"
+            else:
+                display = f"{self.mw.data.search.text_of(note_id, doc_key)}   — {note_title}"
+            item = QListWidgetItem(display)
+            item.setData(Qt.ItemDataRole.UserRole, (note_id, doc_key))
+            self.list_widget.addItem(item)
+
+        if results:
+            self.list_widget.setCurrentRow(0)
+            self.status.setText(str(len(results)))
+        else:
+            self.status.setText(Loc.t("search_empty", "Nothing found") if text.strip() else "")
+
+    def open_selected(self, *_):
+        item = self.list_widget.currentItem()
+        if not item:
+            return
+        note_id, doc_key = item.data(Qt.ItemDataRole.UserRole)
+        self.mw.menu_logic.jump_to(note_id, None if doc_key == TITLE_KEY else doc_key)
+        self.close()
@@ -0,0 +1,310 @@
+# search_index.py
+"""
+Полнотекстовый индекс по заголовкам заметок и текстам задач.
+
+Документ — это заголовок заметки (ключ "") или задача (ключ — её id).
+Индекс обратный: токен -> множество (note_id, doc_key). Обновляется по одной
+заметке при каждом сохранении; между запусками постинги хранятся рядом с базой
+(seshat_db.search.json) вместе с контрольной суммой текстов каждой заметки,
+поэтому при старте перетокенизируются только изменившиеся заметки.
+"""
+import json
+import os
+import re
+import unicodedata
+import zlib
+from bisect import bisect_left
+from itertools import repeat
+
+from data_storage import atomic_open
+
+INDEX_VERSION = 1
+TITLE_KEY = ""
+_EMPTY = frozenset()
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Свертка, чтобы поиск не зависел от способа набора:
+#  - ё/е (русский);
+#  - турецкая латиница без диакритики (ı/i, ş/s, ğ/g, ç/c, ö/o, ü/u) и точка после casefold("İ");
+#  - огласовки, татвиль и варианты алифа/йа (арабский).
+_FOLD = str.maketrans(
+    {
+        "ё": "е",
+        "ı": "i",
+        "ş": "s",
+        "ğ": "g",
+        "ç": "c",
+        "ö": "o",
+        "ü": "u",
+        "\u0307": None,
+        "\u0640": None,
+        "\u0670": None,
+        "أ": "ا",
+        "إ": "ا",
+        "آ": "ا",
+        "ٱ": "ا",
+        "ى": "ي",
+        **{chr(c): None for c in range(0x064B, 0x0660)},
+    }
+)
+
+
+def tokenize(text):
+    """Нормализованные токены строки (с повторами, в порядке появления)."""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKC", text).casefold().translate(_FOLD)
+    return _TOKEN_RE.findall(text)
+
+
+def _note_docs(note):
+    """doc_key -> текст для заголовка и всех задач заметки."""
+    docs = {TITLE_KEY: note.get("title") or ""}
+    stack = list(note.get("tasks", []))
+    while stack:
+        task = stack.pop()
+        tid = task.get("id")
+        if tid:
+            docs[tid] = task.get("text", "")
+        stack.extend(task.get("children", []))
+    return docs
+
+
+def _checksum(docs):
+    return zlib.crc32("\x1e".join(f"{k}\x1f{v}" for k, v in docs.items()).encode("utf-8"))
+
+
+class SearchIndex:
+    def __init__(self, data_manager):
+        self.dm = data_manager
+        self.postings = {}  # token -> {(note_id, doc_key)}
+        self.texts = {}  # note_id -> {doc_key: текст} (для инкрементального обновления и показа)
+        self.checksums = {}  # note_id -> crc32 текстов заметки
+        self.dirty = False
+        self.loaded = False
+
+        self._vocab = []
+        self._vocab_stale = True
+
+    @property
+    def filename(self):
+        return f"{os.path.splitext(self.dm.filename)[0]}.search.json"
+
+    # --- ПОСТРОЕНИЕ ---
+
+    def load(self, defer=False):
+        """
+        Строит индекс по всем заметкам, переиспользуя сохраненные токены неизмененных заметок.
+        defer=True откладывает построение до первого поиска (правки до него догонит сверка crc).
+        """
+        self.loaded = not defer
+        if defer:
+            self.postings.clear()
+            self.texts.clear()
+            self.checksums.clear()
+            self._vocab_stale = True
+            self.dirty = False
+            return
+
+        stored = self._read_stored()
+        self.postings.clear()
+        self.texts.clear()
+        self.checksums.clear()
+        self._vocab_stale = True
+        self.dirty = False
+
+        postings = self.postings
+        for note_id, note in self.dm.all_notes.items():
+            docs = _note_docs(note)
+            crc = _checksum(docs)
+            cached = stored.get(note_id)
+            if cached and cached.get("crc") == crc:
+                local = cached["postings"]
+            else:
+                local = {}
+                for key, text in docs.items():
+                    for tok in set(tokenize(text)):
+                        local.setdefault(tok, []).append(key)
+                self.dirty = True
+
+            # Слияние по токенам, а не по документам: цикл внутри set.update идет на C
+            for tok, keys in local.items():
+                bucket = postings.get(tok)
+                if bucket is None:
+                    bucket = postings[tok] = set()
+                bucket.update(zip(repeat(note_id), keys))
+
+            self.texts[note_id] = docs
+            self.checksums[note_id] = crc
+
+        if self.dirty or stored.keys() - self.dm.all_notes.keys():
+            self.save()
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def update_note(self, note_id):
+        """Инкрементальное обновление одной заметки: трогает только изменившиеся документы."""
+        if not self.loaded:
+            return
+        note = self.dm.all_notes.get(note_id)
+        if note is None:
+            self.remove_note(note_id)
+            return
+
+        docs = _note_docs(note)
+        crc = _checksum(docs)
+        if self.checksums.get(note_id) == crc:
+            return
+
+        old_texts = self.texts.get(note_id, {})
+        for key in old_texts.keys() - docs.keys():
+            self._unlink(note_id, key, set(tokenize(old_texts[key])))
+
+        for key, text in docs.items():
+            old_text = old_texts.get(key)
+            if old_text == text:
+                continue
+            new = set(tokenize(text))
+            if old_text:
+                self._unlink(note_id, key, set(tokenize(old_text)) - new)
+            for tok in new:
+                bucket = self.postings.get(tok)
+                if bucket is None:
+                    bucket = self.postings[tok] = set()
+                    self._vocab_stale = True
+                bucket.add((note_id, key))
+
+        self.texts[note_id] = docs
+        self.checksums[note_id] = crc
+        self.dirty = True
+
+    def remove_note(self, note_id):
+        if not self.loaded:
+            return
+        for key, text in self.texts.pop(note_id, {}).items():
+            self._unlink(note_id, key, set(tokenize(text)))
+        self.checksums.pop(note_id, None)
+        self.dirty = True
+
+    def _unlink(self, note_id, key, tokens):
+        for tok in tokens:
+            bucket = self.postings.get(tok)
+            if bucket is None:
+                continue
+            bucket.discard((note_id, key))
+            if not bucket:
+                del self.postings[tok]
+                self._vocab_stale = True
+
+    # --- ПОИСК ---
+
+    def _expand(self, prefix):
+        """Все токены словаря, начинающиеся с prefix (бинарный поиск по отсортированному словарю)."""
+        if self._vocab_stale:
+            self._vocab = sorted(self.postings)
+            self._vocab_stale = False
+        vocab = self._vocab
+        i = bisect_left(vocab, prefix)
+        while i < len(vocab) and vocab[i].startswith(prefix):
+            yield vocab[i]
+            i += 1
+
+    def search(self, query, limit=50):
+        """
+        Возвращает список (note_id, doc_key, score) по убыванию score.
+        Все слова запроса обязательны; каждое слово ищется как префикс токена,
+        точное совпадение, заголовок и текущая заметка весят больше.
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return []
+        self._ensure_loaded()
+
+        candidates = []
+        for word in words:
+            matched = set()
+            for tok in self._expand(word):
+                matched |= self.postings[tok]
+            if not matched:
+                return []
+            candidates.append(matched)
+
+        # Пересекаем начиная с самого маленького множества
+        candidates.sort(key=len)
+        hits = candidates[0]
+        for other in candidates[1:]:
+            hits = hits & other
+            if not hits:
+                return []
+
+        # Отбор лучших limit документов только операциями над множествами (без цикла по всем hits):
+        # сначала полные совпадения всех слов, внутри — заголовки и текущая заметка
+        exact = hits
+        for word in words:
+            exact = exact & self.postings.get(word, _EMPTY)
+        titles = {(note_id, TITLE_KEY) for note_id in self.texts}
+        current = self.dm.current_note_id
+        current_docs = {(current, key) for key in self.texts.get(current, ())}
+
+        picked = {}
+        for tier in (exact, hits - exact):
+            for group in (tier & titles, tier & current_docs, tier):
+                for doc in group:
+                    if len(picked) >= limit:
+                        break
+                    picked.setdefault(doc, None)
+
+        results = []
+        for note_id, key in picked:
+            score = sum(2 if (note_id, key) in self.postings.get(word, _EMPTY) else 1 for word in words)
+            if key == TITLE_KEY:
+                score += 1
+            if note_id == current:
+                score += 0.5
+            results.append((note_id, key, score))
+
+        results.sort(key=lambda r: -r[2])
+        return results
+
+    def text_of(self, note_id, doc_key):
+        self._ensure_loaded()
+        return self.texts.get(note_id, {}).get(doc_key, "")
+
+    # --- ХРАНЕНИЕ ---
+
+    def _read_stored(self):
+        if not os.path.exists(self.filename):
+            return {}
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Search index ignored: {e}")
+            return {}
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("notes", {})
+
+    def save(self):
+        """Сохраняет постинги рядом с базой (индекс — кэш, поэтому ошибки записи не критичны)."""
+        per_note = {note_id: {} for note_id in self.checksums}
+        for tok, bucket in self.postings.items():
+            for note_id, key in bucket:
+                per_note[note_id].setdefault(tok, []).append(key)
+
+        payload = {
+            "version": INDEX_VERSION,
+            "notes": {
+                note_id: {"crc": self.checksums[note_id], "postings": local}
+                for note_id, local in per_note.items()
+            },
+        }
+        try:
+            with atomic_open(self.filename) as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            self.dirty = False
+        except OSError as e:
+            print(f"Error saving search index: {e}")
@@ -1,5 +1,6 @@
 # style_logic.py
 
+from perf import Perf
 from styles import Styles
 
 
@@ -7,6 +8,7 @@ class StyleLogic:
     def __init__(self, main_window):
         self.mw = main_window
 
+    @Perf.timed("style.apply_dynamic_styles")
     def apply_dynamic_styles(self, accent):
         # Основной фрейм
         self.mw.central_widget.setStyleSheet(Styles.get_main_frame(accent))
@@ -0,0 +1,383 @@
+# task_merge.py
+"""
+Стабильные id задач, отметки изменений и трехсторонний merge баз Seshat.
+
+Каждая задача получает "id" (стабилен при переносах) и "mtime" (секунды epoch,
+время последнего изменения самой задачи). Merge сравнивает "нашу" и "их" версии
+с общим предком по id за O(n) и автоматически разрешает независимые правки:
+переносы, отметки выполнения, зачеркивания, переименования. Настоящие конфликты
+(обе стороны по-разному изменили одно и то же) разрешаются в пользу более свежего
+mtime и попадают в отчет.
+"""
+import gc
+import hashlib
+import time
+import uuid
+from contextlib import contextmanager
+
+from note_meta import compute_summary
+
+# Поля задачи, которые сливаются независимо друг от друга
+MERGE_FIELDS = ("text", "checked", "cancelled")
+
+
+def new_task_id():
+    return uuid.uuid4().hex
+
+
+def _legacy_id(salt, parent_id, index, text):
+    seed = f"{salt}/{parent_id or ''}/{index}/{text}"
+    return hashlib.sha1(seed.encode("utf-8")).hexdigest()[:20]
+
+
+def ensure_task_ids(tasks, salt=""):
+    """
+    Проставляет id задачам, у которых его нет (старые базы).
+    Id детерминирован (заметка + родитель + позиция + текст), поэтому одна и та же
+    старая база на двух машинах получает одинаковые id. Возвращает число новых id.
+    """
+    assigned = 0
+    stack = [(tasks, "")]
+    while stack:
+        siblings, parent_id = stack.pop()
+        for index, task in enumerate(siblings):
+            if not task.get("id"):
+                task["id"] = _legacy_id(salt, parent_id, index, task.get("text", ""))
+                assigned += 1
+            stack.append((task.get("children", []), task["id"]))
+    return assigned
+
+
+def flatten(tasks, salt="", order=None):
+    """
+    id -> запись {parent, pos, text, checked, cancelled, done_date, mtime, task}.
+    Задачам без id проставляет тот же детерминированный id, что и ensure_task_ids.
+    Повтор id получает ключ из исходного id и места задачи (сама задача не меняется).
+    Если передан словарь order, в него пишется parent -> [id детей по порядку].
+    """
+    flat = {}
+    stack = [(tasks, None)]
+    while stack:
+        siblings, parent_id = stack.pop()
+        ids = []
+        for pos, task in enumerate(siblings):
+            get = task.get
+            tid = get("id")
+            text = get("text", "")
+            if not tid:
+                tid = task["id"] = _legacy_id(salt, parent_id, pos, text)
+            elif tid in flat:
+                # Дубликат id (копипаст в JSON) — нужен уникальный, иначе дерево не собрать.
+                # Детерминированный: в base, ours и theirs копия получит один и тот же id
+                tid = _legacy_id(tid, parent_id, pos, text)
+            ids.append(tid)
+            flat[tid] = {
+                "parent": parent_id,
+                "pos": pos,
+                "text": text,
+                "checked": get("checked", False),
+                "cancelled": get("cancelled", False),
+                "done_date": get("done_date"),
+                "mtime": get("mtime", 0),
+                "task": task,  # Исходный словарь: из него берутся прочие ключи (цвет и т.п.)
+            }
+            children = get("children")
+            if children:
+                stack.append((children, tid))
+        if order is not None:
+            order[parent_id] = ids
+    return flat
+
+
+_KNOWN_KEYS = frozenset(("id", "text", "checked", "cancelled", "done_date", "mtime", "children"))
+
+
+def _extra(task):
+    if task.keys() <= _KNOWN_KEYS:
+        return {}  # Обычная задача без дополнительных ключей
+    return {k: v for k, v in task.items() if k not in _KNOWN_KEYS}
+
+
+def _fingerprint(rec):
+    return (rec["parent"], rec["text"], rec["checked"], rec["cancelled"], rec["done_date"])
+
+
+def stamp_modified(old_tasks, new_tasks, now=None):
+    """
+    Переносит mtime из старой версии задач в новую, а изменившимся задачам
+    (текст, статус, родитель) ставит текущее время. Вызывается при каждом сохранении.
+    """
+    now = int(now if now is not None else time.time())
+    old = flatten(old_tasks) if old_tasks else {}
+    stack = [(new_tasks, None)]
+    while stack:
+        siblings, parent_id = stack.pop()
+        for task in siblings:
+            tid = task.get("id")
+            prev = old.get(tid)
+            rec = (
+                parent_id,
+                task.get("text", ""),
+                task.get("checked", False),
+                task.get("cancelled", False),
+                task.get("done_date"),
+            )
+            if prev is not None and _fingerprint(prev) == rec and prev["mtime"]:
+                task["mtime"] = prev["mtime"]
+            else:
+                task["mtime"] = now
+            stack.append((task.get("children", []), tid))
+
+
+# --- ТРЕХСТОРОННИЙ MERGE ЗАДАЧ ---
+
+def _pick(base, ours, theirs):
+    """Классический 3-way для одного значения: (значение, конфликт?)"""
+    if ours == theirs:
+        return ours, False
+    if ours == base:
+        return theirs, False
+    if theirs == base:
+        return ours, False
+    return None, True
+
+
+def merge_tasks(base_tasks, our_tasks, their_tasks, note_id=None):
+    """
+    Сливает три версии списка задач одной заметки.
+    Возвращает (merged_tasks, conflicts), conflicts — список словарей для отчета.
+    """
+    salt = note_id or ""
+    orders = ({}, {}, {})
+    base = flatten(base_tasks or [], salt, orders[0])
+    ours = flatten(our_tasks or [], salt, orders[1])
+    theirs = flatten(their_tasks or [], salt, orders[2])
+    conflicts = []
+
+    def report(tid, field, our_val, their_val, chosen):
+        conflicts.append(
+            {
+                "note_id": note_id,
+                "task_id": tid,
+                "field": field,
+                "ours": our_val,
+                "theirs": their_val,
+                "chosen": chosen,
+            }
+        )
+
+    merged = {}
+    for tid in ours.keys() | theirs.keys() | base.keys():
+        b, o, t = base.get(tid), ours.get(tid), theirs.get(tid)
+
+        if o is None and t is None:
+            continue  # Удалено с обеих сторон (или только в base)
+
+        if o is None or t is None:
+            alive = o or t
+            side = "ours" if o else "theirs"
+            if b is None:
+                merged[tid] = dict(alive)  # Новая задача на одной стороне
+            elif _fingerprint(alive) == _fingerprint(b):
+                continue  # Вторая сторона удалила, эта не трогала — удаляем
+            else:
+                # Удалено с одной стороны, изменено с другой — сохраняем изменение
+                merged[tid] = dict(alive)
+                if side == "ours":
+                    report(tid, "deleted", "modified", "deleted", "kept")
+                else:
+                    report(tid, "deleted", "deleted", "modified", "kept")
+            continue
+
+        if _fingerprint(o) == _fingerprint(t):
+            # Обе стороны согласны (самый частый случай) — поля сравнивать не нужно
+            merged[tid] = dict(o if o["mtime"] >= t["mtime"] else t)
+            continue
+
+        b = b or {}
+        newer_is_ours = o["mtime"] >= t["mtime"]
+        rec = {"mtime": max(o["mtime"], t["mtime"]), "task": o["task"], "other": t["task"]}
+
+        for field in MERGE_FIELDS + ("parent",):
+            value, conflict = _pick(b.get(field), o[field], t[field])
+            if conflict:
+                value = o[field] if newer_is_ours else t[field]
+                report(tid, field, o[field], t[field], "ours" if newer_is_ours else "theirs")
+            rec[field] = value
+
+        # Дата выполнения следует за итоговым статусом
+        if rec["checked"]:
+            rec["done_date"] = o["done_date"] if o["checked"] and o["done_date"] else t["done_date"]
+        else:
+            rec["done_date"] = None
+        merged[tid] = rec
+
+    _resurrect_orphans(merged, base, ours, theirs, conflicts, note_id)
+    _break_cycles(merged, conflicts, note_id)
+    return _build_tree(merged, *orders), conflicts
+
+
+def _resurrect_orphans(merged, base, ours, theirs, conflicts, note_id):
+    """Если родитель удален, а ребенок живет — возвращаем родителя (и его предков)."""
+    for tid in list(merged):
+        parent_id = merged[tid]["parent"]
+        while parent_id is not None and parent_id not in merged:
+            src = ours.get(parent_id) or theirs.get(parent_id) or base.get(parent_id)
+            if src is None:
+                merged[tid]["parent"] = None
+                break
+            merged[parent_id] = dict(src)
+            conflicts.append(
+                {
+                    "note_id": note_id,
+                    "task_id": parent_id,
+                    "field": "deleted",
+                    "ours": None,
+                    "theirs": None,
+                    "chosen": "kept (has children)",
+                }
+            )
+            tid, parent_id = parent_id, src["parent"]
+
+
+def _break_cycles(merged, conflicts, note_id):
+    """Встречные переносы (A в B, B в A) могут дать цикл — рвем его, поднимая узел в корень."""
+    state = {}  # 1 — в текущем пути, 2 — проверен
+    for start in merged:
+        path = []
+        tid = start
+        while tid is not None and state.get(tid) is None:
+            state[tid] = 1
+            path.append(tid)
+            tid = merged[tid]["parent"]
+        if tid is not None and state.get(tid) == 1:
+            merged[tid]["parent"] = None
+            conflicts.append(
+                {"note_id": note_id, "task_id": tid, "field": "parent", "ours": None, "theirs": None, "chosen": "root (cycle)"}
+            )
+        for p in path:
+            state[p] = 2
+
+
+def _build_tree(merged, base_order, our_order, their_order):
+    """Собирает дерево из плоских записей; orders — parent -> [id детей] каждой версии."""
+    groups = {}
+    for tid, rec in merged.items():
+        groups.setdefault(rec["parent"], []).append(tid)
+
+    def sort_key_factory(parent_id):
+        # Основной порядок — та сторона, которая меняла порядок детей этого родителя
+        b = base_order.get(parent_id, [])
+        o = our_order.get(parent_id, [])
+        t = their_order.get(parent_id, [])
+        primary, secondary = (t, o) if o == b else (o, t)
+        rank_p = {tid: i for i, tid in enumerate(primary)}
+        rank_s = {tid: i for i, tid in enumerate(secondary)}
+        offset = len(primary)
+        return lambda tid: rank_p[tid] if tid in rank_p else offset + rank_s.get(tid, 0)
+
+    nodes = {}
+    for tid, rec in merged.items():
+        extra = _extra(rec["task"])
+        if "other" in rec:
+            extra = {**_extra(rec["other"]), **extra}
+        task = {"id": tid, **extra}
+        task.update(
+            {
+                "text": rec["text"],
+                "checked": rec["checked"],
+                "done_date": rec["done_date"],
+                "cancelled": rec["cancelled"],
+                "mtime": rec["mtime"],
+                "children": [],
+            }
+        )
+        nodes[tid] = task
+
+    roots = []
+    for parent_id, child_ids in groups.items():
+        child_ids.sort(key=sort_key_factory(parent_id))
+        target = roots if parent_id is None else nodes[parent_id]["children"]
+        target.extend(nodes[c] for c in child_ids)
+    return roots
+
+
+# --- MERGE ЦЕЛЫХ БАЗ ---
+
+@contextmanager
+def _gc_paused():
+    """Merge создает сотни тысяч мелких словарей; циклический GC на них впустую тратит ~30% времени."""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+NOTE_FIELDS = ("title", "start_time_str", "finish_time_str")
+
+
+def merge_databases(base_db, our_db, their_db):
+    """
+    Сливает три структуры seshat_db.json. Возвращает (merged_db, conflicts).
+    base_db может быть пустым ({}), тогда это двусторонний merge по mtime.
+    """
+    with _gc_paused():
+        return _merge_databases(base_db, our_db, their_db)
+
+
+def _merge_databases(base_db, our_db, their_db):
+    base_notes = (base_db or {}).get("notes", {})
+    our_notes = our_db.get("notes", {})
+    their_notes = their_db.get("notes", {})
+
+    conflicts = []
+    merged_notes = {}
+
+    # Порядок: сначала наши заметки, затем новые с их стороны
+    order = list(our_notes) + [nid for nid in their_notes if nid not in our_notes]
+    for nid in order:
+        b, o, t = base_notes.get(nid), our_notes.get(nid), their_notes.get(nid)
+        for note in (b, o, t):
+            if note is not None:
+                note.setdefault("tasks", [])
+
+        if o is None or t is None:
+            alive = o if o is not None else t
+            if b is not None and _note_unchanged(b, alive, nid):
+                continue  # Удалена на другой стороне
+            if b is not None:
+                conflicts.append({"note_id": nid, "task_id": None, "field": "deleted", "ours": None, "theirs": None, "chosen": "kept"})
+            merged_notes[nid] = alive
+            continue
+
+        b = b or {}
+        note = {**t, **o}
+        for field in NOTE_FIELDS:
+            value, conflict = _pick(b.get(field), o.get(field), t.get(field))
+            if conflict:
+                value = o.get(field)
+                conflicts.append({"note_id": nid, "task_id": None, "field": field, "ours": o.get(field), "theirs": t.get(field), "chosen": "ours"})
+            note[field] = value
+
+        note["tasks"], task_conflicts = merge_tasks(b.get("tasks"), o["tasks"], t["tasks"], nid)
+        note["summary"] = compute_summary(note)
+        conflicts.extend(task_conflicts)
+        merged_notes[nid] = note
+
+    merged = {**their_db, **our_db, "notes": merged_notes}
+    if merged.get("current_note_id") not in merged_notes:
+        merged["current_note_id"] = next(iter(merged_notes), None)
+    return merged, conflicts
+
+
+def _note_unchanged(base_note, note, nid):
+    if any(base_note.get(f) != note.get(f) for f in NOTE_FIELDS):
+        return False
+    b = flatten(base_note.get("tasks", []), nid)
+    n = flatten(note.get("tasks", []), nid)
+    if b.keys() != n.keys():
+        return False
+    return all(_fingerprint(b[tid]) == _fingerprint(n[tid]) and b[tid]["pos"] == n[tid]["pos"] for tid in b)
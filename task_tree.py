@@ -1,44 +1,168 @@
 # task_tree.py
 
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import QByteArray, QMimeData, Qt
+from PyQt6.QtGui import QBrush, QColor, QDrag
 from PyQt6.QtWidgets import QAbstractItemView, QTreeWidget, QTreeWidgetItem
 
+# Кисти и перечисления Qt — один раз: при загрузке и отметке поддерева в десятки
+# тысяч задач создание QBrush и доступ к enum на каждую задачу заметны
+DIM_BRUSH = QBrush(QColor("#606060"))
+TEXT_BRUSH = QBrush(QColor("#e0e0e0"))
+CHECKED = Qt.CheckState.Checked
+PARTIAL = Qt.CheckState.PartiallyChecked
+UNCHECKED = Qt.CheckState.Unchecked
+DONE_ROLE = Qt.ItemDataRole.UserRole
+
+
+def has_checked(tasks):
+    """Есть ли среди задач (на любой глубине) выполненная."""
+    stack = list(tasks)
+    while stack:
+        task = stack.pop()
+        if task.get("checked"):
+            return True
+        stack.extend(task.get("children", []))
+    return False
+
 
 class DraggableTreeWidget(QTreeWidget):
+    """
+    Перетаскивание без MIME: в drag кладется пустой маркер, а бросок передает
+    on_drop_callback(parent, row) место вставки (row=None — в конец детей parent).
+    Переносит сами задачи TreeCore.move_to — со всеми атрибутами и поддеревьями.
+    """
+
     def __init__(self, on_change_callback):
         super().__init__()
         self.on_change_callback = on_change_callback
+        self.on_drop_callback = None
 
         self.setDragEnabled(True)
         self.setAcceptDrops(True)
         self.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
         self.setDropIndicatorShown(True)
-        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        # Ctrl/Shift-клик: групповые операции (TreeCore, TreeMenu) и перетаскивание группы
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
 
         self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
         self.setUniformRowHeights(True)
+        # Свернутые задачи строят детей при первом раскрытии
+        self.itemExpanded.connect(self._on_item_expanded)
+
+    @staticmethod
+    def _on_item_expanded(item):
+        if isinstance(item, TodoItem):
+            item.ensure_children()
+
+    def startDrag(self, supported_actions):
+        # Стандартный startDrag кодирует выделение в MIME, а после броска удаляет
+        # исходные строки — нам не нужно ни то ни другое
+        current = self.currentItem()
+        if not self.selectedItems() or current is None:
+            return
+        mime = QMimeData()
+        mime.setData(self.model().mimeTypes()[0], QByteArray())  # Маркер формата для dragMoveEvent
+        drag = QDrag(self)
+        drag.setMimeData(mime)
+        drag.setPixmap(self.viewport().grab(self.visualItemRect(current)))
+        drag.exec(Qt.DropAction.MoveAction)
+
+    def drop_target(self, pos, position):
+        """(родитель, позиция) для броска в точку pos при индикаторе position."""
+        root = self.invisibleRootItem()
+        target = self.itemAt(pos)
+        if target is None or position == QAbstractItemView.DropIndicatorPosition.OnViewport:
+            return root, None
+        if position == QAbstractItemView.DropIndicatorPosition.OnItem:
+            return target, None
+        parent = target.parent() or root
+        below = position == QAbstractItemView.DropIndicatorPosition.BelowItem
+        return parent, parent.indexOfChild(target) + below
 
     def dropEvent(self, event):
-        super().dropEvent(event)
-        if self.on_change_callback:
-            self.on_change_callback()
+        if event.source() is not self or self.on_drop_callback is None:
+            event.ignore()
+            return
+        parent, row = self.drop_target(event.position().toPoint(), self.dropIndicatorPosition())
+        event.setDropAction(Qt.DropAction.MoveAction)
+        event.accept()
+        self.stopAutoScroll()
+        self.setState(QAbstractItemView.State.NoState)
+        self.viewport().update()
+        self.on_drop_callback(parent, row)
 
 
 class TodoItem(QTreeWidgetItem):
-    def __init__(self, parent, text, done_date=None, cancelled=False):
+    # Собираем флаги один раз: OR enum-флагов в Python заметен при вставке тысяч задач
+    FLAGS = (
+        Qt.ItemFlag.ItemIsSelectable
+        | Qt.ItemFlag.ItemIsUserCheckable
+        | Qt.ItemFlag.ItemIsEditable
+        | Qt.ItemFlag.ItemIsEnabled
+        | Qt.ItemFlag.ItemIsDragEnabled
+        | Qt.ItemFlag.ItemIsDropEnabled
+    )
+
+    def __init__(self, parent, text, done_date=None, cancelled=False, task_id=None, expanded=True):
+        if isinstance(parent, TodoItem):
+            parent.ensure_children()  # Новая задача встает после уже существующих детей
         super().__init__(parent)
+        # Данные еще не построенных детей свернутой задачи (None — дети построены)
+        self.pending = None
         self.setText(0, text)
-        self.setFlags(
-            Qt.ItemFlag.ItemIsSelectable
-            | Qt.ItemFlag.ItemIsUserCheckable
-            | Qt.ItemFlag.ItemIsEditable
-            | Qt.ItemFlag.ItemIsEnabled
-            | Qt.ItemFlag.ItemIsDragEnabled
-            | Qt.ItemFlag.ItemIsDropEnabled
-        )
-        self.setCheckState(0, Qt.CheckState.Unchecked)
-        self.setExpanded(True)
+        self.setFlags(self.FLAGS)
+        self.setCheckState(0, UNCHECKED)
+        self.setExpanded(expanded)
         self.cancelled = cancelled
+        # Стабильный id задачи (нужен для merge); новым задачам выдается при сборе данных
+        self.task_id = task_id
 
         if done_date:
-            self.setData(0, Qt.ItemDataRole.UserRole, done_date)
+            self.setData(0, DONE_ROLE, done_date)
+
+    @classmethod
+    def from_data(cls, parent, data):
+        """
+        Задача из словаря заметки. Дети свернутой задачи ("expanded": false) не
+        строятся, а ждут в pending первого раскрытия. Возвращает задачу.
+        """
+        children = data.get("children") or []
+        expanded = data.get("expanded", True)
+        item = cls(
+            parent, data["text"], data.get("done_date"), data.get("cancelled", False), data.get("id"),
+            expanded=expanded or not children,
+        )
+        if children and not expanded:
+            item.pending = children
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+            mixed = has_checked(children)
+        else:
+            mixed = False
+            for child in children:
+                mixed |= cls.from_data(item, child).checkState(0) != UNCHECKED
+
+        # В базе только checked; частичную отметку родителя восстанавливаем по детям
+        state = CHECKED if data["checked"] else PARTIAL if mixed else UNCHECKED
+        item.setCheckState(0, state)
+        item.setForeground(0, DIM_BRUSH if data.get("cancelled", False) or state == CHECKED else TEXT_BRUSH)
+        return item
+
+    def ensure_children(self):
+        """Строит отложенных детей (первое раскрытие, вставка внутрь, поиск)."""
+        if self.pending is None:
+            return
+        children, self.pending = self.pending, None
+        self.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicatorWhenChildless)
+        tree = self.treeWidget()
+        blocked = tree.blockSignals(True) if tree else False
+        try:
+            for child in children:
+                TodoItem.from_data(self, child)
+        finally:
+            if tree:
+                tree.blockSignals(blocked)
+
+    def setExpanded(self, expanded):
+        if expanded:
+            self.ensure_children()
+        super().setExpanded(expanded)
@@ -0,0 +1,61 @@
+# tests/conftest.py
+"""Общие фабрики данных и фикстуры базы для тестов."""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_manager import DataManager
+
+DONE_DATE = "01.05.2024, 10:30"
+
+
+def task(text, checked=False, cancelled=False, children=(), **fields):
+    """
+    Задача в формате базы. Выполненная получает дату DONE_DATE; прочие поля
+    (id, done_date, expanded, mtime) передаются как есть.
+    """
+    data = {
+        "text": text,
+        "checked": checked,
+        "done_date": DONE_DATE if checked else None,
+        "cancelled": cancelled,
+        "children": list(children),
+    }
+    data.update(fields)
+    return data
+
+
+def write_db(path, notes, **meta):
+    """Файл базы JSON из готовых заметок (как после ручной правки или старой версии)."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({**meta, "notes": notes}, f, ensure_ascii=False, indent=2)
+
+
+@pytest.fixture
+def db_dir(tmp_path, monkeypatch):
+    """Пустая папка базы как рабочий каталог: DataManager берет seshat_db.* из текущей папки."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def open_db(qapp, db_dir):
+    """
+    Фабрика DataManager в db_dir (каждый вызов — новый запуск стикера на той же базе).
+    В конце теста их DbWatcher останавливаются: путь к базе относительный, и таймер,
+    сработавший после возврата из db_dir, взялся бы за базу в чужой папке.
+    """
+    managers = []
+
+    def open_db():
+        dm = DataManager()
+        managers.append(dm)
+        return dm
+
+    yield open_db
+    for dm in managers:
+        dm.watcher.stop()
@@ -0,0 +1,72 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from archive import ArchiveModel
+from note_meta import NoteMetaIndex, compute_meta
+
+
+class MetaData:
+    """Mock DataManager: the archive only needs all_notes, current_note_id and meta."""
+
+    def __init__(self, count):
+        self.all_notes = {
+            f"n{i:04d}": {
+                "title": f"Note {i:04d}",
+                "tasks": [{"text": "t", "checked": i % 2 == 0, "children": []}],
+                "start_time_str": f"01.01.2025 10:{i % 60:02d}:00",
+            }
+            for i in range(count)
+        }
+        self.current_note_id = "n0000"
+        self.meta = NoteMetaIndex(self)
+
+
+def test_compute_meta_matches_tree_progress_rules():
+    note = {
+        "title": "T",
+        "start_time_str": "02.03.2025 10:00:00",
+        "tasks": [
+            {"text": "a", "checked": True, "children": []},
+            {"text": "b", "checked": False, "children": [
+                {"text": "b1", "checked": True, "children": []},
+                {"text": "b2", "checked": False, "cancelled": True, "children": []},
+            ]},
+            {"text": "c", "checked": False, "cancelled": True, "children": []},
+        ],
+    }
+    meta = compute_meta("x", note)
+    assert (meta["total"], meta["done"], meta["cancelled"]) == (5, 2, 2)
+    assert meta["progress"] == 50  # (1 + 1/2) / 3
+    assert meta["start"] is not None and meta["finish"] is None
+
+
+def test_model_pages_rows(qapp):
+    model = ArchiveModel(MetaData(450))
+    assert model.rowCount() == ArchiveModel.PAGE_SIZE
+    while model.canFetchMore():
+        model.fetchMore()
+    assert model.rowCount() == 450
+
+
+def test_model_filter_sort_and_single_row_delete(qapp):
+    data = MetaData(30)
+    model = ArchiveModel(data)
+
+    model.set_sort("title")
+    assert model.index(0).data(ArchiveModel.NoteIdRole) == "n0000"
+
+    model.set_sort("progress_desc")
+    assert data.meta.get(model.index(0).data(ArchiveModel.NoteIdRole))["progress"] == 100
+
+    model.set_filter("note 001")
+    assert model.rowCount() == 10
+
+    removed = []
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    model.modelReset.connect(lambda: removed.append("reset"))
+    victim = model.index(3).data(ArchiveModel.NoteIdRole)
+    model.remove_note(victim)
+    assert removed == [(3, 3)]
+    assert model.rowCount() == 9
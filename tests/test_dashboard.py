@@ -0,0 +1,71 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import task
+from PyQt6.QtWidgets import QPushButton
+
+from dashboard import DashboardWindow, NoteStarItem
+from menu_logic import MenuLogic
+from note_meta import NoteMetaIndex
+
+
+class DashData:
+    def __init__(self, count):
+        self.all_notes = {
+            f"n{i}": {"title": f"Note {i}", "tasks": [{"text": "t", "checked": True, "children": []}] * (i % 5)}
+            for i in range(count)
+        }
+        self.current_note_id = "n0"
+        self.meta = NoteMetaIndex(self)
+
+
+class DashWindow:
+    default_accent = "#7c4dff"
+
+    def __init__(self, count):
+        self.data = DashData(count)
+
+
+def test_dashboard_reads_summaries_only(qapp):
+    mw = DashWindow(250)
+    dash = DashboardWindow(mw)
+
+    # Сетка отдает карточки порциями
+    assert dash.model.rowCount() == 200
+
+    dash.set_mode(1)
+    stars = [item for item in dash.scene.items() if isinstance(item, NoteStarItem)]
+    assert len(stars) == 250
+
+    dash.filter_edit.setText("Note 24")
+    stars = [item for item in dash.scene.items() if isinstance(item, NoteStarItem)]
+    assert {s.note_id for s in stars} == {"n24"} | {f"n24{i}" for i in range(10)}
+
+
+class MenuWindow:
+    default_accent = "#7c4dff"
+
+    def __init__(self, data):
+        self.data = data
+        self.menu_btn = QPushButton()
+
+    def save_and_update(self):
+        raise AssertionError("открытие сводки не должно сохранять заметку")
+
+
+def test_open_dashboard_does_not_save(open_db, monkeypatch):
+    dm = open_db()
+    note = dm.all_notes[dm.current_note_id]
+    note["tasks"] = [task("Done", True), task("Open")]  # Как после правки в дереве
+    steps = list(dm.history.history)
+    writes = []
+    monkeypatch.setattr(dm, "_write_db", lambda *args, **kwargs: writes.append(args))
+
+    logic = MenuLogic(MenuWindow(dm))
+    logic.open_dashboard()
+    logic.dashboard.close()
+
+    assert dm.history.history == steps and writes == []
+    assert note["summary"]["done"] == 1 and note["summary"]["total"] == 2
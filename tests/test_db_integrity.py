@@ -0,0 +1,65 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import task
+
+import db_integrity
+from db_integrity import backup, check_raw, repair_note, run_check, salvage
+
+
+def test_checksums_detect_changes(open_db):
+    dm = open_db()
+    dm.all_notes[dm.current_note_id]["tasks"] = [task("a"), task("b", True)]
+    dm.save_to_disk()
+
+    raw = open("seshat_db.json", "rb").read()
+    report = check_raw(raw)
+    assert report["checked"] == 1 and not report["bad"] and not report["mismatch"] and not report["unsigned"]
+
+    # Правка "мимо" приложения: JSON валиден, но сумма не сходится
+    data = json.loads(raw)
+    data["notes"][dm.current_note_id]["tasks"][0]["text"] = "changed"
+    report = check_raw(json.dumps(data).encode("utf-8"))
+    assert report["mismatch"] == [dm.current_note_id]
+
+
+def test_repair_and_salvage(tmp_path):
+    note = {"title": 5, "tasks": [task("ok", children=[task(None), "junk"]), 42, {"text": "x", "checked": "yes"}]}
+    repaired = repair_note(note)
+    assert repaired["title"] == "5"
+    assert [t["text"] for t in repaired["tasks"]] == ["ok", "x"]
+    assert repaired["tasks"][0]["children"] == [task("")]
+    assert repaired["tasks"][1]["checked"] is True
+
+    # Оборванный файл: вторая заметка цела, третья обрезана
+    path = tmp_path / "broken.json"
+    good = json.dumps({"title": "A", "tasks": [task("a")]})
+    path.write_text('{"notes": {"n1": ' + good + ', "n2": ' + good + ', "n3": {"title": "B", "tas', encoding="utf-8")
+    assert [nid for nid, _ in salvage(str(path))] == ["n1", "n2"]
+
+
+def test_backup_rotation(tmp_path, monkeypatch):
+    stamps = iter(f"2024010{i}-000000" for i in range(1, 10))
+    monkeypatch.setattr(db_integrity, "_stamp", lambda: next(stamps))
+    db = tmp_path / "seshat_db.json"
+    for _ in range(5):
+        backup(str(db), b"{}", keep=3)
+    assert sorted(os.listdir(tmp_path / "backups")) == [f"seshat_db.2024010{i}-000000.json.gz" for i in (3, 4, 5)]
+
+
+def test_corrupt_db_is_quarantined_and_salvaged(open_db, db_dir):
+    good = json.dumps({"title": "Saved", "tasks": [task("keep me")]})
+    with open("seshat_db.json", "w", encoding="utf-8") as f:
+        f.write('{"notes": {"n1": ' + good + ', "n2": {"tasks": [')
+
+    dm = open_db()
+    quarantined = [f for f in os.listdir(db_dir) if ".corrupt-" in f]
+    assert len(quarantined) == 1  # Битый файл отодвинут до первой записи новой базы
+    assert "n1" not in dm.all_notes
+
+    changed = dm.integrity.apply(run_check(dm.filename, dm.integrity.salvage_from))
+    assert changed and list(dm.all_notes) == ["n1"] and dm.current_note_id == "n1"
+    assert open_db().all_notes["n1"]["tasks"][0]["text"] == "keep me"
@@ -0,0 +1,77 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from conftest import task, write_db
+
+from db_integrity import check_raw
+from db_snapshot import SnapshotError, SnapshotReader, SnapshotWriter, pack, read_snapshot, unpack
+
+NOTES = {
+    "a": {"title": "Заметка α", "tasks": [task("купить молоко", children=[task("görev ✓")])]},
+    "b": {"title": "مهمة", "tasks": [task("x" * 500, checked=True)]},
+}
+
+
+def test_roundtrip_and_single_note(tmp_path):
+    path = str(tmp_path / "db.snap")
+    cache = {}
+    with SnapshotWriter(path, cache=cache, language="ru", current_note_id="b") as w:
+        for note_id, note in NOTES.items():
+            w.write_note(note_id, note)
+
+    assert read_snapshot(path) == {"language": "ru", "current_note_id": "b", "notes": NOTES}
+    reader = SnapshotReader(path)
+    assert reader.ids() == ["a", "b"] and reader.read_note("b") == NOTES["b"]
+
+    # Неизмененная заметка берется из кэша, удаленная из него выпадает
+    blob_a = cache["a"][1]
+    with SnapshotWriter(path, cache=cache) as w:
+        w.write_note("a", NOTES["a"])
+    assert cache["a"][1] is blob_a and "b" not in cache
+
+    report = check_raw(open(path, "rb").read())
+    assert report["checked"] == 1 and not report["bad"] and not report["mismatch"]
+
+
+def test_pack_unpack_and_damage(tmp_path):
+    src, snap, out = tmp_path / "db.json", str(tmp_path / "db.snap"), tmp_path / "export.json"
+    src.write_text(json.dumps({"language": "en", "notes": NOTES}), encoding="utf-8")
+    assert pack(str(src), snap) == 2
+    assert unpack(snap, str(out)) == 2
+    exported = json.loads(out.read_text(encoding="utf-8"))
+    assert exported["notes"] == NOTES and exported["language"] == "en"
+    assert "\n" in out.read_text(encoding="utf-8").split('"a"')[1][:10]  # Экспорт читаемый (с отступами)
+
+    raw = bytearray(open(snap, "rb").read())
+    raw[-5] ^= 0xFF  # Портим индекс
+    with pytest.raises(SnapshotError):
+        SnapshotReader.from_bytes(bytes(raw))
+
+
+def test_data_manager_prefers_snapshot(open_db):
+    write_db("seshat_db.json", NOTES, current_note_id="a")
+    pack("seshat_db.json", "seshat_db.snap")
+
+    dm = open_db()
+    assert dm.filename == "seshat_db.snap" and dm.all_notes["b"]["title"] == "مهمة"
+    dm.rename_current("Renamed")
+    assert SnapshotReader("seshat_db.snap").read_note("a")["title"] == "Renamed"
+    assert open_db().all_notes["a"]["title"] == "Renamed"
+
+
+def test_injector_refuses_snapshot(qtbot, db_dir):
+    from db_merger_v3 import DatabaseInjector
+
+    write_db("seshat_db.json", NOTES, current_note_id="a")
+    assert DatabaseInjector().db_filename == "seshat_db.json"
+
+    pack("seshat_db.json", "seshat_db.snap")
+    injector = DatabaseInjector()
+    qtbot.addWidget(injector)
+    # Правки в seshat_db.json стикер бы уже не увидел
+    assert injector.db_filename == "seshat_db.snap" and injector.snapshot_db
+    assert not injector.isEnabled() and injector.combo_notes.count() == 0
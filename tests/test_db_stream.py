@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from conftest import task, write_db
+
+from db_stream import (
+    NoteStreamReader,
+    StreamFormatError,
+    merge_file_into_db,
+    rewrite_db,
+    validate_note,
+)
+
+
+def test_reader_small_chunks(tmp_path):
+    """Tiny chunks force values (and multi-byte UTF-8 chars) to span buffer boundaries."""
+    path = tmp_path / "db.json"
+    notes = {
+        "a": {"title": "Заметка α", "tasks": [task("купить молоко", children=[task("görev ✓")])]},
+        "b": {"title": "مهمة", "tasks": [task("x" * 500, checked=True)]},
+    }
+    write_db(path, notes, language="ru", current_note_id="b")
+
+    reader = NoteStreamReader(str(path), chunk_size=7)
+    assert dict(reader.iter_notes()) == notes
+    assert reader.meta == {"language": "ru", "current_note_id": "b"}
+
+
+def test_reader_truncated_file(tmp_path):
+    path = tmp_path / "db.json"
+    write_db(path, {"a": {"title": "A", "tasks": [task("one")]}})
+    raw = path.read_bytes()
+    path.write_bytes(raw[: len(raw) // 2])
+
+    with pytest.raises(StreamFormatError):
+        list(NoteStreamReader(str(path), chunk_size=16).iter_notes())
+
+
+def test_validate_note_reports_nested_errors():
+    note = {"title": "T", "tasks": [task("ok", children=[{"text": 5, "checked": "yes"}])]}
+    errors = validate_note(note)
+    assert any("children[0].text" in e for e in errors)
+    assert any("children[0].checked" in e for e in errors)
+
+
+def test_merge_file_into_db(tmp_path):
+    db = tmp_path / "db.json"
+    incoming = tmp_path / "in.json"
+    write_db(db, {"a": {"title": "old A", "tasks": []}, "b": {"title": "B", "tasks": []}}, current_note_id="a")
+    write_db(
+        incoming,
+        {
+            "a": {"title": "new A", "tasks": [task("t")]},
+            "c": {"title": "C", "tasks": []},
+            "bad": {"title": "bad", "tasks": [{"text": 1}]},
+        },
+    )
+
+    result = merge_file_into_db(str(db), str(incoming))
+
+    assert result["added"] == 1
+    assert result["overwritten"] == 1
+    assert "bad" in result["invalid"]
+    with open(db, encoding="utf-8") as f:
+        merged = json.load(f)
+    assert set(merged["notes"]) == {"a", "b", "c"}
+    assert merged["notes"]["a"]["title"] == "new A"
+    assert merged["current_note_id"] == "a"
+    assert not os.path.exists(f"{db}.tmp")
+
+    # Текущая заметка файла не прошла проверку — текущая в базе не меняется
+    write_db(incoming, {"bad": {"title": "bad", "tasks": [{"text": 1}]}}, current_note_id="bad")
+    merge_file_into_db(str(db), str(incoming))
+    with open(db, encoding="utf-8") as f:
+        assert json.load(f)["current_note_id"] == "a"
+
+
+def test_rewrite_db_rolls_back_on_error(tmp_path):
+    db = tmp_path / "db.json"
+    write_db(db, {"a": {"title": "A", "tasks": []}})
+    before = db.read_bytes()
+
+    def boom(note_id, note):
+        raise RuntimeError("fail")
+
+    with pytest.raises(RuntimeError):
+        rewrite_db(str(db), boom)
+    assert db.read_bytes() == before
+    assert not os.path.exists(f"{db}.tmp")
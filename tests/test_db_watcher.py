@@ -0,0 +1,154 @@
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import task, write_db
+
+from data_storage import atomic_open
+from db_lock import DbLockTimeout, db_lock
+from db_snapshot import pack, read_snapshot
+from db_watcher import MAX_RETRIES
+
+
+@pytest.fixture
+def db(open_db):
+    notes = {nid: {"title": nid.upper(), "tasks": [task(f"{nid} task")]} for nid in ("a", "b", "c")}
+    write_db("seshat_db.json", notes, current_note_id="a")
+    open_db().save_to_disk()  # База уже записана стикером (id задач, суммы)
+    return open_db
+
+
+def external_edit(path, edit):
+    """Другой процесс: прочитать -> изменить -> записать под той же блокировкой."""
+    with db_lock(path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        edit(data["notes"])
+        with atomic_open(path) as f:
+            json.dump(data, f, ensure_ascii=False)
+
+
+def test_lock_is_reentrant_and_exclusive(tmp_path):
+    path = str(tmp_path / "seshat_db.json")
+    errors = []
+
+    def other_process():
+        try:
+            with db_lock(path, timeout=0.1):
+                pass
+        except DbLockTimeout as e:
+            errors.append(e)
+
+    with db_lock(path):
+        with db_lock(path):  # Повторный вход в том же потоке
+            thread = threading.Thread(target=other_process)
+            thread.start()
+            thread.join()
+    assert len(errors) == 1
+    other_process()  # Блокировка снята
+    assert len(errors) == 1
+
+
+def test_external_change_reloads_only_changed_notes(db):
+    dm = db()
+    untouched = dm.all_notes["c"]
+
+    def edit(notes):
+        notes["b"]["tasks"].append(task("from script"))
+        notes["d"] = {"title": "D", "tasks": [task("new")]}
+        del notes["c"]
+
+    external_edit(dm.filename, edit)
+    report = dm.watcher.merge_external()
+    assert sorted(report["changed"]) == ["b", "d"] and report["removed"] == ["c"] and not report["current"]
+    assert [t["text"] for t in dm.all_notes["b"]["tasks"]] == ["b task", "from script"]
+    assert dm.all_notes["d"]["tasks"][0]["id"]  # id задач проставлены, как при загрузке
+    assert "c" not in dm.all_notes and untouched["title"] == "C"
+    assert [r[0] for r in dm.search.search("script")] == ["b"]
+
+    # Своя запись не считается внешним изменением
+    dm.rename_current("Mine")
+    assert not dm.watcher.changed_on_disk()
+
+
+def test_save_keeps_external_writes(db):
+    dm = db()
+
+    def edit(notes):
+        notes["b"]["title"] = "Scripted"
+        notes["a"]["tasks"].append(task("script task"))
+
+    external_edit(dm.filename, edit)
+    # Стикер не успел перечитать базу и сохраняет свою правку текущей заметки
+    tasks = [dict(t) for t in dm.all_notes["a"]["tasks"]] + [task("my task")]
+    dm.save_current_state(tasks)
+
+    with open("seshat_db.json", encoding="utf-8") as f:
+        saved = json.load(f)["notes"]
+    assert saved["b"]["title"] == "Scripted"
+    assert sorted(t["text"] for t in saved["a"]["tasks"]) == ["a task", "my task", "script task"]
+
+
+@pytest.mark.parametrize("delete_current", [False, True])
+def test_snapshot_external_change(db, delete_current):
+    pack("seshat_db.json", "seshat_db.snap")
+    os.remove("seshat_db.json")
+    dm = db()
+
+    # Внешний процесс пересобирает снимок с измененной заметкой b
+    dm.all_notes.close()
+    os.rename("seshat_db.snap", "other.snap")
+    data = read_snapshot("other.snap")
+    data["notes"]["b"]["title"] = "Changed"
+    if delete_current:
+        del data["notes"]["a"]
+    with open("other.json", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    pack("other.json", "seshat_db.snap")
+
+    report = dm.watcher.merge_external()
+    assert report["changed"] == ["b"] and report["removed"] == []
+    assert dm.meta.get("b")["title"] == "Changed" and not dm.all_notes.is_loaded("b")
+    assert "a" in dm.all_notes  # Открытая заметка не исчезает из-под пользователя
+
+
+@pytest.mark.parametrize("db_file, damage", [("json", "deleted"), ("json", "garbage"), ("snap", "deleted")])
+def test_save_survives_missing_or_broken_file(db, db_file, damage):
+    if db_file == "snap":
+        pack("seshat_db.json", "seshat_db.snap")
+        os.remove("seshat_db.json")
+    dm = db()
+    if damage == "deleted":
+        os.remove(dm.filename)
+    else:
+        with open(dm.filename, "w", encoding="utf-8") as f:
+            f.write('{"notes": {"a": ')
+
+    # Слить нечего, но запись идет: правки не теряются ни сейчас, ни потом
+    dm.rename_current("First")
+    dm.rename_current("Second")
+    assert db().all_notes["a"]["title"] == "Second" and db().all_notes["b"]["title"] == "B"
+
+
+def test_check_stops_retrying_broken_file(db):
+    dm = db()
+    with open(dm.filename, "w", encoding="utf-8") as f:
+        f.write('{"notes": {"a": ')
+    timer = dm.watcher._timer
+
+    def fire():
+        timer.stop()  # Как срабатывание одиночного таймера
+        dm.watcher.check()
+
+    for _ in range(MAX_RETRIES):
+        fire()
+        assert timer.isActive()
+    fire()
+    assert not dm.watcher._timer.isActive()  # Ждет следующего сигнала о файле
+    dm.watcher._schedule()
+    assert dm.watcher._retries == 0 and timer.isActive()
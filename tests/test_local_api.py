@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import task
+
+from local_api import INVALID_PARAMS, METHOD_NOT_FOUND, ApiClient, LocalApi
+
+
+class FakeTreeLogic:
+    def update_title_ui(self):
+        pass
+
+
+class FakeWindow:
+    """Атрибуты главного окна, которые трогает LocalApi."""
+
+    def __init__(self, data):
+        self.data = data
+        self.tree_logic = FakeTreeLogic()
+        self.ui_refreshes = 0
+
+    def refresh_ui(self):
+        self.ui_refreshes += 1
+
+    def refresh_map_if_open(self):
+        pass
+
+
+def make_api(open_db, monkeypatch):
+    dm = open_db()
+    saves = []
+    original = dm.save_to_disk
+    monkeypatch.setattr(dm, "save_to_disk", lambda *a, **kw: (saves.append(1), original(*a, **kw)))
+    mw = FakeWindow(dm)
+    return LocalApi(mw), mw, saves
+
+
+def call(api, method, req_id=1, **params):
+    return api.handle_line(json.dumps({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params}))
+
+
+def test_methods_batch_into_one_save(open_db, monkeypatch):
+    api, mw, saves = make_api(open_db, monkeypatch)
+    dm = mw.data
+
+    added = call(api, "tasks.add", tasks=[{"text": "parent", "children": [{"text": "a"}, {"text": "b"}]}])
+    parent_id, a_id, b_id = added["result"]["ids"]
+    call(api, "tasks.check", ids=[a_id])
+    call(api, "tasks.cancel", ids=[b_id])
+    assert call(api, "tasks.check", ids=["nope"])["error"]["code"] == INVALID_PARAMS
+    assert call(api, "tasks.move")["error"]["code"] == METHOD_NOT_FOUND
+    assert saves == []  # Все применено в памяти, запись — одна на проход цикла
+
+    api.flush()
+    assert len(saves) == 1 and mw.ui_refreshes == 1
+    with open(dm.filename, encoding="utf-8") as f:
+        saved = json.load(f)["notes"][dm.current_note_id]["tasks"]
+    parent = saved[0]
+    assert parent["id"] == parent_id and not parent["checked"]  # b не отмечена — родитель тоже
+    assert parent["children"][0]["checked"] and parent["children"][0]["done_date"]
+    assert parent["children"][1]["cancelled"]
+
+    call(api, "tasks.check", ids=[b_id])
+    api.flush()
+    assert dm.all_notes[dm.current_note_id]["tasks"][0]["checked"]  # Все дети отмечены
+    meta = call(api, "notes.list")["result"][0]
+    assert (meta["total"], meta["done"], meta["cancelled"]) == (3, 2, 1)
+
+
+def test_edits_after_undo_keep_history(open_db, monkeypatch):
+    api, mw, _saves = make_api(open_db, monkeypatch)
+    dm = mw.data
+    dm.save_current_state([task("A", id="a")])
+    dm.save_current_state([task("A", id="a"), task("B", id="b")])
+    dm.undo()  # В заметке — сам снимок истории
+
+    assert call(api, "tasks.check", ids=["a"], checked="no")["error"]["code"] == INVALID_PARAMS
+    call(api, "tasks.check", ids=["a"])
+    api.flush()
+    assert dm.all_notes[dm.current_note_id]["tasks"][0]["checked"] is True
+    # Шаг истории, на который откатились, не переписан правкой API: к нему можно вернуться
+    assert [[t["checked"] for t in step] for step in dm.history.history[-2:]] == [[False], [True]]
+    dm.undo()
+    assert [t["checked"] for t in dm.all_notes[dm.current_note_id]["tasks"]] == [False]
+
+
+def test_socket_roundtrip_and_events(qapp, open_db, monkeypatch):
+    api, mw, saves = make_api(open_db, monkeypatch)
+    name = f"seshat-test-{os.getpid()}-{time.monotonic_ns()}"
+    assert api.start(name)
+    count = 2000
+    result = {}
+
+    def script():
+        watcher = ApiClient(name)
+        watcher.call("events.subscribe")
+        client = ApiClient(name)
+        for i in range(count):
+            client.send("tasks.add", {"tasks": [{"text": f"task {i}"}]}, notify=True)
+        result["total"] = client.call("notes.list")[0]["total"]
+        result["event"] = watcher.read()
+        client.close()
+        watcher.close()
+
+    thread = threading.Thread(target=script)
+    thread.start()
+    deadline = time.monotonic() + 20
+    while thread.is_alive() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.001)
+    thread.join(1)
+    api.close()
+
+    assert result["total"] == count
+    assert result["event"]["method"] == "notes.changed" and result["event"]["params"]["source"] == "api"
+    assert len(saves) < count // 10  # Тысячи запросов — единицы записей
@@ -11,8 +11,9 @@ from PyQt6.QtWidgets import QLabel, QLineEdit, QTreeWidget
 # Import the classes we want to test
 from data_history import DataHistory
 from data_parser import DataParser
-from task_tree import TodoItem
+from task_tree import DraggableTreeWidget, TodoItem
 from tree_core import TreeCore
+from tree_io import TreeIO
 
 # --- MOCKS ---
 # We mock DataManager and MainWindow to avoid launching the entire application during tests.
@@ -36,6 +37,9 @@ class MockDataManager:
     def save_to_disk(self, skip_history=False):
         self.save_called = True
 
+    def will_change(self, note_id):
+        pass
+
 
 class MockMainWindow:
     """Mock for the main window (required by TreeCore)."""
@@ -170,4 +174,213 @@ def test_task_completion_logic(qtbot):
     core.on_item_changed(parent)
 
     # Verify child is also checked
-    assert child.checkState(0) == Qt.CheckState.Checked
\ No newline at end of file
+    assert child.checkState(0) == Qt.CheckState.Checked
+
+
+def test_deep_propagation_tri_state(qtbot):
+    """Check reaches every level; ancestors up to the root become tri-state in one pass."""
+    mw = MockMainWindow()
+    saves = []
+    core = TreeCore(mw, lambda: saves.append(1))
+    changed = []
+    mw.tree.itemChanged.connect(lambda item, _col: changed.append(item))
+    root = TodoItem(mw.tree, "Root")
+    chain = [root]
+    for depth in range(5):
+        chain.append(TodoItem(chain[-1], f"Level {depth + 1}"))
+    sibling = TodoItem(root, "Sibling")
+    TodoItem(chain[3], "Extra")
+    changed.clear()
+
+    core.set_checked([chain[1]], True)
+    assert [i.checkState(0) for i in chain[1:]] == [Qt.CheckState.Checked] * 5
+    assert chain[-1].data(0, Qt.ItemDataRole.UserRole)  # Дата выполнения и у внука внука
+    assert root.checkState(0) == Qt.CheckState.PartiallyChecked
+    assert changed == [] and len(saves) == 1  # Без сигналов на каждую задачу
+
+    # Клик по самому глубокому листу: единственный ребенок — родитель снят, выше — частичные
+    chain[-1].setCheckState(0, Qt.CheckState.Unchecked)
+    core.on_item_changed(chain[-1])
+    partial, unchecked = Qt.CheckState.PartiallyChecked, Qt.CheckState.Unchecked
+    assert [i.checkState(0) for i in chain] == [partial] * 4 + [unchecked] * 2
+
+    # Клик по частичному корню отмечает всё дерево
+    root.setCheckState(0, Qt.CheckState.Checked)
+    core.on_item_changed(root)
+    assert sibling.checkState(0) == Qt.CheckState.Checked and chain[-1].checkState(0) == Qt.CheckState.Checked
+
+    # Правка текста (флажок совпадает с детьми) не трогает поддерево
+    chain[-1].setCheckState(0, Qt.CheckState.Unchecked)
+    core.on_item_changed(chain[-1])
+    chain[2].setText(0, "Renamed")
+    core.on_item_changed(chain[2])
+    assert chain[-1].checkState(0) == Qt.CheckState.Unchecked
+
+    mw.refresh_map_if_open = lambda: None
+    core.set_cancelled([chain[1]], True)
+    assert all(i.cancelled for i in chain[1:]) and not root.cancelled
+    assert len(saves) == 6  # По сохранению на действие
+
+
+def test_partial_state_survives_reload(qtbot):
+    tree = QTreeWidget()
+    io = TreeIO(tree)
+    leaf = {"text": "Leaf", "checked": True, "done_date": "01.05.2024, 10:30", "children": []}
+    io.load_data([{"text": "Root", "checked": False, "children": [
+        {"text": "Mid", "checked": False, "children": [leaf, {"text": "Open", "checked": False}]},
+    ]}])
+    root = tree.topLevelItem(0)
+    assert root.checkState(0) == Qt.CheckState.PartiallyChecked
+    assert root.child(0).checkState(0) == Qt.CheckState.PartiallyChecked
+    tasks = io.collect_data()
+    assert tasks[0]["checked"] is False and tasks[0]["children"][0]["children"][0]["checked"] is True
+
+# --- BULK OPERATIONS (multi-selection) ---
+
+def make_bulk_core(count=5):
+    mw = MockMainWindow()
+    mw.tree = DraggableTreeWidget(on_change_callback=None)
+    mw.refresh_map_if_open = lambda: None
+    saves = []
+    core = TreeCore(mw, lambda: saves.append(1))
+    items = [TodoItem(mw.tree, f"Task {i}") for i in range(count)]
+    return mw, core, items, saves
+
+
+def texts(parent):
+    return [parent.child(i).text(0) for i in range(parent.childCount())]
+
+
+def test_bulk_check_cancel_delete_single_save(qtbot):
+    mw, core, items, saves = make_bulk_core()
+    for item in items[1:4]:
+        item.setSelected(True)
+
+    core.set_checked(core.selected_items(), True)
+    assert [i.checkState(0) == Qt.CheckState.Checked for i in items] == [False, True, True, True, False]
+    assert items[1].data(0, Qt.ItemDataRole.UserRole)  # Дата выполнения
+    core.set_cancelled(core.selected_items(), True)
+    assert [i.cancelled for i in items] == [False, True, True, True, False]
+    core.delete_selected()
+    assert texts(mw.tree.invisibleRootItem()) == ["Task 0", "Task 4"]
+    assert len(saves) == 3  # По одному сохранению на операцию
+
+
+def test_bulk_indent_move_unindent_keep_order(qtbot):
+    mw, core, items, saves = make_bulk_core()
+    root = mw.tree.invisibleRootItem()
+    for item in items[2:4]:
+        item.setSelected(True)
+
+    core.indent()  # Обе уходят под Task 1
+    assert texts(root) == ["Task 0", "Task 1", "Task 4"] and texts(items[1]) == ["Task 2", "Task 3"]
+    assert items[2].isSelected() and items[3].isSelected()
+
+    core.move_vertical(-1)  # Task 2 уже первая — группа не двигается
+    assert texts(items[1]) == ["Task 2", "Task 3"]
+
+    core.unindent()
+    assert texts(root) == ["Task 0", "Task 1", "Task 2", "Task 3", "Task 4"]
+    core.move_vertical(-1)
+    assert texts(root) == ["Task 0", "Task 2", "Task 3", "Task 1", "Task 4"]
+    assert len(saves) == 3
+
+
+def test_drop_moves_items_keeping_attributes(qtbot):
+    mw, core, items, saves = make_bulk_core()
+    root = mw.tree.invisibleRootItem()
+    child = TodoItem(items[0], "Sub", cancelled=True)
+    child.setCheckState(0, Qt.CheckState.Checked)
+    TodoItem(child, "Leaf")
+    child.setExpanded(True)
+    items[1].setCheckState(0, Qt.CheckState.Checked)
+    saves.clear()
+
+    child.setSelected(True)
+    core.move_to(items[4])  # Бросок на задачу — в конец её детей
+    assert texts(items[4]) == ["Sub"] and child.parent() is items[4]
+    # Тот же объект: зачеркивание, id-атрибуты и раскрытие поддерева на месте
+    assert child.cancelled and child.isExpanded() and texts(child) == ["Leaf"]
+    assert items[4].checkState(0) == Qt.CheckState.Checked and child.isSelected()
+
+    mw.tree.clearSelection()
+    for item in items[1:3]:
+        item.setSelected(True)
+    core.move_to(root, 5)  # Ниже Task 4: группа в конец, порядок сохраняется
+    assert texts(root) == ["Task 0", "Task 3", "Task 4", "Task 1", "Task 2"]
+    assert items[1].checkState(0) == Qt.CheckState.Checked
+    core.move_to(root, 3)  # На то же место — без сохранения
+    core.move_to(items[1])  # Внутрь выделенной — отказ
+    assert len(saves) == 2
+
+    mw.tree.clearSelection()
+    done, todo = TodoItem(items[3], "Done"), TodoItem(items[3], "Todo")
+    core.set_checked([done], True)
+    assert items[3].checkState(0) == Qt.CheckState.PartiallyChecked
+    done.setSelected(True)
+    todo.setSelected(True)
+    core.move_to(root)
+    # Опустевший родитель не остается частично отмеченным листом
+    assert items[3].childCount() == 0 and items[3].checkState(0) == Qt.CheckState.Unchecked
+
+
+def test_batch_groups_saves(qtbot):
+    mw, core, items, saves = make_bulk_core()
+    with core.batch():
+        core.add_task("New")
+        with core.batch():
+            core.set_checked([items[0]], True)
+        core.delete_item(items[1])
+        assert saves == []
+    assert len(saves) == 1
+
+
+# --- LAZY COLLAPSED SUBTREES ---
+
+def test_collapsed_subtree_is_built_on_expand(qtbot):
+    mw = MockMainWindow()
+    tree = mw.tree = DraggableTreeWidget(on_change_callback=None)
+    io = TreeIO(tree)
+    deep = {"id": "deep", "text": "Deep", "checked": True, "done_date": "01.05.2024, 10:30", "children": []}
+    data = [
+        {"id": "big", "text": "Big", "checked": False, "expanded": False, "children": [
+            {"id": "mid", "text": "Mid", "checked": False, "expanded": False, "children": [deep]},
+            {"id": "open", "text": "Open", "checked": False, "children": []},
+        ]},
+        {"id": "leaf", "text": "Leaf", "checked": False, "children": []},
+    ]
+    io.load_data(data)
+    big = tree.topLevelItem(0)
+    assert big.childCount() == 0 and big.pending is data[0]["children"]
+    assert big.checkState(0) == Qt.CheckState.PartiallyChecked  # По данным свернутого поддерева
+    # Свернутое поддерево уходит в сохранение как есть
+    assert io.collect_data()[0]["children"] is data[0]["children"]
+    assert io.collect_data()[0]["expanded"] is False
+
+    # Отметка свернутой задачи меняет копию данных, а не данные заметки
+    core = TreeCore(mw, lambda: None)
+    core.set_checked([big], True)
+    assert big.childCount() == 0 and big.pending[0]["children"][0]["checked"]
+    assert not data[0]["children"][0]["checked"]
+    core.set_checked([big], False)
+
+    big.setExpanded(True)  # Раскрытие строит только один уровень
+    assert [big.child(i).text(0) for i in range(big.childCount())] == ["Mid", "Open"]
+    mid = big.child(0)
+    assert mid.childCount() == 0 and mid.pending is not None
+
+    found = io.find_item("deep")  # Поиск достраивает путь
+    assert found is not None and found.parent() is mid and mid.pending is None
+    tasks = io.collect_data()
+    assert tasks[0]["expanded"] is True and tasks[0]["children"][0]["children"][0]["id"] == "deep"
+
+
+def test_new_child_of_collapsed_task_goes_last(qtbot):
+    tree = DraggableTreeWidget(on_change_callback=None)
+    io = TreeIO(tree)
+    io.load_data([{"text": "Parent", "checked": False, "expanded": False, "children": [
+        {"text": "Old", "checked": False, "children": []},
+    ]}])
+    parent = tree.topLevelItem(0)
+    TodoItem(parent, "New")
+    assert [parent.child(i).text(0) for i in range(parent.childCount())] == ["Old", "New"]
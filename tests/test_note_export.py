@@ -0,0 +1,140 @@
+import csv
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import task
+
+from db_lock import db_lock
+from db_snapshot import pack
+from db_stream import NoteStreamWriter, iter_notes, rewrite_db
+from note_export import export_db, main, walk
+
+NOTE = {
+    "title": "Trip, day 1",
+    "tasks": [
+        task("Packing", children=[task("Passport", True, id="a"), task("Umbrella", cancelled=True, id="b")], id="p"),
+        task('Tickets & "seats"; window', True, children=[task("Print", True, id="d")], id="c"),
+    ],
+}
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "seshat_db.json"
+    with NoteStreamWriter(str(path), language="en") as w:
+        w.write_note("n1", NOTE)
+        w.write_note("n2", {"title": "Empty", "tasks": []})
+    return str(path)
+
+
+def test_walk_is_preorder_with_parents():
+    assert [(d, p, t["id"]) for d, p, t in walk(NOTE["tasks"])] == [
+        (0, None, "p"), (1, "p", "a"), (1, "p", "b"), (0, None, "c"), (1, "c", "d"),
+    ]
+
+
+def test_markdown_and_opml(db, tmp_path):
+    md = tmp_path / "out.md"
+    assert export_db(db, str(md)) == 2
+    assert md.read_text(encoding="utf-8").splitlines()[:6] == [
+        "## Trip, day 1",
+        "",
+        "- [ ] Packing",
+        "  - [x] Passport",
+        "  - [-] Umbrella",
+        '- [x] Tickets & "seats"; window',
+    ]
+
+    opml = tmp_path / "out.opml"
+    export_db(db, str(opml))
+    body = ET.parse(opml).getroot().find("body")
+    note = body.findall("outline")[0]
+    assert note.get("text") == "Trip, day 1" and note.get("_note_id") == "n1"
+    packing, tickets = note.findall("outline")
+    assert [o.get("text") for o in packing] == ["Passport", "Umbrella"]
+    assert packing[0].get("_complete") == "true" and packing[1].get("_cancelled") == "true"
+    assert tickets.get("text") == 'Tickets & "seats"; window' and len(tickets) == 1
+
+
+def test_csv_and_ical(db, tmp_path):
+    out = tmp_path / "out.csv"
+    export_db(db, str(out))
+    with open(out, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["task_id"], r["parent_id"], r["depth"], r["checked"]) for r in rows] == [
+        ("p", "", "0", "0"), ("a", "p", "1", "1"), ("b", "p", "1", "0"), ("c", "", "0", "1"), ("d", "c", "1", "1"),
+    ]
+    assert rows[3]["text"] == 'Tickets & "seats"; window' and rows[1]["done_date"] == "01.05.2024, 10:30"
+
+    out = tmp_path / "out.ics"
+    export_db(db, str(out))
+    raw = out.read_bytes().decode("utf-8")
+    assert all(line.endswith("\r") for line in raw.split("\n")[:-1])
+    lines = raw.replace("\r\n ", "").split("\r\n")  # Склеиваем перенесенные строки
+    assert lines[0] == "BEGIN:VCALENDAR" and lines[-2] == "END:VCALENDAR"
+    assert lines.count("BEGIN:VTODO") == 5
+    assert "SUMMARY:Tickets & \"seats\"\\; window" in lines
+    assert "CATEGORIES:Trip\\, day 1" in lines
+    assert "STATUS:CANCELLED" in lines and "RELATED-TO;RELTYPE=PARENT:p@seshat" in lines
+    done = datetime(2024, 5, 1, 10, 30).astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    assert f"COMPLETED:{done}" in lines
+
+
+def test_snapshot_source_note_filter_and_cli(db, tmp_path, capsys):
+    snap = str(tmp_path / "seshat_db.snap")
+    pack(db, snap)
+    out = tmp_path / "one.md"
+    assert main(["md", snap, "-o", str(out), "--note", "n2"]) == 0
+    assert out.read_text(encoding="utf-8") == "## Empty\n\n\n"
+    assert "Exported 1 notes" in capsys.readouterr().out
+
+
+def test_memory_does_not_follow_archive_size(tmp_path):
+    note = {"title": "Big", "tasks": [task("x" * 200, children=[task("y" * 200, id=f"c{i}")], id=f"t{i}") for i in range(100)]}
+
+    def peak_for(notes):
+        path = str(tmp_path / f"db{notes}.json")
+        with NoteStreamWriter(path) as w:
+            for i in range(notes):
+                w.write_note(f"n{i}", note)
+        tracemalloc.start()
+        try:
+            export_db(path, str(tmp_path / "out.csv"))
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # Архив в 6 раз больше — пик памяти тот же (одна заметка и буферы чтения)
+    assert peak_for(60) < peak_for(10) * 1.5
+
+
+
+def test_export_waits_for_db_lock(db, tmp_path):
+    locked, errors = threading.Event(), []
+
+    def save_meanwhile():
+        # Другой поток = другой дескриптор блокировки, как запись стикера или инжектора
+        try:
+            with db_lock(db):
+                locked.set()
+                time.sleep(0.2)
+                rewrite_db(db, lambda note_id, note: None)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=save_meanwhile)
+    thread.start()
+    locked.wait()
+    # Экспорт снимает копию базы под блокировкой — уже после чужой записи
+    assert export_db(db, str(tmp_path / "out.md")) == 0
+    thread.join()
+    assert errors == [] and list(iter_notes(db)) == []
@@ -0,0 +1,120 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import task
+
+from db_stream import NoteStreamWriter, iter_notes
+from note_export import export_db
+from note_import import ImportFormatError, ImportWorker, import_into_db, iter_import
+
+NOTES = {
+    "n1": {"title": "Trip", "tasks": [task("Packing", children=[task("Passport", True), task("Umbrella", cancelled=True)], id="packing")]},
+    "n2": {"title": "Work", "tasks": [task("Release", True, children=[task("Build", True)]), task("Plan")]},
+}
+
+
+def shape(tasks):
+    return [(t["text"], t["checked"], t["cancelled"], shape(t["children"])) for t in tasks]
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "seshat_db.json")
+    with NoteStreamWriter(path, language="en") as w:
+        for note_id, note in NOTES.items():
+            w.write_note(note_id, note)
+    return path
+
+
+@pytest.mark.parametrize("ext", ["md", "opml", "csv"])
+def test_roundtrip_through_export(db, tmp_path, ext):
+    out = str(tmp_path / f"export.{ext}")
+    export_db(db, out)
+    notes = list(iter_import(out))
+    assert [title for title, _ in notes] == ["Trip", "Work"]
+    assert [shape(tasks) for _, tasks in notes] == [shape(n["tasks"]) for n in NOTES.values()]
+    if ext != "md":  # Markdown не хранит дату выполнения
+        assert notes[0][1][0]["children"][0]["done_date"] == "01.05.2024, 10:30"
+    assert notes[0][1][0]["id"] != "packing"  # Импорт выдает новые id
+
+
+def test_todo_txt_and_generic_formats(tmp_path):
+    [(title, tasks)] = iter_import(write(tmp_path, "todo.txt", "x 2024-05-01 2024-04-30 Pay rent\n(A) Call mom\n\n"))
+    assert title == "todo" and shape(tasks) == [("Pay rent", True, False, []), ("(A) Call mom", False, False, [])]
+
+    csv_path = write(tmp_path, "tasks.csv", "Task,Status,Level\nShip,,0\nTest,done,1\nDocs,cancelled,1\nOther,,0\n")
+    [(_, tasks)] = iter_import(csv_path)
+    assert shape(tasks) == [
+        ("Ship", False, False, [("Test", True, False, []), ("Docs", False, True, [])]),
+        ("Other", False, False, []),
+    ]
+
+    opml = (
+        '<?xml version="1.0"?><opml version="2.0"><head><title>Plan</title></head><body>'
+        '<outline text="A"><outline text="B" _complete="true"/></outline><outline title="C"/></body></opml>'
+    )
+    [(title, tasks)] = iter_import(write(tmp_path, "plan.opml", opml))
+    # Все дети A выполнены — A тоже
+    assert title == "Plan" and shape(tasks) == [("A", True, False, [("B", True, False, [])]), ("C", False, False, [])]
+
+    with pytest.raises(ImportFormatError):
+        list(iter_import(write(tmp_path, "bad.opml", "<opml><body><outline text='x'></body>")))
+    with pytest.raises(ImportFormatError):
+        list(iter_import(write(tmp_path, "bad.csv", "title,due\nx,y\n")))
+    with pytest.raises(ImportFormatError):
+        list(iter_import(write(tmp_path, "notes.docx", "")))
+
+
+def test_import_into_db_new_and_existing(db, tmp_path):
+    src = write(tmp_path, "list.md", "# Groceries\n- [ ] Milk\n- [x] Bread\n\n# Chores\n- [ ] Dishes\n")
+    reports = []
+    stats = import_into_db(db, src, progress=lambda done, total: reports.append((done, total)))
+    assert stats == {"notes": 2, "tasks": 3, "found": True}
+    notes = dict(iter_notes(db))
+    assert [n["title"] for n in notes.values()] == ["Trip", "Work", "Groceries", "Chores"]
+    assert list(notes.values())[2]["summary"]["total"] == 2
+    assert reports and reports == sorted(reports)
+
+    stats = import_into_db(db, src, target_id="n2")
+    tasks = dict(iter_notes(db))["n2"]["tasks"]
+    # Несколько заметок файла в одной заметке базы — по родительской задаче на заметку
+    assert stats["found"] and [t["text"] for t in tasks] == ["Release", "Plan", "Groceries", "Chores"]
+    assert not import_into_db(db, src, target_id="missing")["found"]
+
+
+def test_new_notes_are_one_write(open_db, tmp_path, monkeypatch):
+    dm = open_db()
+    writes = []
+    original = dm._write_db
+    monkeypatch.setattr(dm, "_write_db", lambda: (writes.append(1), original()))
+    notes = list(iter_import(write(tmp_path, "a.md", "# One\n- a\n# Two\n- b\n  - c\n")))
+
+    with dm.transaction():
+        ids = [dm.add_note(title, tasks) for title, tasks in notes]
+        dm.save_to_disk()
+    assert len(writes) == 1
+    with open(dm.filename, encoding="utf-8") as f:
+        saved = json.load(f)["notes"]
+    assert [saved[i]["title"] for i in ids] == ["One", "Two"]
+    assert [r[0] for r in dm.search.search("c")] == [ids[1]]
+
+
+def test_worker_reports_parser_errors(qapp, tmp_path):
+    # csv.Error (не OSError / ValueError) приходит сигналом, а не вылетает из потока
+    path = write(tmp_path, "big.csv", 'text\n"' + "x" * 200000 + '"\n')
+    worker = ImportWorker(path)
+    failed = []
+    worker.failed.connect(failed.append)
+    worker.run()
+    assert failed and "field limit" in failed[0]
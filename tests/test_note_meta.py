@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import task, write_db
+
+from note_meta import SUMMARY_VERSION, main
+
+
+def test_summary_updated_on_save_and_stored(open_db):
+    dm = open_db()
+    dm.save_current_state([task("a", checked=True), task("b"), task("c", cancelled=True)])
+
+    summary = dm.all_notes[dm.current_note_id]["summary"]
+    assert (summary["total"], summary["done"], summary["cancelled"], summary["open"]) == (3, 1, 1, 1)
+    assert summary["progress"] == 33
+
+    with open("seshat_db.json", encoding="utf-8") as f:
+        stored = json.load(f)["notes"][dm.current_note_id]["summary"]
+    assert stored == summary
+
+
+def test_missing_summary_is_computed_lazily(open_db):
+    write_db("seshat_db.json", {"old": {"title": "Old", "tasks": [task("x", checked=True)]}}, current_note_id="old")
+
+    dm = open_db()
+    assert "summary" not in dm.all_notes["old"]
+    assert dm.meta.get("old")["progress"] == 100
+    assert dm.all_notes["old"]["summary"]["v"] == SUMMARY_VERSION
+
+
+def test_rebuild_cli(tmp_path, capsys):
+    path = tmp_path / "db.json"
+    db = {
+        "language": "ru",
+        "notes": {
+            "a": {"title": "A", "tasks": [task("x"), task("y", checked=True)], "summary": {"v": 0}},
+            "b": {"title": "B", "tasks": []},
+        },
+    }
+    path.write_text(json.dumps(db), encoding="utf-8")
+
+    assert main(["--rebuild", str(path)]) == 0
+    assert "2 notes" in capsys.readouterr().out
+
+    notes = json.loads(path.read_text(encoding="utf-8"))["notes"]
+    assert notes["a"]["summary"]["progress"] == 50
+    assert notes["b"]["summary"]["total"] == 0
@@ -0,0 +1,88 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from conftest import task, write_db
+
+from db_snapshot import pack, read_snapshot
+from menu_logic import MenuLogic
+from note_store import LazyNotes
+
+
+@pytest.fixture
+def snapshot(open_db):
+    notes = {
+        f"n{i}": {"title": f"Note {i}", "tasks": [task(f"word{i} alpha", checked=i % 2 == 0), task("beta")]}
+        for i in range(5)
+    }
+    write_db("seshat_db.json", notes, current_note_id="n0")
+    pack("seshat_db.json", "seshat_db.snap")
+    os.remove("seshat_db.json")
+    return open_db
+
+
+def test_lazy_load_and_eviction(snapshot):
+    dm = snapshot()
+    store = dm.all_notes
+    assert isinstance(store, LazyNotes) and len(store) == 5
+    assert store.loaded_count() == 1  # Только текущая
+
+    # Списки читают метаданные из индекса снимка
+    metas = dm.meta.all()
+    assert [m["title"] for m in metas] == [f"Note {i}" for i in range(5)] and metas[2]["done"] == 1
+    assert store.loaded_count() == 1
+
+    dm.switch_note("n3")
+    assert store["n3"]["tasks"][0]["text"] == "word3 alpha" and store.is_loaded("n3")
+    assert store["n3"]["tasks"][0]["id"]  # id задач проставляются при декодировании
+
+    dm.rename_current("Renamed")
+    assert store.loaded_count() == 1 and store.is_loaded("n3")  # После записи в памяти только текущая
+    assert read_snapshot("seshat_db.snap")["notes"]["n3"]["title"] == "Renamed"
+    assert dm.meta.get("n3")["title"] == "Renamed"
+
+
+def test_delete_create_and_search(snapshot):
+    dm = snapshot()
+    assert not dm.search.loaded
+
+    dm.delete_note("n1")
+    dm.create_new_note()
+    new_id = dm.current_note_id
+    notes = snapshot().all_notes
+    assert "n1" not in notes and new_id in notes and len(notes) == 5
+
+    # Индекс строится при первом поиске и не оставляет заметки в памяти
+    assert [r[0] for r in dm.search.search("word4")] == ["n4"]
+    assert dm.all_notes.loaded_count() == 1
+
+
+class MapWindow:
+    default_accent = "#7c4dff"
+
+    def __init__(self, data):
+        self.data = data
+
+    def on_map_data_changed(self):
+        self.data.save_to_disk()
+
+
+def test_open_map_note_survives_switch(snapshot):
+    dm = snapshot()
+    logic = MenuLogic(MapWindow(dm))
+    logic.open_goal_map()
+    note = logic.map_window.note_data
+    dm.switch_note("n1")
+
+    # Карта по-прежнему правит n0: каждая правка сохраняется, а не только первая
+    for text in ("first", "second"):
+        note["tasks"].append(task(text))
+        logic.mw.on_map_data_changed()
+        assert dm.all_notes["n0"] is note
+    assert [t["text"] for t in snapshot().all_notes["n0"]["tasks"]][-2:] == ["first", "second"]
+
+    logic.force_close_map()
+    dm.save_to_disk()
+    assert dm.all_notes.loaded_count() == 1 and not dm.all_notes.is_loaded("n0")
@@ -0,0 +1,94 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+
+from outline_paste import OutlineWorker, is_outline, parse_outline
+from widgets import TaskInput
+
+
+def shape(tasks):
+    return [(t["text"], t["checked"], t["cancelled"], shape(t["children"])) for t in tasks]
+
+
+def test_markdown_and_indented_outline():
+    text = (
+        "# Trip\n"
+        "- [ ] Packing\n"
+        "    - [x] Passport\n"
+        "    * [-] Umbrella\n"
+        "\n"
+        "\t1. Tickets\n"
+        "- [x] Book hotel\n"
+        "Plain line\n"
+        "  indented child\n"
+    )
+    assert shape(parse_outline(text)) == [
+        ("Trip", False, False, []),
+        ("Packing", False, False, [
+            ("Passport", True, False, []),
+            ("Umbrella", False, True, []),
+            ("Tickets", False, False, []),
+        ]),
+        ("Book hotel", True, False, []),
+        ("Plain line", False, False, [("indented child", False, False, [])]),
+    ]
+    tasks = parse_outline(text)
+    assert tasks[1]["children"][0]["done_date"] and tasks[1]["done_date"] is None
+    assert len({t["id"] for t in tasks}) == len(tasks)
+
+
+def test_todo_txt_and_parent_state():
+    tasks = parse_outline(
+        "x 2024-05-01 2024-04-30 Pay rent +home\n"
+        "(A) 2024-04-30 Call mom @phone\n"
+        "Release\n"
+        "  x Build\n"
+        "  - [x] Publish\n"
+    )
+    assert shape(tasks) == [
+        ("Pay rent +home", True, False, []),
+        ("(A) Call mom @phone", False, False, []),
+        # Все дети выполнены — родитель тоже (как в дереве)
+        ("Release", True, False, [("Build", True, False, []), ("Publish", True, False, [])]),
+    ]
+    assert tasks[0]["done_date"] == "01.05.2024, 00:00"
+
+
+def test_input_routes_multiline_paste(qtbot):
+    inp = TaskInput()
+    qtbot.addWidget(inp)
+    pasted = []
+    inp.outlinePasted.connect(pasted.append)
+    clipboard = QApplication.clipboard()
+
+    clipboard.setText("one task")
+    assert not is_outline(clipboard.text())
+    qtbot.keyClick(inp, Qt.Key.Key_V, Qt.KeyboardModifier.ControlModifier)
+    assert inp.text() == "one task" and pasted == []
+
+    inp.clear()
+    clipboard.setText("- a\n- b")
+    qtbot.keyClick(inp, Qt.Key.Key_V, Qt.KeyboardModifier.ControlModifier)
+    assert inp.text() == "" and pasted == ["- a\n- b"]
+
+
+def test_worker_parses_off_gui_thread(qtbot):
+    gui = threading.get_ident()
+    threads = []
+
+    class Probe(OutlineWorker):
+        def run(self):
+            threads.append(threading.get_ident())
+            super().run()
+
+    worker = Probe("- a\n  - b")
+    with qtbot.waitSignal(worker.parsed) as blocker:
+        worker.start()
+    worker.wait()
+    assert threads and threads[0] != gui
+    assert shape(blocker.args[0]) == [("a", False, False, [("b", False, False, [])])]
@@ -0,0 +1,55 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from PyQt6.QtWidgets import QMenu, QPushButton
+
+import data_manager
+from menu_logic import MenuLogic
+
+
+def test_recent_notes_mru(open_db, monkeypatch):
+    monkeypatch.setattr(data_manager, "RECENT_LIMIT", 3)
+    dm = open_db()
+    first = dm.current_note_id
+    for _ in range(3):
+        dm.create_new_note()
+    assert len(dm.recent) == 3 and first not in dm.recent
+
+    dm.switch_note(first)
+    assert dm.recent[0] == first
+
+    dm.delete_note(first)
+    assert first not in dm.recent
+
+    # MRU survives a restart
+    expected = list(dm.recent)
+    assert open_db().recent == expected
+
+
+class MenuWindow:
+    """Mock main window for MenuLogic: data plus the bits the menu builder touches."""
+
+    def __init__(self, data):
+        self.data = data
+        self.default_accent = "#7c4dff"
+        self.menu_btn = QPushButton()
+
+
+def test_goto_actions_are_cached_until_titles_change(open_db):
+    dm = open_db()
+    dm.create_new_note()
+    logic = MenuLogic(MenuWindow(dm))
+    menu = QMenu()
+
+    logic._populate_goto(menu)
+    first = menu.actions()
+    logic._populate_goto(menu)
+    assert menu.actions() == first
+
+    dm.rename_current("Renamed")
+    logic._populate_goto(menu)
+    titles = [a.text() for a in menu.actions()]
+    assert titles[0] == "Renamed"
+    assert menu.actions() != first
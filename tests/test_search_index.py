@@ -0,0 +1,86 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import task
+
+from search_index import TITLE_KEY, SearchIndex, tokenize
+
+
+class FakeData:
+    """Минимальный DataManager: индексу нужны только filename, all_notes и current_note_id."""
+
+    def __init__(self, path, notes):
+        self.filename = str(path)
+        self.all_notes = notes
+        self.current_note_id = next(iter(notes), None)
+
+
+def make_index(tmp_path):
+    notes = {
+        "n1": {"title": "Покупки", "tasks": [task("Купить молоко", children=[task("Ёлка на Новый год", id="t2")], id="t1")]},
+        "n2": {"title": "İş planı", "tasks": [task("Toplantı hazırlığı", id="t3"), task("مُراجَعة التقرير", id="t4")]},
+    }
+    data = FakeData(tmp_path / "seshat_db.json", notes)
+    index = SearchIndex(data)
+    index.load()
+    return data, index
+
+
+def keys(results):
+    return {(nid, key) for nid, key, _ in results}
+
+
+def test_tokenize_folds_scripts():
+    assert tokenize("Ёлка") == ["елка"]
+    assert tokenize("İŞ PLANI") == ["is", "plani"]
+    assert tokenize("مُراجَعة") == tokenize("مراجعة")
+    assert tokenize("أحمد") == tokenize("احمد")
+
+
+def test_search_prefix_and_and_semantics(tmp_path):
+    _, index = make_index(tmp_path)
+    assert keys(index.search("елк")) == {("n1", "t2")}
+    assert keys(index.search("купить мол")) == {("n1", "t1")}
+    assert index.search("купить ёлка") == []
+    assert keys(index.search("toplanti")) == {("n2", "t3")}
+    assert keys(index.search("مراجعة")) == {("n2", "t4")}
+    assert keys(index.search("is plan")) == {("n2", TITLE_KEY)}
+
+
+def test_incremental_update_and_remove(tmp_path):
+    data, index = make_index(tmp_path)
+    data.all_notes["n1"]["tasks"][0]["text"] = "Купить хлеб"
+    data.all_notes["n1"]["tasks"].append(task("Позвонить маме", id="t5"))
+    index.update_note("n1")
+
+    assert index.search("молоко") == []
+    assert keys(index.search("хлеб")) == {("n1", "t1")}
+    assert keys(index.search("позв")) == {("n1", "t5")}
+    assert "молоко" not in index.postings
+
+    del data.all_notes["n2"]
+    index.remove_note("n2")
+    assert index.search("toplanti") == []
+
+
+def test_persisted_tokens_are_reused(tmp_path, monkeypatch):
+    data, index = make_index(tmp_path)
+    assert os.path.exists(index.filename)
+
+    data.all_notes["n2"]["tasks"][0]["text"] = "Yeni görev"
+    calls = []
+
+    import search_index
+
+    real = search_index.tokenize
+    monkeypatch.setattr(search_index, "tokenize", lambda text: calls.append(text) or real(text))
+
+    reloaded = SearchIndex(data)
+    reloaded.load()
+
+    # Перетокенизирована только измененная заметка n2
+    assert set(calls) == set(search_index._note_docs(data.all_notes["n2"]).values())
+    assert keys(reloaded.search("gorev")) == keys(reloaded.search("görev")) == {("n2", "t3")}
+    assert keys(reloaded.search("молоко")) == {("n1", "t1")}
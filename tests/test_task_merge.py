@@ -0,0 +1,145 @@
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import task
+
+from task_merge import ensure_task_ids, flatten, merge_databases, merge_tasks, stamp_modified
+
+
+def node(tid, children=()):
+    """Задача с id и mtime, как её видит слияние (текст — id заглавными)."""
+    return task(tid.upper(), children=children, id=tid, mtime=100)
+
+
+def shape(tasks):
+    """Дерево в виде (id, [дети]) для удобного сравнения."""
+    return [(t["id"], shape(t["children"])) for t in tasks]
+
+
+def by_id(tasks):
+    return {tid: rec for tid, rec in flatten(copy.deepcopy(tasks)).items()}
+
+
+def base_tree():
+    return [node("a", [node("a1")]), node("b"), node("c")]
+
+
+def test_independent_edits_merge_without_conflicts():
+    base = base_tree()
+    ours = copy.deepcopy(base)
+    theirs = copy.deepcopy(base)
+
+    # Мы переносим B внутрь A, они отмечают B выполненной и переименовывают C
+    b = ours.pop(1)
+    ours[0]["children"].append(b)
+    theirs[1]["checked"] = True
+    theirs[1]["done_date"] = "02.01.2025 12:00:00"
+    theirs[2]["text"] = "C renamed"
+
+    merged, conflicts = merge_tasks(base, ours, theirs)
+
+    assert conflicts == []
+    assert shape(merged) == [("a", [("a1", []), ("b", [])]), ("c", [])]
+    recs = by_id(merged)
+    assert recs["b"]["checked"] is True
+    assert recs["b"]["done_date"] == "02.01.2025 12:00:00"
+    assert recs["c"]["text"] == "C renamed"
+
+
+def test_delete_vs_modify_keeps_modified_task():
+    base = base_tree()
+    ours = [t for t in copy.deepcopy(base) if t["id"] != "c"]
+    theirs = copy.deepcopy(base)
+    theirs[2]["text"] = "C edited"
+
+    merged, conflicts = merge_tasks(base, ours, theirs)
+
+    assert by_id(merged)["c"]["text"] == "C edited"
+    assert [c["field"] for c in conflicts] == ["deleted"]
+
+
+def test_unmodified_delete_is_applied():
+    base = base_tree()
+    ours = [t for t in copy.deepcopy(base) if t["id"] != "c"]
+    merged, conflicts = merge_tasks(base, ours, copy.deepcopy(base))
+    assert "c" not in by_id(merged)
+    assert conflicts == []
+
+
+def test_true_conflict_resolved_by_mtime():
+    base = base_tree()
+    ours = copy.deepcopy(base)
+    theirs = copy.deepcopy(base)
+    ours[1].update(text="B ours", mtime=200)
+    theirs[1].update(text="B theirs", mtime=300)
+
+    merged, conflicts = merge_tasks(base, ours, theirs, note_id="n")
+
+    assert by_id(merged)["b"]["text"] == "B theirs"
+    assert conflicts[0]["field"] == "text"
+    assert conflicts[0]["chosen"] == "theirs"
+    assert conflicts[0]["note_id"] == "n"
+
+
+def test_crossing_moves_do_not_create_cycle():
+    base = [node("a"), node("b")]
+    ours = [node("a", [node("b")])]
+    theirs = [node("b", [node("a")])]
+
+    merged, conflicts = merge_tasks(base, ours, theirs)
+
+    assert set(by_id(merged)) == {"a", "b"}
+    assert any(c["chosen"] == "root (cycle)" for c in conflicts)
+
+
+def test_legacy_ids_are_deterministic():
+    legacy = [{"text": "X", "checked": False, "children": [{"text": "Y", "checked": False, "children": []}]}]
+    one, two = copy.deepcopy(legacy), copy.deepcopy(legacy)
+    assert ensure_task_ids(one, "note") == 2
+    ensure_task_ids(two, "note")
+    assert one == two
+    assert ensure_task_ids(one, "note") == 0
+
+
+def test_stamp_modified_only_touches_changed_tasks():
+    old = base_tree()
+    new = copy.deepcopy(old)
+    for t in new:
+        t.pop("mtime")
+    new[2]["text"] = "C2"
+
+    stamp_modified(old, new, now=999)
+
+    recs = by_id(new)
+    assert recs["a"]["mtime"] == 100
+    assert recs["c"]["mtime"] == 999
+
+
+def test_merge_databases_notes_added_and_deleted():
+    base = {"notes": {"n1": {"title": "N1", "tasks": base_tree()}, "n2": {"title": "N2", "tasks": []}}}
+    ours = copy.deepcopy(base)
+    theirs = copy.deepcopy(base)
+    del ours["notes"]["n2"]
+    theirs["notes"]["n3"] = {"title": "N3", "tasks": []}
+    theirs["notes"]["n1"]["title"] = "N1 theirs"
+
+    merged, conflicts = merge_databases(base, ours, theirs)
+
+    assert list(merged["notes"]) == ["n1", "n3"]
+    assert merged["notes"]["n1"]["title"] == "N1 theirs"
+    assert conflicts == []
+
+
+def test_duplicate_ids_match_across_versions():
+    # Копипаст в JSON: две задачи с одним id — во всех трех версиях одинаково
+    note = [task("A", id="d", mtime=100), task("B", id="d", mtime=100)]
+    snapshot = copy.deepcopy(note)
+
+    merged, conflicts = merge_tasks(note, copy.deepcopy(note), copy.deepcopy(note))
+
+    assert conflicts == [] and [t["text"] for t in merged] == ["A", "B"]
+    assert merged[0]["id"] == "d" and merged[1]["id"] != "d"
+    assert note == snapshot  # Входные задачи не меняются
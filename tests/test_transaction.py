@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import task, write_db
+
+
+@pytest.fixture
+def dm(open_db, monkeypatch):
+    notes = {nid: {"title": nid.upper(), "tasks": [task(f"{nid} task")]} for nid in ("a", "b")}
+    write_db("seshat_db.json", notes, current_note_id="a")
+    dm = open_db()
+    dm.writes = []
+    original = dm._write_db
+    monkeypatch.setattr(dm, "_write_db", lambda: (dm.writes.append(1), original()))
+    return dm
+
+
+def saved_notes():
+    with open("seshat_db.json", encoding="utf-8") as f:
+        return json.load(f)["notes"]
+
+
+def test_compound_action_is_one_write_and_one_undo_step(dm):
+    history_before = len(dm.history.history)
+    with dm.transaction():
+        dm.save_current_state([task("a task"), task("first")])
+        dm.save_current_state([task("a task"), task("first"), task("second")])
+        dm.rename_current("Renamed")
+        assert dm.writes == []
+    assert len(dm.writes) == 1
+    assert len(dm.history.history) == history_before + 1
+    assert [t["text"] for t in saved_notes()["a"]["tasks"]] == ["a task", "first", "second"]
+
+    # Сохранение текущей + новая заметка (MenuLogic.create_new_note)
+    with dm.transaction():
+        dm.save_current_state([task("a task")])
+        dm.create_new_note()
+    assert len(dm.writes) == 2 and len(saved_notes()) == 3
+
+
+def test_nested_rollback_keeps_outer_changes(dm):
+    with dm.transaction():
+        dm.rename_current("Outer")
+        with pytest.raises(RuntimeError):
+            with dm.transaction():
+                dm.delete_note("b")
+                dm.create_new_note()
+                raise RuntimeError("boom")
+        # Внутренняя откатилась: b на месте, новой заметки нет, текущая — a
+        assert list(dm.all_notes) == ["a", "b"] and dm.current_note_id == "a"
+        assert dm.all_notes["a"]["title"] == "Outer"
+    assert len(dm.writes) == 1 and saved_notes()["a"]["title"] == "Outer"
+
+
+def test_outer_rollback_restores_memory_and_skips_write(dm):
+    with pytest.raises(ValueError):
+        with dm.transaction():
+            dm.save_current_state([task("lost")])
+            dm.delete_note("a")
+            raise ValueError
+    assert dm.writes == []
+    assert dm.current_note_id == "a" and list(dm.all_notes) == ["a", "b"]
+    assert [t["text"] for t in dm.all_notes["a"]["tasks"]] == ["a task"]
+    assert [r[0] for r in dm.search.search("lost")] == []
+    assert [r[0] for r in dm.search.search("task")] == ["a", "b"]
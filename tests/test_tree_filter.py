@@ -0,0 +1,106 @@
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import task
+from PyQt6.QtWidgets import QLabel, QLineEdit
+
+from task_tree import DraggableTreeWidget
+from tree_core import TreeCore
+from tree_filter import TreeFilter
+from tree_io import TreeIO
+
+
+class Window:
+    def __init__(self, tree):
+        self.tree = tree
+        self.inp = QLineEdit()
+        self.title = QLabel()
+
+
+def load(tasks):
+    tree = DraggableTreeWidget(on_change_callback=None)
+    io = TreeIO(tree)
+    io.load_data(tasks)
+    return tree, io, TreeFilter(tree)
+
+
+def visible(tree):
+    """Тексты видимых строк в порядке обхода (скрытые вместе с поддеревом)."""
+    result = []
+    stack = [tree.topLevelItem(i) for i in reversed(range(tree.topLevelItemCount()))]
+    while stack:
+        item = stack.pop()
+        if item.isHidden():
+            continue
+        result.append(item.text(0))
+        stack.extend(item.child(i) for i in reversed(range(item.childCount())))
+    return result
+
+
+def make_tasks():
+    return [
+        task("Trip", children=[task("Passport", True), task("Umbrella", cancelled=True), task("Tickets")]),
+        task("Report", True, children=[task("Draft", True, done_date="10.06.2024, 09:00")]),
+        task("Archive", children=[task("Old", True, done_date="20.06.2024, 12:00")], expanded=False),
+    ]
+
+
+def test_modes_text_and_since(qtbot):
+    tree, _io, view_filter = load(make_tasks())
+    view_filter.mode = "open"
+    view_filter.apply()
+    # Родитель остается видимым ради подходящего потомка
+    assert visible(tree) == ["Trip", "Tickets", "Archive"]
+
+    view_filter.mode = "done"
+    view_filter.apply()
+    # Свернутая задача видна по данным невстроенных детей
+    assert visible(tree) == ["Trip", "Passport", "Report", "Draft", "Archive"]
+    assert tree.topLevelItem(2).childCount() == 0
+
+    view_filter.since = datetime(2024, 6, 1)
+    view_filter.apply()
+    assert visible(tree) == ["Report", "Draft", "Archive"]
+
+    view_filter.load({"mode": "cancelled", "text": "UMB"})
+    view_filter.apply()
+    assert visible(tree) == ["Trip", "Umbrella"]
+    assert view_filter.to_dict() == {"mode": "cancelled", "text": "UMB"}
+
+    view_filter.load({"mode": "bogus", "since": "31.02.2024"})
+    assert not view_filter.active and view_filter.to_dict() is None
+    view_filter.apply()
+    assert len(visible(tree)) == 7
+
+
+def test_edits_refresh_only_touched_rows(qtbot):
+    tree, io, view_filter = load(make_tasks())
+    view_filter.mode = "open"
+    view_filter.apply()
+    core = TreeCore(Window(tree), lambda: None, view_filter=view_filter)
+
+    trip = tree.topLevelItem(0)
+    tickets = trip.child(2)
+    core.set_checked([tickets], True)
+    # Родитель частично отмечен (зачеркнутая подзадача не выполнена) — он открыт и виден
+    assert visible(tree) == ["Trip", "Archive"]
+    core.set_checked([trip.child(1)], True)
+    assert visible(tree) == ["Archive"]  # Выполнено всё — родитель ушел вместе с детьми
+    core.set_checked([trip.child(1)], False)
+
+    core.set_checked([tickets], False)
+    assert visible(tree) == ["Trip", "Tickets", "Archive"]
+
+    core.add_task("Fresh")
+    assert visible(tree)[-1] == "Fresh"
+
+    archive = tree.topLevelItem(2)
+    archive.setExpanded(True)  # Дети строятся при раскрытии и сразу фильтруются
+    view_filter.refresh([archive])
+    assert archive.childCount() == 1 and archive.child(0).isHidden() and not archive.isHidden()
+
+    # Скрытые строки сохраняются как обычно
+    assert [t["text"] for t in io.collect_data()] == ["Trip", "Report", "Archive", "Fresh"]
@@ -0,0 +1,68 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import task
+
+from task_tree import DraggableTreeWidget
+from tree_hoist import TreeHoist
+from tree_io import TreeIO
+
+
+class Data:
+    def __init__(self, tasks):
+        self.current_note_id = "n1"
+        self.all_notes = {"n1": {"title": "Note", "tasks": tasks}}
+
+
+class Window:
+    def __init__(self, tasks):
+        self.data = Data(tasks)
+
+
+def make_tasks():
+    return [
+        task("Home", children=[
+            task("Clean", children=[task("Kitchen", id="kitchen"), task("Bath", True, id="bath")], id="clean"),
+            task("Shop", True, id="shop"),
+        ], id="home"),
+        task("Work", children=[task("Mail", id="mail")], id="work"),
+    ]
+
+
+def test_branch_splice_copies_only_the_path(qtbot):
+    tasks = make_tasks()
+    hoist = TreeHoist(Window(tasks))
+    hoist.enter(["home", "clean"])
+    assert hoist.active and [t["id"] for t in hoist.branch(tasks)] == ["kitchen", "bath"]
+    assert hoist.crumbs(tasks) == ["All tasks", "Home", "Clean"]
+
+    # В дереве — только ветка: её и собираем
+    io = TreeIO(DraggableTreeWidget(on_change_callback=None))
+    io.load_data(hoist.branch(tasks))
+    assert io.tree.topLevelItemCount() == 2
+    io.tree.topLevelItem(0).setCheckState(0, io.tree.topLevelItem(1).checkState(0))
+    result = hoist.splice(tasks, io.collect_data())
+
+    home, clean = result[0], result[0]["children"][0]
+    assert [c["checked"] for c in clean["children"]] == [True, True]
+    # Все дети выполнены — родители до корня тоже
+    assert clean["checked"] and home["checked"] and home["done_date"]
+    assert result[1] is tasks[1] and home["children"][1] is tasks[0]["children"][1]  # Вне пути — те же объекты
+    assert not tasks[0]["checked"] and not tasks[0]["children"][0]["checked"]  # Старое дерево не тронуто
+
+
+def test_lost_branch_or_other_note_drops_focus():
+    tasks = make_tasks()
+    window = Window(tasks)
+    hoist = TreeHoist(window)
+    hoist.enter(["work"])
+    window.data.current_note_id = "n2"
+    assert not hoist.active and hoist.branch(tasks) is tasks and hoist.path == []
+
+    window.data.current_note_id = "n1"
+    hoist.enter(["home", "gone"])
+    assert hoist.branch(tasks) is tasks and not hoist.active
+    hoist.enter(["home", "gone"])
+    assert hoist.splice(tasks, [task("New", id="new")])[-1]["id"] == "new"  # Ветку потеряли — задачи не теряем
@@ -1,16 +1,88 @@
 # tree_core.py
-from PyQt6.QtCore import QDateTime, Qt
-from PyQt6.QtGui import QBrush, QColor
+import heapq
+from contextlib import contextmanager
+
+from PyQt6.QtCore import QDateTime, QItemSelectionModel, Qt
 
 from localization import Loc
-from task_tree import TodoItem
+from task_tree import CHECKED, DIM_BRUSH, DONE_ROLE, PARTIAL, TEXT_BRUSH, UNCHECKED, TodoItem, has_checked
 
 
 class TreeCore:
-    def __init__(self, main_window, callback_save):
+    def __init__(self, main_window, callback_save, hoist=None, view_filter=None):
         self.mw = main_window
         self.tree = main_window.tree
         self.callback_save = callback_save  # Функция сохранения
+        self.hoist = hoist  # Фокус на ветке: пустое дерево — это пустая ветка, а не заметка
+        self.view_filter = view_filter  # TreeFilter: после правки пересчитываются только затронутые строки
+        self._batch_depth = 0
+        self._batch_dirty = False
+
+    # --- Групповые операции ---
+    @contextmanager
+    def batch(self):
+        """
+        Всё внутри — одна операция: одно сохранение, одна запись истории и один
+        пересчет прогресса в конце (вложенные batch() сохраняют на внешнем уровне).
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batch_dirty:
+                self._batch_dirty = False
+                self.callback_save()
+
+    def _refilter(self, items):
+        if self.view_filter is not None and self.view_filter.active:
+            self.view_filter.refresh(items)
+
+    def request_save(self):
+        if self._batch_depth:
+            self._batch_dirty = True
+        else:
+            self.callback_save()
+
+    def selected_items(self, roots_only=False):
+        """
+        Выделенные задачи в порядке дерева (без выделения — текущая).
+        roots_only: без задач, чей предок тоже выделен (они переезжают вместе с ним).
+        """
+        selected = self.tree.selectedItems()
+        if not selected:
+            current = self.tree.currentItem()
+            return [current] if current else []
+        if roots_only:
+            chosen = set(map(id, selected))
+            selected = [item for item in selected if not self._has_selected_ancestor(item, chosen)]
+        return sorted(selected, key=self._tree_position)
+
+    @staticmethod
+    def _has_selected_ancestor(item, chosen):
+        parent = item.parent()
+        while parent is not None:
+            if id(parent) in chosen:
+                return True
+            parent = parent.parent()
+        return False
+
+    def _tree_position(self, item):
+        path = []
+        while item is not None:
+            parent = item.parent()
+            path.append((parent or self.tree.invisibleRootItem()).indexOfChild(item))
+            item = parent
+        return path[::-1]
+
+    def _reselect(self, items):
+        """takeChild снимает выделение — возвращаем его перенесенным задачам."""
+        self.tree.clearSelection()
+        if not items:
+            return
+        self.tree.setCurrentItem(items[0], 0, QItemSelectionModel.SelectionFlag.NoUpdate)
+        for item in items:
+            item.setSelected(True)
 
     def add_task(self, text):
         if not text:
@@ -20,119 +92,306 @@ class TreeCore:
 
         item = TodoItem(self.tree, text)
         self.mw.inp.clear()
-        item.setForeground(0, QBrush(QColor("#e0e0e0")))
-        self.callback_save()
+        item.setForeground(0, TEXT_BRUSH)
+        self._refilter([item])
+        self.request_save()
 
     def delete_item(self, item):
-        parent = item.parent()
-        if parent:
-            parent.removeChild(item)
-            self.check_parent_state(parent)
-        else:
-            self.tree.takeTopLevelItem(self.tree.indexOfTopLevelItem(item))
+        self.delete_items([item])
+
+    def delete_items(self, items):
+        parents = []
+        for item in items:
+            parent = item.parent()
+            if parent:
+                parent.removeChild(item)
+                parents.append(parent)
+            else:
+                self.tree.takeTopLevelItem(self.tree.indexOfTopLevelItem(item))
 
-        if self.tree.topLevelItemCount() == 0:
+        # Родитель мог быть удален вместе с задачей (выделены оба)
+        with self._quiet():
+            parents = [parent for parent in parents if parent.treeWidget() is self.tree]
+            self._settle(parents)
+            self._refilter(parents)
+
+        if self.tree.topLevelItemCount() == 0 and not (self.hoist and self.hoist.active):
             self.mw.data.start_time = None
             self.mw.data.finish_time = None
             self.mw.title.setText(Loc.t("title_default"))
 
-        self.callback_save()
+        self.request_save()
+
+    def delete_selected(self):
+        self.delete_items(self.selected_items(roots_only=True))
+
+    @contextmanager
+    def _quiet(self):
+        """
+        Массовая правка без сигналов: ни itemChanged (повторного входа в
+        on_item_changed), ни dataChanged модели на каждый элемент — одна перерисовка в конце.
+        """
+        model = self.tree.model()
+        tree_blocked = self.tree.blockSignals(True)
+        model_blocked = model.blockSignals(True)
+        try:
+            yield
+        finally:
+            model.blockSignals(model_blocked)
+            self.tree.blockSignals(tree_blocked)
+            self.tree.viewport().update()
 
     def on_item_changed(self, item):
-        self.tree.blockSignals(True)
         state = item.checkState(0)
-        is_cancelled = getattr(item, "cancelled", False)
+        # Флажок на одной из выделенных задач отмечает всё выделение
+        selected = self.tree.selectedItems()
+        if item.isSelected() and len(selected) > 1:
+            self.set_checked(selected, state == Qt.CheckState.Checked)
+            return
 
-        # 1. Красим сам элемент
-        self._colorize_item(item, state, is_cancelled)
+        with self._quiet():
+            # Частичное состояние и состояние, совпадающее с детьми, — не клик по флажку
+            # (например, правка текста): поддерево уже согласовано
+            if state != PARTIAL and (
+                (item.childCount() == 0 and not item.pending) or state != self._state_from_children(item)
+            ):
+                self._apply_check(item, state, self._stamp())
+            if item.parent():
+                self._settle([item.parent()])
+            self._refilter([item])
+        self.request_save()
 
-        # 2. Красим детей
-        for i in range(item.childCount()):
-            child = item.child(i)
-            child.setCheckState(0, state)
-            c_canc = getattr(child, "cancelled", False)
-            self._colorize_item(child, state, c_canc)
+    @staticmethod
+    def _stamp():
+        return QDateTime.currentDateTime().toString("dd.MM.yyyy, HH:mm")
 
-        # 3. Проверяем родителя
-        parent = item.parent()
-        if parent:
-            self.check_parent_state(parent)
+    def _apply_check(self, item, state, stamp):
+        """Состояние задачи и всего поддерева (обход без рекурсии)."""
+        checked = state == CHECKED
+
+        def restate(task):
+            return {"checked": checked, "done_date": (task.get("done_date") or stamp) if checked else None}
+
+        item.setCheckState(0, state)
+        self._colorize_item(item, state, getattr(item, "cancelled", False), stamp)
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            if node.pending is not None:
+                node.pending = self._map_pending(node.pending, restate)
+                continue
+            for i in range(node.childCount()):
+                child = node.child(i)
+                if child.checkState(0) != state:
+                    child.setCheckState(0, state)
+                    self._colorize_item(child, state, getattr(child, "cancelled", False), stamp)
+                stack.append(child)
+
+    @classmethod
+    def _map_pending(cls, tasks, changes):
+        """
+        Копия еще не построенных задач свернутого поддерева с полями changes(task).
+        Словари из данных заметки не меняются: на них же ссылаются история и база.
+        """
+        return [
+            dict(task, **changes(task), children=cls._map_pending(task.get("children", []), changes))
+            for task in tasks
+        ]
+
+    @staticmethod
+    def _state_from_children(item):
+        """Выполнены все дети — Checked, ни одного — Unchecked, иначе PartiallyChecked."""
+        if item.pending is not None:
+            states = {
+                CHECKED if task.get("checked") else PARTIAL if has_checked(task.get("children", [])) else UNCHECKED
+                for task in item.pending
+            }
+        else:
+            states = {item.child(i).checkState(0) for i in range(item.childCount())}
+        if states == {CHECKED}:
+            return CHECKED
+        if not states or states == {UNCHECKED}:
+            return UNCHECKED
+        return PARTIAL
+
+    def _settle(self, parents, stamp=None):
+        """
+        Пересчитывает состояние родителей и их предков до корня за один проход:
+        глубокие раньше мелких, каждый предок — один раз, подъем останавливается,
+        когда состояние не изменилось.
+        """
+        stamp = stamp or self._stamp()
+        queue, queued = [], set()
+
+        def push(item):
+            if id(item) not in queued:
+                queued.add(id(item))
+                depth, parent = 0, item.parent()
+                while parent is not None:
+                    depth, parent = depth + 1, parent.parent()
+                heapq.heappush(queue, (-depth, len(queued), item))
+
+        for parent in parents:
+            push(parent)
+        while queue:
+            item = heapq.heappop(queue)[2]
+            state = self._state_from_children(item)
+            if state == item.checkState(0):
+                continue
+            item.setCheckState(0, state)
+            self._colorize_item(item, state, getattr(item, "cancelled", False), stamp)
+            if item.parent() is not None:
+                push(item.parent())
+
+    def set_checked(self, items, checked):
+        """Отметить / снять отметку у группы задач (с поддеревьями) одним сохранением."""
+        state = Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked
+        stamp = self._stamp()
+        with self._quiet():
+            for item in items:
+                self._apply_check(item, state, stamp)
+            self._settle([item.parent() for item in items if item.parent()], stamp)
+            self._refilter(items)
+        self.request_save()
 
-        self.tree.blockSignals(False)
-        self.callback_save()
+    def set_cancelled(self, items, cancelled):
+        """Зачеркнуть / восстановить группу задач вместе с поддеревьями одним сохранением."""
+        with self._quiet():
+            stack = list(items)
+            while stack:
+                item = stack.pop()
+                if getattr(item, "cancelled", False) != cancelled:
+                    item.cancelled = cancelled
+                    self._colorize_item(item, item.checkState(0), cancelled)
+                if item.pending is not None:
+                    item.pending = self._map_pending(item.pending, lambda _task: {"cancelled": cancelled})
+                    continue
+                stack.extend(item.child(i) for i in range(item.childCount()))
+            self._refilter(items)
+        self.request_save()
+        self.mw.refresh_map_if_open()
 
-    def _colorize_item(self, item, state, is_cancelled):
+    def _colorize_item(self, item, state, is_cancelled, stamp=None):
         if is_cancelled:
-            item.setForeground(0, QBrush(QColor("#606060")))
-        elif state == Qt.CheckState.Checked:
-            item.setForeground(0, QBrush(QColor("#606060")))
-            if not item.data(0, Qt.ItemDataRole.UserRole):
-                item.setData(
-                    0,
-                    Qt.ItemDataRole.UserRole,
-                    QDateTime.currentDateTime().toString("dd.MM.yyyy, HH:mm"),
-                )
+            item.setForeground(0, DIM_BRUSH)
+        elif state == CHECKED:
+            item.setForeground(0, DIM_BRUSH)
+            if not item.data(0, DONE_ROLE):
+                item.setData(0, DONE_ROLE, stamp or self._stamp())
         else:
-            item.setForeground(0, QBrush(QColor("#e0e0e0")))
-            item.setData(0, Qt.ItemDataRole.UserRole, None)
+            item.setForeground(0, TEXT_BRUSH)
+            item.setData(0, DONE_ROLE, None)
 
-    def check_parent_state(self, parent):
-        if parent.childCount() == 0:
-            parent.setCheckState(0, Qt.CheckState.Unchecked)
-            return
+    # --- Навигация (текущая задача или всё выделение) ---
+    def _parent_of(self, item):
+        return item.parent() or self.tree.invisibleRootItem()
+
+    def _reinsert(self, item, parent, row):
+        """
+        Переносит задачу (тот же объект, с поддеревом) под parent на место row.
+        takeChild сворачивает поддерево во view — раскрытые задачи раскрываются снова.
+        """
+        expanded = []
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            if node.childCount() and node.isExpanded():
+                expanded.append(node)
+                stack.extend(node.child(i) for i in range(node.childCount()))
+        source = self._parent_of(item)
+        parent.insertChild(row, source.takeChild(source.indexOfChild(item)))
+        blocked = self.tree.blockSignals(True)  # itemExpanded: дети уже построены
+        try:
+            for node in expanded:
+                node.setExpanded(True)
+        finally:
+            self.tree.blockSignals(blocked)
 
-        all_checked = True
-        for i in range(parent.childCount()):
-            if parent.child(i).checkState(0) != Qt.CheckState.Checked:
-                all_checked = False
-                break
+    def move_to(self, parent, row=None):
+        """
+        Перенос выделенных задач под parent на место row (None — в конец): бросок
+        при перетаскивании. Одна операция — одно сохранение и один шаг undo.
+        """
+        items = self.selected_items(roots_only=True)
+        chosen = set(map(id, items))
+        ancestor = parent
+        while ancestor is not None:
+            if id(ancestor) in chosen:
+                return  # Задачу нельзя вложить в саму себя
+            ancestor = ancestor.parent()
+        if isinstance(parent, TodoItem):
+            parent.ensure_children()  # Бросок внутрь свернутой: после её настоящих детей
+        if row is None:
+            row = parent.childCount()
 
-        new_state = Qt.CheckState.Checked if all_checked else Qt.CheckState.Unchecked
-        parent.setCheckState(0, new_state)
-        # Красим родителя после смены статуса
-        p_canc = getattr(parent, "cancelled", False)
-        self._colorize_item(parent, new_state, p_canc)
+        before = [(id(self._parent_of(item)), self._parent_of(item).indexOfChild(item)) for item in items]
+        old_parents = [item.parent() for item in items]
+        for item in items:
+            source = self._parent_of(item)
+            if source is parent and source.indexOfChild(item) < row:
+                row -= 1  # Задача уходит из-под места вставки
+            self._reinsert(item, parent, row)
+            row += 1
+        self._reselect(items)
+        if before == [(id(self._parent_of(item)), self._parent_of(item).indexOfChild(item)) for item in items]:
+            return  # Бросили на то же место
+        if isinstance(parent, TodoItem):
+            parent.setExpanded(True)
+        with self._quiet():
+            # Опустевший родитель, как при удалении, становится обычной невыполненной задачей
+            self._settle([p for p in old_parents + [parent] if isinstance(p, TodoItem)])
+            self._refilter(items + old_parents)
+        self.request_save()
 
-    # --- Навигация ---
     def move_vertical(self, direction):
-        item = self.tree.currentItem()
-        if not item:
+        items = self.selected_items(roots_only=True)
+        if not items:
             return
-        parent = item.parent()
-        target = parent if parent else self.tree.invisibleRootItem()
-        idx = target.indexOfChild(item)
-        new_idx = idx + direction
-        if 0 <= new_idx < target.childCount():
-            taken = target.takeChild(idx)
-            target.insertChild(new_idx, taken)
-            self.tree.setCurrentItem(taken)
-            self.callback_save()
+        moved = set(map(id, items))
+        changed = False
+        # Первыми двигаются задачи с переднего края: выделенный сосед на пути,
+        # оставшийся на месте, уперся в край — тогда стоит и эта задача
+        for item in items if direction < 0 else reversed(items):
+            target = self._parent_of(item)
+            idx = target.indexOfChild(item)
+            new_idx = idx + direction
+            if not 0 <= new_idx < target.childCount() or id(target.child(new_idx)) in moved:
+                continue
+            self._reinsert(item, target, new_idx)
+            changed = True
+        self._reselect(items)
+        if changed:
+            self.request_save()
 
     def indent(self):
-        item = self.tree.currentItem()
-        if not item:
-            return
-        parent = item.parent()
-        target = parent if parent else self.tree.invisibleRootItem()
-        idx = target.indexOfChild(item)
-        if idx == 0:
-            return
-        new_parent = target.child(idx - 1)
-        taken = target.takeChild(idx)
-        new_parent.addChild(taken)
-        new_parent.setExpanded(True)
-        self.tree.setCurrentItem(taken)
-        self.callback_save()
+        items = self.selected_items(roots_only=True)
+        old_parents = [item.parent() for item in items]
+        changed = False
+        for item in items:
+            target = self._parent_of(item)
+            idx = target.indexOfChild(item)
+            if idx == 0:
+                continue
+            # Следующие выделенные задачи уходят к тому же новому родителю
+            new_parent = target.child(idx - 1)
+            new_parent.ensure_children()  # Задача встает после настоящих детей свернутого соседа
+            self._reinsert(item, new_parent, new_parent.childCount())
+            new_parent.setExpanded(True)
+            changed = True
+        self._reselect(items)
+        if changed:
+            self._refilter(items + old_parents)
+            self.request_save()
 
     def unindent(self):
-        item = self.tree.currentItem()
-        if not item or not item.parent():
-            return
-        parent = item.parent()
-        grand = parent.parent()
-        target = grand if grand else self.tree.invisibleRootItem()
-        p_idx = target.indexOfChild(parent)
-        taken = parent.takeChild(parent.indexOfChild(item))
-        target.insertChild(p_idx + 1, taken)
-        self.tree.setCurrentItem(taken)
-        self.callback_save()
+        items = [item for item in self.selected_items(roots_only=True) if item.parent()]
+        old_parents = [item.parent() for item in items]
+        # С конца: каждая следующая встает сразу за родителем, порядок сохраняется
+        for item in reversed(items):
+            parent = item.parent()
+            target = self._parent_of(parent)
+            self._reinsert(item, target, target.indexOfChild(parent) + 1)
+        self._reselect(items)
+        if items:
+            self._refilter(items + old_parents)
+            self.request_save()
@@ -0,0 +1,150 @@
+# tree_filter.py
+"""
+Фильтр вида: только открытые / выполненные / зачеркнутые задачи, поиск по тексту,
+выполненные начиная с даты.
+
+QTreeWidget не принимает прокси-модель (модель у него своя и закрытая), поэтому
+фильтр прячет строки через setHidden: скрытые строки не раскладываются и не
+рисуются, а дерево не перестраивается. Строка видна, если подходит сама или
+подходит кто-то из потомков (чтобы был виден путь к ней). После правки пересчитываются
+только затронутые поддеревья и их предки (refresh), а не всё дерево.
+"""
+from datetime import datetime
+
+from note_export import parse_done_date
+from task_tree import CHECKED, DONE_ROLE
+
+MODES = ("all", "open", "done", "cancelled")
+SINCE_FORMAT = "%d.%m.%Y"
+
+
+class TreeFilter:
+    def __init__(self, tree):
+        self.tree = tree
+        self.mode = "all"
+        self.text = ""
+        self.since = None  # datetime: выполненные не раньше этого дня
+
+    @property
+    def active(self):
+        return self.mode != "all" or bool(self.text) or self.since is not None
+
+    # --- Состояние (хранится в заметке) ---
+
+    def to_dict(self):
+        """Для заметки: None, если фильтра нет."""
+        if not self.active:
+            return None
+        state = {"mode": self.mode, "text": self.text}
+        if self.since is not None:
+            state["since"] = self.since.strftime(SINCE_FORMAT)
+        return state
+
+    def load(self, state):
+        """Фильтр из заметки (битое или пустое значение — без фильтра)."""
+        state = state if isinstance(state, dict) else {}
+        mode = state.get("mode")
+        self.mode = mode if mode in MODES else "all"
+        self.text = state.get("text") if isinstance(state.get("text"), str) else ""
+        try:
+            self.since = datetime.strptime(state["since"], SINCE_FORMAT)
+        except (KeyError, TypeError, ValueError):
+            self.since = None
+
+    # --- Условие ---
+
+    def _matches(self, checked, cancelled, text, done_date):
+        if self.mode == "open" and (checked or cancelled):
+            return False
+        if self.mode == "done" and (not checked or cancelled):
+            return False
+        if self.mode == "cancelled" and not cancelled:
+            return False
+        if self.text and self.text.casefold() not in text.casefold():
+            return False
+        if self.since is not None:
+            done = parse_done_date(done_date) if checked and not cancelled else None
+            if done is None or done < self.since:
+                return False
+        return True
+
+    def matches_item(self, item):
+        return self._matches(
+            item.checkState(0) == CHECKED,
+            getattr(item, "cancelled", False),
+            item.text(0),
+            item.data(0, DONE_ROLE),
+        )
+
+    def matches_data(self, tasks):
+        """Подходит ли хоть одна задача из данных (дети свернутой задачи, еще не построенные)."""
+        stack = list(tasks)
+        while stack:
+            task = stack.pop()
+            if self._matches(
+                task.get("checked", False), task.get("cancelled", False), task.get("text", ""), task.get("done_date")
+            ):
+                return True
+            stack.extend(task.get("children", []))
+        return False
+
+    # --- Применение ---
+
+    def _update(self, item):
+        """Видимость одной задачи по ней самой и уже посчитанным детям. True — изменилась."""
+        if self.active:
+            visible = self.matches_item(item)
+            if not visible:
+                pending = getattr(item, "pending", None)
+                if pending:
+                    visible = self.matches_data(pending)
+                else:
+                    visible = any(not item.child(i).isHidden() for i in range(item.childCount()))
+        else:
+            visible = True
+        if item.isHidden() == visible:
+            item.setHidden(not visible)
+            return True
+        return False
+
+    def _update_subtree(self, item):
+        """Дети раньше родителей (обход без рекурсии)."""
+        order = []
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.child(i) for i in range(node.childCount()))
+        for node in reversed(order):
+            self._update(node)
+
+    def apply(self):
+        """Полный проход (загрузка заметки, смена фильтра)."""
+        root = self.tree.invisibleRootItem()
+        for i in range(root.childCount()):
+            self._update_subtree(root.child(i))
+
+    def refresh(self, items):
+        """
+        Пересчет после правки: поддеревья items и их предки до корня. Предков
+        проходим целиком: их собственная отметка могла поменяться вместе с детьми.
+        """
+        ancestors = {}
+        for item in items:
+            if item is None or item.treeWidget() is not self.tree:
+                continue
+            self._update_subtree(item)
+            parent = item.parent()
+            while parent is not None:
+                ancestors[id(parent)] = parent
+                parent = parent.parent()
+        # Глубокие раньше мелких: видимость родителя зависит от детей
+        for parent in sorted(ancestors.values(), key=self._depth, reverse=True):
+            self._update(parent)
+
+    @staticmethod
+    def _depth(item):
+        depth = 0
+        while item.parent() is not None:
+            depth, item = depth + 1, item.parent()
+        return depth
@@ -0,0 +1,91 @@
+# tree_hoist.py
+from localization import Loc
+from outline_paste import now_stamp
+
+
+class TreeHoist:
+    """
+    Фокус на ветке: дерево показывает только детей выбранной задачи.
+
+    Ветка задается путем из id задач от корня заметки. Сохранение собирает из
+    дерева только ветку и вклеивает её на место (splice): копируются лишь задачи
+    на пути, остальное дерево заметки переиспользуется как есть.
+    """
+
+    def __init__(self, main_window):
+        self.mw = main_window
+        self.path = []  # id задач от корня заметки до выбранной
+        self.note_id = None
+
+    @property
+    def active(self):
+        return bool(self.path) and self.note_id == self.mw.data.current_note_id
+
+    def enter(self, path):
+        self.path = list(path)
+        self.note_id = self.mw.data.current_note_id
+
+    def leave(self, depth=0):
+        """Подняться: остаются первые depth звеньев пути (0 — вся заметка)."""
+        self.path = self.path[:depth]
+
+    def resolve(self, tasks):
+        """Цепочка задач от корня до выбранной или None, если ветки больше нет."""
+        chain = []
+        siblings = tasks
+        for task_id in self.path:
+            task = next((t for t in siblings if t.get("id") == task_id), None)
+            if task is None:
+                return None
+            chain.append(task)
+            siblings = task.get("children", [])
+        return chain
+
+    def branch(self, tasks):
+        """Задачи для дерева: дети выбранной задачи (фокус снимается, если её больше нет)."""
+        if not self.active:
+            self.path = []
+            return tasks
+        chain = self.resolve(tasks)
+        if chain is None:  # Задачу удалили (undo, карта, другой процесс)
+            self.path = []
+            return tasks
+        return chain[-1].get("children", [])
+
+    def splice(self, tasks, branch):
+        """
+        Новый список задач заметки с веткой branch на месте детей выбранной задачи.
+        Задачи на пути копируются (старый список остается истории и stamp_modified),
+        их отметка пересчитывается по детям — как TreeCore._settle в полном дереве.
+        """
+        chain = self.resolve(tasks)
+        if chain is None:
+            # Ветку потеряли между загрузкой и сохранением — задачи не теряем
+            self.path = []
+            return tasks + branch
+
+        result = list(tasks)
+        siblings = result
+        copies = []
+        for task in chain:
+            index = next(i for i, t in enumerate(siblings) if t is task)
+            copy = siblings[index] = dict(task, children=list(task.get("children", [])))
+            copies.append(copy)
+            siblings = copy["children"]
+        copies[-1]["children"] = branch
+
+        stamp = now_stamp()
+        for task in reversed(copies):
+            children = task["children"]
+            checked = bool(children) and all(child.get("checked") for child in children)
+            if children and checked != task.get("checked", False):
+                task["checked"] = checked
+                task["done_date"] = (task.get("done_date") or stamp) if checked else None
+        return result
+
+    def crumbs(self, tasks):
+        """Подписи хлебных крошек: заметка, затем задачи пути."""
+        chain = self.resolve(tasks) if self.active else None
+        if not chain:
+            return []
+        return [Loc.t("hoist_root", "All tasks")] + [task.get("text", "") for task in chain]
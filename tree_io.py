@@ -1,14 +1,27 @@
 # tree_io.py
 from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QBrush, QColor
+from PyQt6.QtWidgets import QTreeWidgetItemIterator
 
+from perf import Perf
+from task_merge import new_task_id
 from task_tree import TodoItem
 
 
+def _contains(tasks, task_id):
+    stack = list(tasks)
+    while stack:
+        task = stack.pop()
+        if task.get("id") == task_id:
+            return True
+        stack.extend(task.get("children", []))
+    return False
+
+
 class TreeIO:
     def __init__(self, tree_widget):
         self.tree = tree_widget
 
+    @Perf.timed("tree.collect_data")
     def collect_data(self):
         """Собирает всё дерево в список словарей"""
         return self._collect_recursive(self.tree.invisibleRootItem())
@@ -17,38 +30,53 @@ class TreeIO:
         tasks = []
         for i in range(parent_item.childCount()):
             item = parent_item.child(i)
+            if not getattr(item, "task_id", None):
+                item.task_id = new_task_id()
+            pending = getattr(item, "pending", None)
             tasks.append(
                 {
+                    "id": item.task_id,
                     "text": item.text(0),
                     "checked": item.checkState(0) == Qt.CheckState.Checked,
                     "done_date": item.data(0, Qt.ItemDataRole.UserRole),
                     "cancelled": getattr(item, "cancelled", False),
-                    "children": self._collect_recursive(item),
+                    # Свернутое поддерево не строилось — его данные уходят как есть
+                    "expanded": pending is None and item.isExpanded(),
+                    "children": pending if pending is not None else self._collect_recursive(item),
                 }
             )
         return tasks
 
+    def find_item(self, task_id):
+        """Ищет элемент дерева по стабильному id задачи (достраивая свернутые поддеревья на пути)"""
+        while True:
+            lazy = None
+            it = QTreeWidgetItemIterator(self.tree)
+            while it.value():
+                item = it.value()
+                if getattr(item, "task_id", None) == task_id:
+                    return item
+                pending = getattr(item, "pending", None)
+                if lazy is None and pending and _contains(pending, task_id):
+                    lazy = item
+                it += 1
+            if lazy is None:
+                return None
+            lazy.ensure_children()
+
+    @Perf.timed("tree.load_data")
     def load_data(self, tasks_data):
         """Очищает дерево и строит его заново из данных"""
         self.tree.blockSignals(True)
         self.tree.clear()
         for task_data in tasks_data:
-            self._build_item_recursive(task_data, self.tree)
+            TodoItem.from_data(self.tree, task_data)
         self.tree.blockSignals(False)
 
-    def _build_item_recursive(self, data, parent):
-        item = TodoItem(parent, data["text"], data.get("done_date"), data.get("cancelled", False))
-
-        state = Qt.CheckState.Checked if data["checked"] else Qt.CheckState.Unchecked
-        item.setCheckState(0, state)
-
-        # Красим сразу при загрузке
-        if data.get("cancelled", False):
-            item.setForeground(0, QBrush(QColor("#606060")))
-        elif state == Qt.CheckState.Checked:
-            item.setForeground(0, QBrush(QColor("#606060")))
-        else:
-            item.setForeground(0, QBrush(QColor("#e0e0e0")))
-
-        for child in data.get("children", []):
-            self._build_item_recursive(child, item)
+    @Perf.timed("tree.append_data")
+    def append_data(self, tasks_data):
+        """Дописывает задачи в конец дерева (вставка списка), без сигналов на каждую. Возвращает новые корни"""
+        self.tree.blockSignals(True)
+        items = [TodoItem.from_data(self.tree, task_data) for task_data in tasks_data]
+        self.tree.blockSignals(False)
+        return items
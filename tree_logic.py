@@ -1,8 +1,14 @@
 # tree_logic.py
+from PyQt6.QtCore import QDateTime
+
 from localization import Loc
+from outline_paste import OutlineWorker
+from perf import Perf
 from tree_core import TreeCore
+from tree_filter import TreeFilter
+from tree_hoist import TreeHoist
 
-# Импортируем наши 4 модуля
+# Импортируем наши модули
 from tree_io import TreeIO
 from tree_menu import TreeMenu
 from tree_progress import TreeProgress
@@ -14,19 +20,30 @@ class TreeLogic:
 
         # 1. Инициализируем модули
         self.io = TreeIO(main_window.tree)
-        self.progress = TreeProgress(main_window)
+        self.hoist = TreeHoist(main_window)
+        self.progress = TreeProgress(main_window, self.hoist)
+        self.filter = TreeFilter(main_window.tree)
 
         # Core нужно передать функцию сохранения, так как она вызывается отовсюду
-        self.core = TreeCore(main_window, callback_save=self.save_and_update)
+        self.core = TreeCore(
+            main_window, callback_save=self.save_and_update, hoist=self.hoist, view_filter=self.filter
+        )
+        # Дети свернутой задачи строятся при раскрытии — фильтруем их тогда же
+        main_window.tree.itemExpanded.connect(self._filter_expanded)
 
         self.menu = TreeMenu(main_window, self.core)
+        self._outline_workers = set()
 
     # --- Главные методы (Facade) ---
 
+    @Perf.timed("tree.save_and_update")
     def save_and_update(self):
         """Главная точка синхронизации: UI -> Data -> UI"""
         # 1. Собираем данные
         tasks = self.io.collect_data()
+        if self.hoist.active:
+            # В дереве только ветка — вклеиваем её на место в полном дереве заметки
+            tasks = self.hoist.splice(self._note_tasks(), tasks)
         # 2. Сохраняем в менеджер данных
         self.mw.data.save_current_state(tasks)
         # 3. Обновляем прогрессбар
@@ -34,20 +51,113 @@ class TreeLogic:
         # 4. Обновляем заголовок
         self.update_title_ui()
 
+    def _note_tasks(self):
+        return self.mw.data.all_notes.get(self.mw.data.current_note_id, {}).get("tasks", [])
+
     def refresh_ui_from_data(self):
-        """Загрузка: Data -> UI"""
-        note_data = self.mw.data.all_notes.get(self.mw.data.current_note_id, {})
-        tasks = note_data.get("tasks", [])
-        self.io.load_data(tasks)
+        """Загрузка: Data -> UI (в фокусе — только ветка)"""
+        tasks = self._note_tasks()
+        self.io.load_data(self.hoist.branch(tasks))
+        self.mw.crumbs.set_path(self.hoist.crumbs(tasks))
+        note = self.mw.data.all_notes.get(self.mw.data.current_note_id, {})
+        self.filter.load(note.get("view_filter"))
+        if self.filter.active:
+            self.filter.apply()
+        self._update_filter_bar()
         self.progress.calculate_and_update()
         self.update_title_ui()
 
+    # --- Фильтр вида ---
+
+    def set_filter(self, mode=None, text=None, since=None, clear=False):
+        """
+        Меняет фильтр текущей заметки (None — параметр как был, clear — снять всё).
+        Прячет строки без перестройки дерева и запоминает фильтр в заметке.
+        """
+        if clear:
+            self.filter.load(None)
+        else:
+            if mode is not None:
+                self.filter.mode = mode
+            if text is not None:
+                self.filter.text = text.strip()
+            if since is not None:
+                self.filter.since = since or None  # False — снять дату
+        self.filter.apply()
+        self.mw.data.set_view_filter(self.filter.to_dict())
+        self._update_filter_bar()
+
+    def _filter_expanded(self, item):
+        if self.filter.active:
+            self.filter.refresh([item])
+
+    def _update_filter_bar(self):
+        bar = self.mw.filter_bar
+        bar.setVisible(self.filter.active)
+        if self.filter.active:
+            parts = [Loc.t(f"filter_{self.filter.mode}")] if self.filter.mode != "all" else []
+            if self.filter.text:
+                parts.append(f"\"{self.filter.text}\"")
+            if self.filter.since is not None:
+                parts.append(f"≥ {self.filter.since.strftime('%d.%m.%Y')}")
+            bar.setText(Loc.t("filter_bar", "Filter: {f}  ✕").format(f=", ".join(parts)))
+
+    # --- Фокус на ветке ---
+
+    def hoist_item(self, item=None):
+        """Показывать только поддерево задачи (по умолчанию — текущей)"""
+        item = item or self.mw.tree.currentItem()
+        if item is None:
+            return
+        chain = []
+        while item is not None:
+            chain.append(item)
+            item = item.parent()
+        if not all(getattr(i, "task_id", None) for i in chain):
+            self.save_and_update()  # Новым задачам id выдаются при сборе данных
+        path = self.hoist.path if self.hoist.active else []
+        self.hoist.enter(path + [i.task_id for i in reversed(chain)])
+        self.refresh_ui_from_data()
+
+    def hoist_up(self, depth=None):
+        """Подняться по хлебным крошкам (по умолчанию — на уровень выше)"""
+        if not self.hoist.active:
+            return
+        path = self.hoist.path
+        self.hoist.leave(len(path) - 1 if depth is None else depth)
+        self.refresh_ui_from_data()
+        # Задача, из которой вышли, остается под курсором
+        self.select_task(path[len(self.hoist.path)])
+
+    def select_task(self, task_id):
+        """Выделяет задачу по id, раскрывая родителей и прокручивая к ней"""
+        item = self.io.find_item(task_id)
+        if item is None and self.hoist.active:
+            # Задача вне ветки — снимаем фокус
+            self.hoist.leave()
+            self.refresh_ui_from_data()
+            item = self.io.find_item(task_id)
+        if item is None:
+            return False
+        parent = item.parent()
+        while parent:
+            parent.setExpanded(True)
+            parent = parent.parent()
+        self.mw.tree.setCurrentItem(item)
+        self.mw.tree.scrollToItem(item)
+        return True
+
     def update_title_ui(self):
         if self.mw.data.current_note_id:
             title = self.mw.data.all_notes[self.mw.data.current_note_id].get(
                 "title", Loc.t("title_default")
             )
+            chain = self.hoist.resolve(self._note_tasks()) if self.hoist.active else None
+            if chain:
+                title = chain[-1].get("text", title)  # В фокусе — задача, чей прогресс на полосе
             self.mw.title.setText(title)
+            if hasattr(self.mw, "menu_logic"):
+                self.mw.menu_logic.update_tray_tooltip()
 
     # --- Проброс событий (Proxy) ---
     # App.py и InputLogic будут дергать эти методы, а мы перекинем их в Core или Menu
@@ -56,15 +166,48 @@ class TreeLogic:
         text = self.mw.inp.text().strip()
         self.core.add_task(text)
 
+    def paste_outline(self, text):
+        """Многострочная вставка: разбор в фоне, затем вставка одной операцией"""
+        worker = OutlineWorker(text)
+        note_id = self.mw.data.current_note_id
+        worker.parsed.connect(lambda tasks: self._insert_outline(note_id, tasks))
+        # Держим ссылку, пока поток работает (иначе Python удалит QThread на ходу)
+        self._outline_workers.add(worker)
+        worker.finished.connect(lambda: self._outline_workers.discard(worker))
+        worker.start()
+
+    def _insert_outline(self, note_id, tasks):
+        if note_id == self.mw.data.current_note_id:  # Пока шел разбор, могли открыть другую заметку
+            self.append_tasks(tasks)
+
+    @Perf.timed("tree.append_tasks")
+    def append_tasks(self, tasks):
+        """Дописывает готовые задачи в конец текущей заметки (вставка списка, импорт)"""
+        if not tasks:
+            return
+        if self.mw.tree.topLevelItemCount() == 0 and not self.mw.data.start_time:
+            self.mw.data.start_time = QDateTime.currentDateTime()
+        items = self.io.append_data(tasks)
+        if self.filter.active:
+            self.filter.refresh(items)
+        # Одно сохранение — одна запись истории на всю вставку
+        self.core.request_save()
+
     def delete_item(self, item):
         self.core.delete_item(item)
 
+    def delete_selected(self):
+        self.core.delete_selected()
+
     def on_item_changed(self, item, col):
         self.core.on_item_changed(item)
 
     def show_context_menu(self, pos):
         self.menu.show(pos)
 
+    def drop_items(self, parent, row):
+        self.core.move_to(parent, row)
+
     def move_item_vertical(self, direction):
         self.core.move_vertical(direction)
 
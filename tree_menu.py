@@ -1,6 +1,7 @@
 # tree_menu
+from contextlib import ExitStack
 
-from PyQt6.QtWidgets import QMenu
+from PyQt6.QtWidgets import QAbstractItemView, QMenu
 
 from localization import Loc
 from task_tree import TodoItem
@@ -25,6 +26,12 @@ class TreeMenu:
             QMenu::item:selected { background-color: #7c4dff; color: white; }
         """)
 
+        # Клик по одной из нескольких выделенных задач — меню для всей группы
+        if item.isSelected() and len(self.mw.tree.selectedItems()) > 1:
+            self._fill_bulk_menu(menu)
+            menu.exec(self.mw.tree.viewport().mapToGlobal(position))
+            return
+
         # 1. Удаление
         menu.addAction(Loc.t("ctx_delete")).triggered.connect(lambda: self.core.delete_item(item))
 
@@ -48,20 +55,53 @@ class TreeMenu:
         # 3. Подзадача
         menu.addAction(Loc.t("ctx_subtask")).triggered.connect(lambda: self._add_sub(item))
 
+        # 4. Фокус на ветке
+        menu.addAction(Loc.t("ctx_hoist", "Focus on this task")).triggered.connect(
+            lambda: self.mw.tree_logic.hoist_item(item)
+        )
+
         menu.exec(self.mw.tree.viewport().mapToGlobal(position))
 
-    def _toggle_cancel(self, item):
-        # Переключаем статус
-        is_canc = getattr(item, "cancelled", False)
-        item.cancelled = not is_canc
+    def _fill_bulk_menu(self, menu):
+        core = self.core
+        items = core.selected_items()
+        roots = core.selected_items(roots_only=True)
+        count = len(items)
+
+        menu.addAction(Loc.t("ctx_bulk_check", "Mark done ({n})").format(n=count)).triggered.connect(
+            lambda: core.set_checked(items, True)
+        )
+        menu.addAction(Loc.t("ctx_bulk_uncheck", "Mark not done ({n})").format(n=count)).triggered.connect(
+            lambda: core.set_checked(items, False)
+        )
+        menu.addAction(Loc.t("ctx_bulk_cancel", "Cancel ({n})").format(n=count)).triggered.connect(
+            lambda: core.set_cancelled(items, True)
+        )
+        menu.addAction(Loc.t("ctx_bulk_restore", "Restore ({n})").format(n=count)).triggered.connect(
+            lambda: core.set_cancelled(items, False)
+        )
+
+        menu.addSeparator()
+        menu.addAction(Loc.t("ctx_move_up", "Move up")).triggered.connect(lambda: core.move_vertical(-1))
+        menu.addAction(Loc.t("ctx_move_down", "Move down")).triggered.connect(lambda: core.move_vertical(1))
+        menu.addAction(Loc.t("ctx_indent", "Indent")).triggered.connect(core.indent)
+        menu.addAction(Loc.t("ctx_unindent", "Outdent")).triggered.connect(core.unindent)
 
-        # Перерисовываем дерево, чтобы сработал стиль зачеркивания
-        self.mw.tree.viewport().update()
-        # Сохраняем
-        self.core.callback_save()
-        self.mw.refresh_map_if_open()
+        menu.addSeparator()
+        menu.addAction(Loc.t("ctx_bulk_delete", "Delete ({n})").format(n=count)).triggered.connect(
+            lambda: core.delete_items(roots)
+        )
+
+    def _toggle_cancel(self, item):
+        # Переключаем статус (стиль зачеркивания, сохранение и карта — в core)
+        self.core.set_cancelled([item], not getattr(item, "cancelled", False))
 
     def _add_sub(self, item):
+        # Создание подпункта и ввод его текста — одно действие: одно сохранение
+        # и один шаг undo, когда редактор закроется (Enter, Esc или уход фокуса)
+        pending = ExitStack()
+        pending.enter_context(self.core.batch())
+
         # Создаем подпункт
         child = TodoItem(item, "Подпункт")
         # Разворачиваем родителя, чтобы видеть дитя
@@ -70,6 +110,15 @@ class TreeMenu:
         # Принудительно скроллим экран к новому элементу
         self.mw.tree.scrollToItem(child)
 
+        delegate = self.mw.tree.itemDelegate()
+
+        def finish(*_args):
+            delegate.closeEditor.disconnect(finish)
+            pending.close()
+
+        delegate.closeEditor.connect(finish)
+        self.core.request_save()
         # Включаем редактирование
         self.mw.tree.editItem(child, 0)
-        self.core.callback_save()
+        if self.mw.tree.state() != QAbstractItemView.State.EditingState:
+            finish()  # Редактор не открылся — сохраняем сразу
@@ -1,12 +1,17 @@
 # tree_progress.py
 from PyQt6.QtCore import QDateTime, Qt
 
+from note_meta import is_complete
+from perf import Perf
+
 
 class TreeProgress:
-    def __init__(self, main_window):
+    def __init__(self, main_window, hoist=None):
         self.mw = main_window
         self.tree = main_window.tree
+        self.hoist = hoist  # В фокусе на ветке прогресс и радуга — её, время завершения — заметки
 
+    @Perf.timed("tree.calculate_and_update")
     def calculate_and_update(self):
         root_count = self.tree.topLevelItemCount()
         if root_count == 0:
@@ -26,8 +31,17 @@ class TreeProgress:
                 cancelled += 1.0
                 continue
 
+            # Свернутая задача, дети которой еще не построены, — считаем по данным
+            pending = getattr(item, "pending", None)
+            if pending:
+                c_total = len(pending)
+                c_canc = sum(1 for child in pending if child.get("cancelled", False))
+                c_done = sum(1 for child in pending if not child.get("cancelled", False) and child.get("checked"))
+                completed += c_done / c_total
+                cancelled += c_canc / c_total
+
             # Если есть дети
-            if item.childCount() > 0:
+            elif item.childCount() > 0:
                 c_total = item.childCount()
                 c_done = 0
                 c_canc = 0
@@ -56,12 +70,19 @@ class TreeProgress:
         # Радуга: если (Сделано + Отменено) == Всего
         is_done = (completed + cancelled) >= (total - 0.001)
 
-        if is_done and total > 0:
+        note_done = is_done
+        if self.hoist is not None and self.hoist.active:
+            data = self.mw.data
+            note_done = is_complete(data.all_notes[data.current_note_id].get("tasks", []))
+        if note_done:
             if not self.mw.data.finish_time:
                 self.mw.data.finish_time = QDateTime.currentDateTime()
-            self.mw.rainbow.start()
         else:
             self.mw.data.finish_time = None
+
+        if is_done and total > 0:
+            self.mw.rainbow.start()
+        else:
             self.mw.rainbow.stop()
             # Возврат обычного стиля
             if hasattr(self.mw, "style_logic"):
@@ -8,7 +8,6 @@ from PyQt6.QtWidgets import (
     QAbstractItemView,
     QHBoxLayout,
     QLabel,
-    QLineEdit,
     QProgressBar,
     QPushButton,
     QSizePolicy,
@@ -21,7 +20,7 @@ from PyQt6.QtWidgets import (
 from delegates import DateDelegate
 from styles import Styles
 from task_tree import DraggableTreeWidget
-from widgets import CyberGrip, FloatingUnlockBtn, TitleLabel
+from widgets import Breadcrumbs, CyberGrip, FloatingUnlockBtn, TaskInput, TitleLabel
 
 
 class UISetup:
@@ -127,6 +126,21 @@ class UISetup:
 
         window.layout.addLayout(progress_layout)
 
+        # --- 6a. Хлебные крошки фокуса на ветке (скрыты, пока фокуса нет) ---
+        window.crumbs = Breadcrumbs()
+        window.layout.addWidget(window.crumbs)
+
+        # --- 6b. Плашка активного фильтра вида (клик — снять фильтр) ---
+        window.filter_bar = QPushButton()
+        window.filter_bar.setFlat(True)
+        window.filter_bar.setCursor(Qt.CursorShape.PointingHandCursor)
+        window.filter_bar.setStyleSheet(
+            "QPushButton { color: #9e9e9e; font-size: 11px; text-align: left; border: none; padding: 0 2px; }"
+            "QPushButton:hover { color: #e0e0e0; }"
+        )
+        window.filter_bar.hide()
+        window.layout.addWidget(window.filter_bar)
+
         # --- 7. Дерево задач ---
         window.tree = DraggableTreeWidget(on_change_callback=None)
         window.tree.setHeaderHidden(True)
@@ -171,7 +185,7 @@ class UISetup:
         window.layout.addWidget(window.tree)
 
         # --- 8. Поле ввода ---
-        window.inp = QLineEdit()
+        window.inp = TaskInput()
         window.inp.setPlaceholderText("+ Новая задача")
         window.layout.addWidget(window.inp)
 
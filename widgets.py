@@ -1,7 +1,19 @@
 # widgets.py
 from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QBrush, QColor, QFontMetrics, QLinearGradient, QPainter, QPen
-from PyQt6.QtWidgets import QLabel, QPushButton, QSizeGrip, QSizePolicy, QVBoxLayout, QWidget
+from PyQt6.QtGui import QAction, QBrush, QColor, QFontMetrics, QKeySequence, QLinearGradient, QPainter, QPen
+from PyQt6.QtWidgets import (
+    QApplication,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QSizeGrip,
+    QSizePolicy,
+    QVBoxLayout,
+    QWidget,
+)
+
+from outline_paste import is_outline
 
 
 # --- КЛАСС 1: РУЧНОЙ ГРИП ---
@@ -99,3 +111,72 @@ class TitleLabel(QLabel):
 
         # Обязательно вызываем родительский метод, чтобы не сломать стандартное поведение
         super().mouseDoubleClickEvent(event)
+
+
+# --- КЛАСС 5: ХЛЕБНЫЕ КРОШКИ ФОКУСА ---
+class Breadcrumbs(QWidget):
+    """Путь к ветке в фокусе: клик по звену — подняться на этот уровень."""
+
+    crumbClicked = pyqtSignal(int)  # Сколько звеньев пути оставить (0 — вся заметка)
+    MAX_CHARS = 24
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._layout = QHBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self._layout.setSpacing(2)
+        self.setStyleSheet("""
+            QPushButton { background: transparent; border: none; color: #9e9e9e; font-size: 11px; padding: 0 2px; }
+            QPushButton:hover { color: #e0e0e0; text-decoration: underline; }
+            QLabel { color: #606060; font-size: 11px; }
+        """)
+        self.hide()
+
+    def set_path(self, labels):
+        while self._layout.count():
+            widget = self._layout.takeAt(0).widget()
+            if widget:
+                widget.deleteLater()
+        for depth, label in enumerate(labels):
+            if depth:
+                self._layout.addWidget(QLabel("›"))
+            if depth == len(labels) - 1:
+                current = ElidedLabel(label)
+                current.setStyleSheet("color: #e0e0e0; font-size: 11px;")
+                self._layout.addWidget(current, 1)
+                continue
+            short = label if len(label) <= self.MAX_CHARS else label[: self.MAX_CHARS - 1] + "…"
+            btn = QPushButton(short)
+            btn.setToolTip(label)
+            btn.setCursor(Qt.CursorShape.PointingHandCursor)
+            btn.clicked.connect(lambda _checked=False, d=depth: self.crumbClicked.emit(d))
+            self._layout.addWidget(btn)
+        self.setVisible(bool(labels))
+
+
+# --- КЛАСС 6: ПОЛЕ НОВОЙ ЗАДАЧИ ---
+class TaskInput(QLineEdit):
+    # Многострочная вставка (список задач) — QLineEdit склеил бы её в одну строку
+    outlinePasted = pyqtSignal(str)
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.StandardKey.Paste) and self.paste_outline():
+            return
+        super().keyPressEvent(event)
+
+    def contextMenuEvent(self, event):
+        menu = self.createStandardContextMenu()
+        paste = menu.findChild(QAction, "edit-paste")
+        if paste is not None:
+            paste.triggered.disconnect()
+            paste.triggered.connect(lambda: self.paste_outline() or self.paste())
+        menu.exec(event.globalPos())
+        menu.deleteLater()
+
+    def paste_outline(self):
+        """Если в буфере список из нескольких строк — отдает его в outlinePasted."""
+        text = QApplication.clipboard().text()
+        if not is_outline(text):
+            return False
+        self.outlinePasted.emit(text)
+        return True